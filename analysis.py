@@ -1,6 +1,12 @@
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
+from models import BASE_CURRENCY, TransactionColumns
+from utils import MINOR_UNITS
+from instrumentation import traced
 
+
+@traced('analysis.transactions_to_df', rows=lambda result, transactions: len(transactions))
 def transactions_to_df(transactions: list) -> pd.DataFrame:
     """Преобразует список объектов транзакций в объект pandas DataFrame.
 
@@ -14,29 +20,46 @@ def transactions_to_df(transactions: list) -> pd.DataFrame:
     Returns:
         pd.DataFrame: Таблица данных с колонками, соответствующими полям транзакции.
         Если список пуст, возвращается пустой DataFrame. Колонки результата:
-        'amount', 'category', 'date', 'description', 'transaction_type'.
+        'amount', 'category', 'date', 'description', 'transaction_type', 'currency'.
+        Колонка 'amount' имеет тип int64 и содержит суммы в копейках.
 
     Note:
         Столбец 'date' автоматически конвертируется в формат :obj:`pandas.Timestamp`
         только в том случае, если DataFrame не пуст.
 
     Example:
-        >>> transactions = [Transaction(100.0, "Еда", "2026-01-06")]
+        >>> transactions = [Transaction(10000, "Еда", "2026-01-06")]
         >>> df = transactions_to_df(transactions)
         >>> print(df['date'].dtype)
         datetime64[ns]
     """
-    df = pd.DataFrame([tr.to_dict() for tr in transactions])
+    if isinstance(transactions, TransactionColumns):
+        # Журнал из контрольной точки уже хранится столбцами
+        return pd.DataFrame({
+            name: transactions.column(name)
+            for name in ('amount', 'category', 'date', 'description', 'transaction_type', 'currency')
+        })
+    # Столбцы собираются напрямую: суммы сразу в int64 (копейки), без float
+    df = pd.DataFrame({
+        'amount': np.fromiter((tr.amount for tr in transactions), dtype=np.int64, count=len(transactions)),
+        'category': [tr.category for tr in transactions],
+        'date': [tr.date for tr in transactions],
+        'description': [tr.description for tr in transactions],
+        'transaction_type': [tr.transaction_type for tr in transactions],
+        'currency': [tr.currency for tr in transactions],
+    })
     if not df.empty:
         # Приведение к формату datetime для корректной работы с временными рядами
         df["date"] = pd.to_datetime(df["date"])
     return df
 
+@traced('analysis.group_by_category', rows=lambda result, df, *args, **kwargs: len(df))
 def group_by_category(df: pd.DataFrame, transaction_type: str) -> pd.Series:
     """Группирует данные по категориям и вычисляет суммарный объем средств.
 
     Функция фильтрует входной DataFrame по указанному типу транзакций (доход или расход)
     и суммирует значения в столбце 'amount' для каждой уникальной категории.
+    Суммирование выполняется в целых числах (int64, копейки), поэтому итоги точны.
 
     Args:
         df (pd.DataFrame): Таблица данных, содержащая столбцы 'transaction_type', 
@@ -46,17 +69,18 @@ def group_by_category(df: pd.DataFrame, transaction_type: str) -> pd.Series:
 
     Returns:
         pd.Series: Объект Series, где индексами являются названия категорий, 
-        а значениями — общие суммы по каждой категории.
+        а значениями — общие суммы по каждой категории в копейках.
 
     Example:
         >>> # Получение суммы расходов по категориям
         >>> expenses_by_cat = group_by_category(df, 'expense')
         >>> print(expenses_by_cat['Еда'])
-        5000.0
+        500000
     """
     filtered = df[df["transaction_type"] == transaction_type]
     return filtered.groupby("category")["amount"].sum()
 
+@traced('analysis.plot_pie_by_category', rows=lambda result, df, *args, **kwargs: len(df))
 def plot_pie_by_category(df: pd.DataFrame, transaction_type: str):
     """Строит круговую диаграмму распределения финансов по категориям.
 
@@ -80,20 +104,29 @@ def plot_pie_by_category(df: pd.DataFrame, transaction_type: str):
         None: Функция отображает интерактивное окно с графиком через `plt.show()`.
     """
     data = group_by_category(df, transaction_type)
+    show_pie(data, transaction_type)
+
+def show_pie(data: pd.Series, transaction_type: str, period: str = None):
+    """Отображает круговую диаграмму по готовым суммам категорий."""
     if data.empty:
         print(f"Нет данных для {transaction_type}")
         return
 
+    title = f"{transaction_type.capitalize()} по категориям"
+    if period:
+        title += f" ({period})"
+
     # Построение диаграммы с настройками размера и отображением процентов
     data.plot(
             kind="pie", 
             autopct="%1.1f%%", 
             figsize=(6,6), 
-            title=f"{transaction_type.capitalize()} по категориям"
+            title=title
         )
     plt.ylabel("") # Скрываем стандартную подпись оси Y (название Series)
     plt.show()
 
+@traced('analysis.plot_income_expence_over_time', rows=lambda result, df, *args, **kwargs: len(df))
 def plot_income_expence_over_time(df: pd.DataFrame):
     """Визуализирует динамику доходов и расходов во времени.
 
@@ -123,13 +156,169 @@ def plot_income_expence_over_time(df: pd.DataFrame):
         return
     # Группировка по дате и типу, затем разворачивание типов в отдельные колонки
     df_grouped = df.groupby(["date", "transaction_type"])["amount"].sum().unstack(fill_value=0)
+    show_trend(df_grouped)
+
+def show_trend(df_grouped: pd.DataFrame, xlabel: str = "Дата"):
+    """Отображает линейный график сумм (в копейках) по периодам и типам операций."""
+    if df_grouped.empty:
+        print("Нет данных для графика")
+        return
+
+    # Перевод копеек в рубли только для отображения на графике
+    df_grouped = df_grouped / MINOR_UNITS
     # Построение графика с маркерами на каждой точке данных
     df_grouped.plot(
             figsize=(8,5), 
             marker="o", 
             title="Доходы и расходы по времени"
         )
-    plt.xlabel("Дата")
+    plt.xlabel(xlabel)
     plt.ylabel("Сумма")
     plt.grid(True)
-    plt.show()
\ No newline at end of file
+    plt.show()
+
+@traced('analysis.plot_pie_from_cube')
+def plot_pie_from_cube(cube, transaction_type: str, period: str = None):
+    """Строит круговую диаграмму по категориям из куба агрегатов.
+
+    В отличие от :func:`plot_pie_by_category`, не обращается к исходным
+    операциям: суммы берутся из :class:`cube.AggregationCube` за выбранный период.
+
+    Args:
+        cube (AggregationCube): Куб агрегатов.
+        transaction_type (str): 'expense' (расходы) или 'income' (доходы).
+        period (str, optional): Год ('2026'), месяц ('2026-01') или день
+            ('2026-01-05'). По умолчанию — вся история.
+
+    Returns:
+        None: Функция отображает интерактивное окно с графиком через `plt.show()`.
+    """
+    data = cube.category_totals(transaction_type, period, period)
+    show_pie(data, transaction_type, period)
+
+@traced('analysis.plot_trend_from_cube')
+def plot_trend_from_cube(cube, level: str = 'day', period: str = None):
+    """Строит график динамики доходов и расходов из куба агрегатов.
+
+    Args:
+        cube (AggregationCube): Куб агрегатов.
+        level (str, optional): Шаг графика: 'day', 'month' или 'year'.
+        period (str, optional): Ограничение периода (год, месяц или день).
+
+    Returns:
+        None: Функция отображает интерактивное окно с графиком через `plt.show()`.
+    """
+    df_grouped = cube.time_series(level, period, period)
+    show_trend(df_grouped, "Дата" if level == 'day' else "Период")
+
+class CurrencyConverter:
+    """Пересчитывает суммы DataFrame в валюту отчета по датированным курсам.
+
+    Пересчет выполняется векторно для всей таблицы через as-of соединение
+    (:func:`pandas.merge_asof`) по дате: для каждой операции берется последний
+    курс ее валюты на дату операции или раньше. Поштучный поиск курсов не используется.
+
+    Пересчитанные таблицы кэшируются для каждой валюты отчета, если вызывающий
+    код передает версию журнала: ключ кэша — валюта, версия таблицы курсов и
+    версия журнала. Замена таблицы курсов сбрасывает кэш.
+
+    Attributes:
+        rates (pd.DataFrame): Таблица курсов (см. :func:`storage.load_rates`).
+        version (int): Номер версии таблицы курсов, растет при каждой замене.
+    """
+
+    def __init__(self, rates: pd.DataFrame):
+        """Создает конвертер.
+
+        Args:
+            rates (pd.DataFrame): Таблица с колонками 'date', 'currency', 'rate'.
+        """
+        self.version = 0
+        self._cache = {}
+        self.set_rates(rates)
+
+    def set_rates(self, rates: pd.DataFrame):
+        """Заменяет таблицу курсов и сбрасывает кэш пересчитанных таблиц."""
+        self.rates = rates.sort_values('date', kind='stable').reset_index(drop=True)
+        self.version += 1
+        self._cache.clear()
+
+    def rate_column(self, df: pd.DataFrame, currency: str) -> pd.Series:
+        """Возвращает курс валюты каждой операции к базовой валюте на ее дату.
+
+        Args:
+            df (pd.DataFrame): Операции с колонками 'date' и 'currency'.
+            currency (str): Не используется для поиска, передается для сообщений
+                об ошибке. Курсы всегда выражены в :data:`models.BASE_CURRENCY`.
+
+        Returns:
+            pd.Series: Курсы, выровненные по индексу `df`. Для базовой валюты — 1.0.
+
+        Raises:
+            ValueError: Если для какой-либо операции нет курса на ее дату.
+        """
+        # Ключи приводятся к одинаковым типам: merge_asof строг к dtype.
+        # Разрешение — микросекунды: в наносекундах не помещаются даты до 1677 года
+        left = pd.DataFrame({
+            'date': df['date'].astype('datetime64[us]').to_numpy(),
+            'currency': df['currency'].to_numpy(),
+            'position': np.arange(len(df)),
+        }).astype({'currency': object}).sort_values('date', kind='stable')
+        right = self.rates.astype({'date': 'datetime64[us]', 'currency': object})
+
+        merged = pd.merge_asof(left, right, on='date', by='currency', direction='backward')
+        merged.loc[merged['currency'] == BASE_CURRENCY, 'rate'] = 1.0
+
+        missing = merged['rate'].isna()
+        if missing.any():
+            first = merged[missing].iloc[0]
+            raise ValueError(
+                f"Нет курса {first['currency']} на {first['date']:%Y-%m-%d} "
+                f"для пересчета в {currency}"
+            )
+
+        rates = np.empty(len(df))
+        rates[merged['position'].to_numpy()] = merged['rate'].to_numpy()
+        return pd.Series(rates, index=df.index)
+
+    def convert(self, df: pd.DataFrame, currency: str = BASE_CURRENCY, version: str = None) -> pd.DataFrame:
+        """Пересчитывает суммы операций в валюту отчета.
+
+        Args:
+            df (pd.DataFrame): Операции (результат :func:`transactions_to_df`).
+            currency (str, optional): Валюта отчета. По умолчанию базовая.
+            version (str, optional): Версия журнала, из которого построена `df`
+                (см. :func:`charts.ledger_version`). Если задана, результат
+                кэшируется, и повторный вызов с той же версией, валютой и
+                таблицей курсов не выполняет пересчет. Без версии пересчет
+                выполняется всегда.
+
+        Returns:
+            pd.DataFrame: Таблица той же формы, где 'amount' выражена в копейках
+            валюты отчета, а 'currency' равна `currency`.
+
+        Raises:
+            ValueError: Если не хватает курсов для пересчета.
+        """
+        currency = currency.upper()
+        if df.empty:
+            return df
+
+        key = (self.version, version)
+        cached = self._cache.get(currency)
+        if version is not None and cached is not None and cached[0] == key:
+            return cached[1]
+
+        to_base = self.rate_column(df, currency)
+        if currency == BASE_CURRENCY:
+            factor = to_base
+        else:
+            target = self.rate_column(df.assign(currency=currency), currency)
+            factor = to_base / target
+
+        # Результат округляется до целых копеек валюты отчета
+        amounts = np.rint(df['amount'].to_numpy() * factor.to_numpy()).astype(np.int64)
+        converted = df.assign(amount=amounts, currency=currency)
+        if version is not None:
+            self._cache[currency] = (key, converted)
+        return converted
@@ -0,0 +1,362 @@
+import sys
+import math
+import argparse
+import numpy as np
+import pandas as pd
+import storage
+from analysis import transactions_to_df
+from utils import MINOR_UNITS
+from instrumentation import traced
+
+
+# Порог отклонения логарифма суммы от нормы категории (в стандартных отклонениях)
+Z_THRESHOLD = 3.5
+
+# Квантиль недавних сумм категории, выше которого операция считается необычной
+QUANTILE = 0.99
+
+# Период полураспада веса операции в квантильном скетче (в операциях категории)
+HALF_LIFE = 200
+
+# Минимум операций категории (и дня недели) для оценки
+MIN_HISTORY = 10
+
+# Квантильный скетч: корзины по log2 суммы в копейках с шагом 1/4 октавы
+_BINS_PER_OCTAVE = 4
+_BINS = 40 * _BINS_PER_OCTAVE
+
+# Порог перенормировки весов скетча
+_MAX_BOOST = 1e100
+
+
+def _bin(amounts):
+    """Номер корзины скетча для суммы (или массива сумм) в копейках."""
+    return np.clip((np.log2(np.maximum(amounts, 1)) * _BINS_PER_OCTAVE).astype(np.int64), 0, _BINS - 1)
+
+
+class _CategoryStats:
+    """Онлайн-статистика сумм расходов одной категории в одной валюте.
+
+    Среднее и дисперсия логарифма суммы считаются методом Уэлфорда
+    (в целом и отдельно по дням недели), распределение недавних сумм —
+    гистограммой с экспоненциальным затуханием весов. Обновление и
+    удаление операции — O(1).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.dow_count = np.zeros(7, dtype=np.int64)
+        self.dow_mean = np.zeros(7)
+        self.hist = np.zeros(_BINS)
+        # Количество операций в каждой корзине (без весов) — для удаления
+        self.hist_count = np.zeros(_BINS, dtype=np.int64)
+        self.total = 0.0
+        # Вес следующей операции; растет вместо умножения всех весов на затухание
+        self.boost = 1.0
+
+    def update(self, amount: int, weekday: int, decay: float):
+        """Учитывает одну операцию."""
+        x = math.log(max(amount, 1))
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+        self.dow_count[weekday] += 1
+        self.dow_mean[weekday] += (x - self.dow_mean[weekday]) / self.dow_count[weekday]
+
+        self.boost /= decay
+        self.hist[_bin(amount)] += self.boost
+        self.hist_count[_bin(amount)] += 1
+        self.total += self.boost
+        if self.boost > _MAX_BOOST:
+            self.hist /= self.boost
+            self.total /= self.boost
+            self.boost = 1.0
+
+    def remove(self, amount: int, weekday: int):
+        """Исключает ранее учтенную операцию.
+
+        Среднее и дисперсия пересчитываются точно (обратный шаг Уэлфорда).
+        Вес операции в скетче неизвестен, поэтому из ее корзины вычитается
+        средний вес операций этой корзины.
+        """
+        if self.count <= 1:
+            self.__init__()
+            return
+        x = math.log(max(amount, 1))
+        mean = (self.count * self.mean - x) / (self.count - 1)
+        self.m2 = max(self.m2 - (x - mean) * (x - self.mean), 0.0)
+        self.mean = mean
+        self.count -= 1
+
+        n = self.dow_count[weekday]
+        self.dow_mean[weekday] = (n * self.dow_mean[weekday] - x) / (n - 1) if n > 1 else 0.0
+        self.dow_count[weekday] = max(n - 1, 0)
+
+        b = _bin(amount)
+        if self.hist_count[b] > 0:
+            weight = self.hist[b] / self.hist_count[b]
+            self.hist[b] -= weight
+            self.total = max(self.total - weight, 0.0)
+            self.hist_count[b] -= 1
+
+    def quantile(self, q: float) -> float:
+        """Верхняя граница корзины, в которую попадает квантиль `q` недавних сумм (в копейках)."""
+        if self.total <= 0:
+            return math.inf
+        cumulative = np.cumsum(self.hist)
+        index = int(np.searchsorted(cumulative, q * self.total, side='left'))
+        return 2.0 ** ((min(index, _BINS - 1) + 1) / _BINS_PER_OCTAVE)
+
+
+class AnomalyDetector:
+    """Онлайн-детектор необычных расходов по категориям.
+
+    Для каждой пары «категория, валюта» поддерживается статистика
+    логарифмов сумм: среднее и дисперсия (Уэлфорд), поправка на день недели
+    и квантильный скетч с экспоненциальным затуханием, отражающий недавнее
+    поведение. Операция считается необычной, если ее сумма отклоняется от
+    нормы категории (с учетом дня недели) больше чем на `threshold`
+    стандартных отклонений и при этом превышает квантиль `quantile`
+    недавних сумм.
+
+    Проверка и обновление одной операции выполняются за O(1);
+    начальная статистика по всему журналу строится одним векторным проходом
+    (:meth:`fit`), пакетная проверка файла — :meth:`score_df`.
+
+    Attributes:
+        threshold (float): Порог отклонения в стандартных отклонениях.
+        quantile (float): Квантиль недавних сумм.
+        decay (float): Множитель затухания веса за одну операцию категории.
+        min_history (int): Минимум операций для оценки.
+    """
+
+    def __init__(self, threshold: float = Z_THRESHOLD, quantile: float = QUANTILE,
+                 half_life: int = HALF_LIFE, min_history: int = MIN_HISTORY):
+        """Создает пустой детектор.
+
+        Args:
+            threshold (float, optional): Порог отклонения.
+            quantile (float, optional): Квантиль недавних сумм.
+            half_life (int, optional): Период полураспада веса в скетче (в операциях).
+            min_history (int, optional): Минимум операций категории для оценки.
+        """
+        self.threshold = threshold
+        self.quantile = quantile
+        self.decay = 0.5 ** (1.0 / half_life)
+        self.min_history = min_history
+        self._stats = {}
+
+    @traced('anomaly.fit', rows=lambda result, self, df: len(df))
+    def fit(self, df: pd.DataFrame):
+        """Строит статистику по таблице операций за один векторный проход.
+
+        Прежняя статистика заменяется.
+
+        Args:
+            df (pd.DataFrame): Операции с колонками 'amount' (int64, копейки),
+                'category', 'currency', 'date' (datetime64) и 'transaction_type'
+                в порядке журнала (см. :func:`analysis.transactions_to_df`).
+        """
+        self._stats = {}
+        expenses = df[df['transaction_type'] == 'expense'] if not df.empty else df
+        if expenses.empty:
+            return
+
+        grouped = expenses.groupby(['category', 'currency'], sort=False)
+        codes = grouped.ngroup().to_numpy()
+        groups = grouped.size().index
+        n_groups = len(groups)
+        amounts = expenses['amount'].to_numpy(dtype=np.int64)
+        x = np.log(np.maximum(amounts, 1))
+        weekdays = expenses['date'].dt.dayofweek.to_numpy()
+
+        counts = np.bincount(codes, minlength=n_groups)
+        means = np.bincount(codes, weights=x, minlength=n_groups) / counts
+        m2 = np.bincount(codes, weights=(x - means[codes]) ** 2, minlength=n_groups)
+
+        cells = codes * 7 + weekdays
+        dow_counts = np.bincount(cells, minlength=n_groups * 7).reshape(n_groups, 7)
+        dow_sums = np.bincount(cells, weights=x, minlength=n_groups * 7).reshape(n_groups, 7)
+        dow_means = np.divide(dow_sums, dow_counts, out=np.zeros_like(dow_sums), where=dow_counts > 0)
+
+        # Вес операции в скетче: decay ** (сколько операций категории было после нее)
+        order = np.argsort(codes, kind='stable')
+        sorted_codes = codes[order]
+        starts = np.r_[0, np.cumsum(counts)[:-1]]
+        ages = counts[sorted_codes] - 1 - (np.arange(len(order)) - starts[sorted_codes])
+        weights = self.decay ** ages
+        bins = sorted_codes * _BINS + _bin(amounts[order])
+        hist = np.bincount(bins, weights=weights, minlength=n_groups * _BINS).reshape(n_groups, _BINS)
+        hist_counts = np.bincount(bins, minlength=n_groups * _BINS).reshape(n_groups, _BINS)
+
+        for i, key in enumerate(groups):
+            stats = _CategoryStats()
+            stats.count = int(counts[i])
+            stats.mean = float(means[i])
+            stats.m2 = float(m2[i])
+            stats.dow_count = dow_counts[i].copy()
+            stats.dow_mean = dow_means[i].copy()
+            stats.hist = hist[i].copy()
+            stats.hist_count = hist_counts[i].copy()
+            stats.total = float(hist[i].sum())
+            self._stats[key] = stats
+
+    def update(self, transaction):
+        """Учитывает новую операцию в статистике ее категории (O(1)).
+
+        Args:
+            transaction (Transaction): Операция; доходы не учитываются.
+        """
+        if transaction.transaction_type != 'expense':
+            return
+        key = (transaction.category, transaction.currency)
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = _CategoryStats()
+        stats.update(transaction.amount, transaction.date.weekday(), self.decay)
+
+    def remove(self, transaction):
+        """Исключает учтенную ранее операцию из статистики ее категории (O(1)).
+
+        Используется при правке и удалении операций: правка — это удаление
+        прежней версии и :meth:`update` новой.
+
+        Args:
+            transaction (Transaction): Операция; доходы не учитываются.
+        """
+        if transaction.transaction_type != 'expense':
+            return
+        stats = self._stats.get((transaction.category, transaction.currency))
+        if stats is not None:
+            stats.remove(transaction.amount, transaction.date.weekday())
+
+    def score(self, transaction) -> dict:
+        """Оценивает операцию относительно нормы ее категории (O(1)), не меняя статистику.
+
+        Args:
+            transaction (Transaction): Проверяемая операция.
+
+        Returns:
+            dict: 'z' — отклонение логарифма суммы в стандартных отклонениях,
+            'expected' — типичная сумма категории в этот день недели (копейки),
+            'upper' — квантиль недавних сумм (копейки), 'anomaly' — признак
+            необычной операции. None, если операция не расход или истории
+            категории недостаточно.
+        """
+        if transaction.transaction_type != 'expense':
+            return None
+        stats = self._stats.get((transaction.category, transaction.currency))
+        if stats is None or stats.count < self.min_history:
+            return None
+
+        x = math.log(max(transaction.amount, 1))
+        weekday = transaction.date.weekday()
+        center = stats.mean
+        if stats.dow_count[weekday] >= self.min_history:
+            center = stats.dow_mean[weekday]
+        std = math.sqrt(stats.m2 / (stats.count - 1))
+        if std > 0:
+            z = (x - center) / std
+        else:
+            z = 0.0 if x <= center else math.inf
+
+        upper = stats.quantile(self.quantile)
+        return {
+            'z': z,
+            'expected': round(math.exp(center)),
+            'upper': upper,
+            'anomaly': z >= self.threshold and transaction.amount > upper,
+        }
+
+    @traced('anomaly.score_df', rows=lambda result, self, df: len(df))
+    def score_df(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Пакетно оценивает таблицу операций относительно текущей статистики.
+
+        Статистика не меняется: все строки оцениваются по одной и той же
+        норме, как при проверке импортируемого файла.
+
+        Args:
+            df (pd.DataFrame): Операции (колонки как в :meth:`fit`).
+
+        Returns:
+            pd.DataFrame: Копия `df` с колонками 'z', 'upper' и 'anomaly'.
+            Для доходов и категорий без достаточной истории 'z' и 'upper' — NaN,
+            'anomaly' — False.
+        """
+        result = df.copy()
+        keys = list(self._stats)
+        eligible = [k for k in keys if self._stats[k].count >= self.min_history]
+        if df.empty or not eligible:
+            result['z'] = np.nan
+            result['upper'] = np.nan
+            result['anomaly'] = False
+            return result
+
+        # Группы таблицы сопоставляются с категориями статистики (групп немного)
+        grouped = df.groupby(['category', 'currency'], sort=False)
+        positions = {key: i for i, key in enumerate(eligible)}
+        mapping = np.array([positions.get(key, -1) for key in grouped.size().index], dtype=np.int64)
+        index = mapping[grouped.ngroup().to_numpy()]
+        known = (index >= 0) & (df['transaction_type'] == 'expense').to_numpy()
+
+        stats = [self._stats[k] for k in eligible]
+        means = np.array([s.mean for s in stats])
+        stds = np.array([math.sqrt(s.m2 / (s.count - 1)) for s in stats])
+        uppers = np.array([s.quantile(self.quantile) for s in stats])
+        dow_counts = np.array([s.dow_count for s in stats])
+        dow_means = np.array([s.dow_mean for s in stats])
+
+        safe = np.where(known, index, 0)
+        weekdays = df['date'].dt.dayofweek.to_numpy()
+        x = np.log(np.maximum(df['amount'].to_numpy(dtype=np.int64), 1))
+        center = np.where(dow_counts[safe, weekdays] >= self.min_history, dow_means[safe, weekdays], means[safe])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z = np.where(stds[safe] > 0, (x - center) / stds[safe], np.where(x <= center, 0.0, np.inf))
+
+        result['z'] = np.where(known, z, np.nan)
+        result['upper'] = np.where(known, uppers[safe], np.nan)
+        result['anomaly'] = known & (z >= self.threshold) & (df['amount'].to_numpy() > uppers[safe])
+        return result
+
+
+def describe(transaction, score: dict) -> str:
+    """Текст предупреждения о необычной операции для пользователя."""
+    return (
+        f"Сумма {transaction.amount / MINOR_UNITS:.2f} {transaction.currency} в категории "
+        f"«{transaction.category}» намного больше обычной "
+        f"(типично около {score['expected'] / MINOR_UNITS:.2f}, "
+        f"недавние суммы до {score['upper'] / MINOR_UNITS:.2f})."
+    )
+
+
+def main():
+    """Точка входа: проверяет CSV-файл операций по статистике текущего журнала.
+
+    Файл разбирается и оценивается частями, поэтому в памяти не оказывается целиком.
+    """
+    parser = argparse.ArgumentParser(description='Поиск необычных расходов в файле операций')
+    parser.add_argument('file', help='CSV-файл в формате журнала приложения')
+    parser.add_argument('--threshold', type=float, default=Z_THRESHOLD)
+    args = parser.parse_args()
+
+    detector = AnomalyDetector(threshold=args.threshold)
+    detector.fit(transactions_to_df(storage.load_transactions()))
+
+    checked = found = 0
+    with open(args.file, encoding='utf-8', newline='') as f:
+        for chunk in storage.iter_rows(f):
+            scored = detector.score_df(transactions_to_df(chunk))
+            flagged = scored[scored['anomaly']]
+            for row in flagged.itertuples():
+                print(f"{row.date:%Y-%m-%d}\t{row.category}\t{row.amount / MINOR_UNITS:.2f} {row.currency}\tz={row.z:.1f}")
+            checked += len(scored)
+            found += len(flagged)
+    print(f'Проверено операций: {checked}, необычных: {found}', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
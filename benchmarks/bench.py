@@ -0,0 +1,201 @@
+"""Бенчмарки «горячих» путей приложения с сохранением результатов в JSON.
+
+Измеряются время (лучшее из нескольких повторов) и пиковое выделение памяти
+(:mod:`tracemalloc`) для :func:`storage.load_transactions`,
+:func:`analysis.transactions_to_df`, :func:`analysis.group_by_category`
+и :meth:`gui.FinancialPlannerApp.refresh_transaction_table`.
+
+Примеры:
+    python benchmarks/bench.py run --size 10k --output benchmarks/baselines/10k.json
+    python benchmarks/bench.py compare benchmarks/baselines/10k.json current.json --threshold 0.1
+"""
+import os
+import sys
+import gc
+import json
+import time
+import platform
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import storage
+import analysis
+from synthetic import SIZES, write_csv
+
+
+def measure(func, repeat: int = 3, trace_memory: bool = True) -> tuple:
+    """Измеряет время выполнения и пиковую память вызова.
+
+    Args:
+        func (callable): Функция без аргументов.
+        repeat (int, optional): Количество повторов для замера времени.
+        trace_memory (bool, optional): Замерять ли память отдельным прогоном
+            (tracemalloc заметно замедляет выполнение, поэтому время меряется без него).
+
+    Returns:
+        tuple: (результат последнего вызова, словарь с 'seconds' и 'peak_bytes').
+    """
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+
+    peak = None
+    if trace_memory:
+        gc.collect()
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return result, {'seconds': best, 'peak_bytes': peak}
+
+
+def _bench_refresh_table(transactions, repeat):
+    """Замеряет перерисовку таблицы. Требует графического окружения Tk."""
+    import tkinter as tk
+    from gui import FinancialPlannerApp
+
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        return None     # нет дисплея — пропускаем замер
+    root.withdraw()
+    try:
+        app = FinancialPlannerApp(root)
+        app.transactions = transactions
+        _, stats = measure(app.refresh_transaction_table, repeat, trace_memory=False)
+        return stats
+    finally:
+        root.destroy()
+
+
+def run(rows: int, repeat: int = 3, seed: int = 42, gui: bool = True) -> dict:
+    """Генерирует журнал заданного размера и прогоняет все бенчмарки.
+
+    Args:
+        rows (int): Количество операций в синтетическом журнале.
+        repeat (int, optional): Количество повторов каждого замера.
+        seed (int, optional): Зерно генератора журнала.
+        gui (bool, optional): Замерять ли перерисовку таблицы Tk.
+
+    Returns:
+        dict: Результаты: метаданные окружения и словарь 'results'
+        вида ``{название: {'seconds': ..., 'peak_bytes': ...}}``.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        storage.DATA_DIR = tmp
+        storage.CSV_FILE = os.path.join(tmp, 'transactions.csv')
+        write_csv(storage.CSV_FILE, rows, seed)
+
+        transactions, results['load_transactions'] = measure(storage.load_transactions, repeat)
+        df, results['transactions_to_df'] = measure(lambda: analysis.transactions_to_df(transactions), repeat)
+        _, results['group_by_category'] = measure(lambda: analysis.group_by_category(df, 'expense'), repeat)
+        if gui:
+            stats = _bench_refresh_table(transactions, repeat)
+            if stats is not None:
+                results['refresh_transaction_table'] = stats
+
+    return {
+        'rows': rows,
+        'seed': seed,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    """Сравнивает результаты с базовой линией.
+
+    Args:
+        baseline (dict): Сохраненные результаты :func:`run`.
+        current (dict): Новые результаты :func:`run`.
+        threshold (float): Допустимый относительный рост (0.1 — на 10%).
+
+    Returns:
+        list[str]: Описания регрессий; пустой список, если регрессий нет.
+
+    Raises:
+        ValueError: Если результаты получены на журналах разного размера
+            или с разным зерном генератора: такие замеры несравнимы.
+    """
+    for key in ('rows', 'seed'):
+        if baseline.get(key) != current.get(key):
+            raise ValueError(
+                f'Результаты несравнимы: {key} = {baseline.get(key)} в базовой линии '
+                f'и {current.get(key)} в текущем замере'
+            )
+
+    regressions = []
+    for name, base in baseline['results'].items():
+        new = current['results'].get(name)
+        if new is None:
+            continue
+        for metric in ('seconds', 'peak_bytes'):
+            if not base.get(metric) or new.get(metric) is None:
+                continue
+            change = new[metric] / base[metric] - 1
+            if change > threshold:
+                regressions.append(f'{name}.{metric}: {base[metric]:.6g} -> {new[metric]:.6g} (+{change:.1%})')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарки горячих путей приложения')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='Запустить бенчмарки')
+    run_parser.add_argument('--size', default='10k', help=f"Размер журнала: {', '.join(SIZES)} или число строк")
+    run_parser.add_argument('--repeat', type=int, default=3)
+    run_parser.add_argument('--seed', type=int, default=42)
+    run_parser.add_argument('--no-gui', action='store_true', help='Не замерять перерисовку таблицы Tk')
+    run_parser.add_argument('--output', help='Файл для сохранения результатов в JSON')
+
+    compare_parser = commands.add_parser('compare', help='Сравнить результаты с базовой линией')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.1,
+                                help='Допустимый относительный рост (по умолчанию 0.1)')
+
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        rows = SIZES.get(args.size.lower()) or int(args.size)
+        report = run(rows, args.repeat, args.seed, gui=not args.no_gui)
+        text = json.dumps(report, ensure_ascii=False, indent=2)
+        if args.output:
+            os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(text + '\n')
+        print(text)
+    else:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        with open(args.current, encoding='utf-8') as f:
+            current = json.load(f)
+        for key in ('python', 'machine'):
+            if baseline.get(key) != current.get(key):
+                print(f'ПРЕДУПРЕЖДЕНИЕ {key}: {baseline.get(key)} в базовой линии, '
+                      f'{current.get(key)} в текущем замере')
+        try:
+            regressions = compare(baseline, current, args.threshold)
+        except ValueError as e:
+            print(e)
+            sys.exit(2)
+        for line in regressions:
+            print(f'РЕГРЕССИЯ {line}')
+        if not regressions:
+            print('Регрессий не обнаружено')
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""Бенчмарк импорта банковских выписок: пропускная способность в строках в секунду.
+
+Генерируются синтетические выписки OFX (SGML и однострочный XML) и QIF
+заданного размера, затем замеряются разбор с пакетной проверкой
+(:func:`statements.read_statement`) и полный импорт в журнал
+(:func:`statements.import_statement`). Пиковая память разбора замеряется
+через :mod:`tracemalloc` и не должна расти с размером файла.
+
+Примеры:
+    python benchmarks/bench_import.py --size 100000
+    python benchmarks/bench_import.py --size 1m --format qif --output import.json
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import platform
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import storage
+import statements
+from bench import measure
+from synthetic import SIZES, generate_columns
+
+
+# Форматы выписок: расширение файла и способ записи операции
+FORMATS = ('ofx', 'ofx-xml', 'qif')
+
+
+def write_statement(path: str, fmt: str, rows: int, seed: int = 42, chunk_rows: int = 100_000):
+    """Записывает синтетическую выписку частями по `chunk_rows` строк."""
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        if fmt == 'qif':
+            f.write('!Type:Bank\n')
+        elif fmt == 'ofx':
+            f.write('OFXHEADER:100\nDATA:OFXSGML\nCHARSET:NONE\n\n<OFX><CURDEF>RUB\n<BANKTRANLIST>\n')
+        else:
+            f.write('<?xml version="1.0" encoding="utf-8"?><OFX><CURDEF>RUB</CURDEF><BANKTRANLIST>')
+
+        written, part = 0, 0
+        while written < rows:
+            n = min(chunk_rows, rows - written)
+            columns = generate_columns(n, seed + part)
+            for amount, category, date, description, transaction_type in zip(
+                    columns['amount'].tolist(), columns['category'], columns['date'],
+                    columns['description'], columns['transaction_type']):
+                sign = '-' if transaction_type == 'expense' else ''
+                value = f'{sign}{amount // 100}.{amount % 100:02d}'
+                if fmt == 'qif':
+                    f.write(f'D{date}\nT{value}\nP{description}\nL{category}\n^\n')
+                elif fmt == 'ofx':
+                    f.write(f'<STMTTRN><DTPOSTED>{date.replace("-", "")}<TRNAMT>{value}<NAME>{description}\n</STMTTRN>\n')
+                else:
+                    f.write(f'<STMTTRN><DTPOSTED>{date.replace("-", "")}</DTPOSTED><TRNAMT>{value}</TRNAMT>'
+                            f'<NAME>{description}</NAME></STMTTRN>')
+            written += n
+            part += 1
+
+        if fmt == 'ofx':
+            f.write('</BANKTRANLIST></OFX>\n')
+        elif fmt == 'ofx-xml':
+            f.write('</BANKTRANLIST></OFX>')
+
+
+def run(rows: int, formats=FORMATS, repeat: int = 1) -> dict:
+    """Замеряет разбор и импорт выписок каждого формата.
+
+    Returns:
+        dict: Метаданные окружения и результаты вида
+        ``{формат: {'parse_rows_per_second': ..., 'import_rows_per_second': ...,
+        'parse_peak_bytes': ..., 'file_bytes': ...}}``.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in formats:
+            path = os.path.join(tmp, f'statement.{"qif" if fmt == "qif" else "ofx"}')
+            write_statement(path, fmt, rows)
+
+            def parse():
+                return sum(len(batch) for batch in statements.read_statement(path))
+
+            def ingest():
+                storage.CSV_FILE = os.path.join(tmp, 'transactions.csv')
+                if os.path.exists(storage.CSV_FILE):
+                    os.remove(storage.CSV_FILE)
+                return statements.import_statement(path)['imported']
+
+            storage.DATA_DIR = tmp
+            parsed, parse_stats = measure(parse, repeat)
+            imported, import_stats = measure(ingest, repeat, trace_memory=False)
+            results[fmt] = {
+                'rows': parsed,
+                'imported': imported,
+                'file_bytes': os.path.getsize(path),
+                'parse_rows_per_second': parsed / parse_stats['seconds'],
+                'import_rows_per_second': imported / import_stats['seconds'],
+                'parse_peak_bytes': parse_stats['peak_bytes'],
+            }
+            os.remove(path)
+
+    return {
+        'rows': rows,
+        'batch_size': statements.BATCH_SIZE,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк импорта выписок OFX и QIF')
+    parser.add_argument('--size', default='100000', help=f"Размер выписки: {', '.join(SIZES)} или число строк")
+    parser.add_argument('--format', choices=FORMATS, action='append', help='Формат (можно указать несколько)')
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--output', help='Файл для сохранения результатов в JSON')
+    args = parser.parse_args()
+
+    rows = SIZES.get(args.size.lower()) or int(args.size)
+    report = run(rows, args.format or FORMATS, args.repeat)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    print(text)
+
+
+if __name__ == '__main__':
+    main()
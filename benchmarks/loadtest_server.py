@@ -0,0 +1,98 @@
+"""Нагрузочный тест локального JSON API (см. :mod:`server`).
+
+Открывает заданное число одновременных keep-alive соединений, каждое из
+которых выполняет серию запросов, и выводит задержки p50/p99.
+
+Пример:
+    python benchmarks/loadtest_server.py --port 8765 --clients 300 --requests 50
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+async def _read_response(reader):
+    """Читает один HTTP-ответ целиком (с фиксированной длиной или chunked)."""
+    status_line = await reader.readline()
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    else:
+        await reader.readexactly(int(headers.get('content-length', 0)))
+    return int(status_line.split()[1])
+
+
+async def _client(host, port, paths, requests, latencies):
+    """Один клиент: последовательно выполняет запросы по одному соединению."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for i in range(requests):
+            path = paths[i % len(paths)]
+            started = time.perf_counter()
+            writer.write(f'GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n'.encode('latin-1'))
+            await writer.drain()
+            await _read_response(reader)
+            latencies.append(time.perf_counter() - started)
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+def percentile(values, q):
+    """Возвращает перцентиль q (0..100) отсортированного списка значений."""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))
+    return values[index]
+
+
+async def run(host, port, clients, requests, paths):
+    """Запускает клиентов параллельно и возвращает сводку задержек."""
+    latencies = []
+    started = time.perf_counter()
+    await asyncio.gather(*(_client(host, port, paths, requests, latencies) for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'seconds': elapsed,
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Нагрузочный тест JSON API журнала')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--clients', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--path', action='append', dest='paths',
+                        help='Маршрут для запросов (можно указать несколько раз)')
+    args = parser.parse_args()
+
+    paths = args.paths or ['/totals?type=expense', '/totals?type=income', '/timeseries', '/health']
+    summary = asyncio.run(run(args.host, args.port, args.clients, args.requests, paths))
+    print(f"Запросов: {summary['requests']} за {summary['seconds']:.2f} с "
+          f"({summary['rps']:.0f} запр/с)")
+    print(f"p50: {summary['p50_ms']:.2f} мс, p99: {summary['p99_ms']:.2f} мс")
+
+
+if __name__ == '__main__':
+    main()
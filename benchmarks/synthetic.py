@@ -0,0 +1,121 @@
+"""Генератор синтетического журнала операций для бенчмарков.
+
+Журнал воспроизводим (фиксированный seed) и похож на реальный: категории
+на кириллице с разной частотой, даты равномерно распределены по периоду,
+суммы имеют логнормальное распределение с параметрами своей категории.
+"""
+import os
+import sys
+import csv
+import datetime
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Transaction, BASE_CURRENCY
+from storage import FIELDNAMES
+
+
+# Категории: (тип, название, доля строк, медиана суммы, разброс логнормального распределения)
+CATEGORIES = [
+    ('expense', 'Продукты', 0.30, 1200.0, 0.8),
+    ('expense', 'Транспорт', 0.15, 250.0, 0.6),
+    ('expense', 'Кафе', 0.12, 600.0, 0.7),
+    ('expense', 'Коммунальные услуги', 0.04, 6500.0, 0.3),
+    ('expense', 'Связь', 0.03, 700.0, 0.2),
+    ('expense', 'Здоровье', 0.05, 1800.0, 1.0),
+    ('expense', 'Одежда', 0.05, 3500.0, 0.9),
+    ('expense', 'Развлечения', 0.08, 1500.0, 0.9),
+    ('expense', 'Подарки', 0.03, 2500.0, 0.8),
+    ('income', 'Зарплата', 0.06, 95000.0, 0.15),
+    ('income', 'Премия', 0.02, 40000.0, 0.5),
+    ('income', 'Фриланс', 0.05, 15000.0, 0.7),
+    ('income', 'Проценты', 0.02, 900.0, 0.6),
+]
+
+DESCRIPTIONS = ['', '', 'Карта', 'Наличные', 'Перевод', 'Онлайн', 'Подписка']
+
+# Размеры журналов, используемые по умолчанию
+SIZES = {'10k': 10_000, '1m': 1_000_000, '10m': 10_000_000}
+
+
+def generate_columns(rows: int, seed: int = 42, start: str = '2016-01-01', days: int = 3650) -> dict:
+    """Генерирует столбцы синтетического журнала.
+
+    Args:
+        rows (int): Количество операций.
+        seed (int, optional): Зерно генератора случайных чисел.
+        start (str, optional): Первая дата периода 'YYYY-MM-DD'.
+        days (int, optional): Длина периода в днях.
+
+    Returns:
+        dict: Словарь NumPy-массивов с ключами из :data:`storage.FIELDNAMES`.
+        Суммы — целые копейки (int64).
+        Даты отсортированы по возрастанию, как в реальном журнале.
+    """
+    rng = np.random.default_rng(seed)
+    weights = np.array([c[2] for c in CATEGORIES])
+    codes = rng.choice(len(CATEGORIES), size=rows, p=weights / weights.sum())
+
+    medians = np.array([c[3] for c in CATEGORIES])
+    sigmas = np.array([c[4] for c in CATEGORIES])
+    # Суммы в копейках
+    amounts = np.rint(medians[codes] * rng.lognormal(0.0, sigmas[codes]) * 100).astype(np.int64)
+    amounts = np.maximum(amounts, 1)
+
+    offsets = np.sort(rng.integers(0, days, size=rows))
+    dates = np.datetime64(start) + offsets.astype('timedelta64[D]')
+
+    return {
+        'amount': amounts,
+        'category': np.array([c[1] for c in CATEGORIES], dtype=object)[codes],
+        'date': np.datetime_as_string(dates, unit='D'),
+        'description': np.array(DESCRIPTIONS, dtype=object)[rng.integers(0, len(DESCRIPTIONS), size=rows)],
+        'transaction_type': np.array([c[0] for c in CATEGORIES], dtype=object)[codes],
+        'currency': np.full(rows, BASE_CURRENCY, dtype=object),
+    }
+
+
+def generate_transactions(rows: int, seed: int = 42) -> list:
+    """Возвращает синтетический журнал в виде списка объектов :class:`Transaction`."""
+    columns = generate_columns(rows, seed)
+    return [
+        Transaction(int(a), c, str(d), s, tt)
+        for a, c, d, s, tt in zip(
+            columns['amount'], columns['category'], columns['date'],
+            columns['description'], columns['transaction_type']
+        )
+    ]
+
+
+def write_csv(path: str, rows: int, seed: int = 42, chunk_rows: int = 500_000):
+    """Записывает синтетический журнал в CSV-файл формата приложения.
+
+    Генерация идет частями по `chunk_rows` строк, поэтому память не растет
+    с размером журнала (важно для 10M строк).
+
+    Args:
+        path (str): Путь к создаваемому файлу.
+        rows (int): Общее количество строк.
+        seed (int, optional): Зерно генератора.
+        chunk_rows (int, optional): Размер части.
+    """
+    days_per_chunk = max(1, int(3650 * chunk_rows / max(rows, 1)))
+    start = datetime.date(2016, 1, 1)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(FIELDNAMES)
+        written, part = 0, 0
+        while written < rows:
+            n = min(chunk_rows, rows - written)
+            first = start + datetime.timedelta(days=part * days_per_chunk)
+            columns = generate_columns(n, seed + part, first.isoformat(), days_per_chunk)
+            # Копейки записываются десятичной строкой, как это делает storage
+            units, cents = np.divmod(columns['amount'], 100)
+            columns['amount'] = np.char.add(np.char.add(units.astype(str), '.'),
+                                            np.char.zfill(cents.astype(str), 2))
+            # Стабильные идентификаторы строк: номер части и позиция в ней
+            columns['id'] = np.char.add(f'syn{part}-', np.arange(n).astype(str))
+            writer.writerows(zip(*(columns[name] for name in FIELDNAMES)))
+            written += n
+            part += 1
@@ -0,0 +1,378 @@
+import io
+import os
+import csv
+import sys
+import json
+import lzma
+import zlib
+import struct
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import storage
+from storage import FIELDNAMES, transaction_to_row, parse_rows
+from instrumentation import traced
+
+
+# Сигнатуры начала и конца файла
+MAGIC = b'FPBLK1\n'
+FOOTER_MAGIC = b'FPBLKEND'
+
+# Хвост файла: длина JSON-индекса (8 байт, little-endian) и сигнатура
+_TRAILER = struct.Struct('<Q8s')
+
+# Количество строк в блоке по умолчанию
+BLOCK_ROWS = 4096
+
+CODECS = {
+    'zlib': (lambda data: zlib.compress(data, 6), zlib.decompress),
+    'lzma': (lzma.compress, lzma.decompress),
+}
+
+
+# Доля устаревших индексов от объема блоков, после которой архив уплотняется
+GARBAGE_RATIO = 0.25
+
+# Размер куска, которым файл просматривается с конца при поиске индекса
+_SCAN_CHUNK = 1 << 20
+
+
+def _index_before(f, trailer_end: int):
+    """Читает индекс, хвост которого заканчивается на смещении `trailer_end`.
+
+    Returns:
+        dict | None: Индекс или None, если по этому смещению целого индекса нет.
+    """
+    trailer_start = trailer_end - _TRAILER.size
+    if trailer_start < len(MAGIC):
+        return None
+    f.seek(trailer_start)
+    index_length, footer_magic = _TRAILER.unpack(f.read(_TRAILER.size))
+    index_offset = trailer_start - index_length
+    if footer_magic != FOOTER_MAGIC or index_offset < len(MAGIC):
+        return None
+    f.seek(index_offset)
+    try:
+        index = json.loads(f.read(index_length).decode('utf-8'))
+    except ValueError:
+        return None
+    return index if isinstance(index, dict) and 'blocks' in index else None
+
+
+def _read_index(f) -> tuple:
+    """Читает индекс блоков из конца открытого файла.
+
+    Если запись новых блоков была прервана до закрытия архива, в конце файла
+    оказываются блоки без индекса. Тогда файл просматривается с конца
+    до последнего целого индекса, и архив читается в прежнем состоянии.
+
+    Returns:
+        tuple: (индекс в виде словаря, смещение конца хвоста этого индекса).
+
+    Raises:
+        ValueError: Если файл не является блочным архивом или поврежден.
+    """
+    size = f.seek(0, os.SEEK_END)
+    if size < len(MAGIC) + _TRAILER.size:
+        raise ValueError('Файл слишком короткий для блочного архива')
+
+    f.seek(0)
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError('Неверная сигнатура блочного архива')
+
+    index = _index_before(f, size)
+    if index is not None:
+        return index, size
+
+    end = size
+    while end > len(MAGIC):
+        start = max(len(MAGIC), end - _SCAN_CHUNK)
+        # Куски перекрываются, чтобы не пропустить сигнатуру на их границе
+        f.seek(start)
+        data = f.read(min(size, end + len(FOOTER_MAGIC) - 1) - start)
+        position = data.rfind(FOOTER_MAGIC)
+        while position >= 0:
+            trailer_end = start + position + len(FOOTER_MAGIC)
+            index = _index_before(f, trailer_end)
+            if index is not None:
+                return index, trailer_end
+            position = data.rfind(FOOTER_MAGIC, 0, position)
+        end = start
+    raise ValueError('Блочный архив не был корректно закрыт')
+
+
+class BlockWriter:
+    """Пишет журнал операций независимо сжатыми блоками.
+
+    Файл состоит из сигнатуры, последовательности блоков (CSV без заголовка,
+    сжатый zlib или lzma) и индекса в конце: для каждого блока хранятся
+    смещение, длина, количество строк и диапазон дат. Блок «запечатывается»
+    (сжимается и записывается) как только в нем набирается `block_rows` строк.
+
+    Если файл уже существует, новые блоки дописываются после его индекса,
+    а новый индекс со всеми блоками — при закрытии. Прежний индекс при этом
+    не затирается: если запись прервется до :meth:`close`, архив останется
+    читаемым в прежнем состоянии (см. :func:`_read_index`). Объем таких
+    устаревших индексов учитывается в новом индексе; когда он превышает
+    долю :data:`GARBAGE_RATIO` от объема блоков, :meth:`close` переписывает
+    архив без них через временный файл и :func:`os.replace`.
+
+    Example:
+        >>> with BlockWriter('data/archive.fpb') as writer:
+        ...     writer.write(transactions)
+    """
+
+    def __init__(self, path: str, codec: str = 'zlib', block_rows: int = BLOCK_ROWS):
+        """Открывает архив для записи.
+
+        Args:
+            path (str): Путь к файлу архива.
+            codec (str, optional): Алгоритм сжатия: 'zlib' или 'lzma'.
+            block_rows (int, optional): Количество строк в одном блоке.
+
+        Raises:
+            ValueError: Если алгоритм сжатия неизвестен или существующий
+                архив записан другим алгоритмом.
+        """
+        if codec not in CODECS:
+            raise ValueError(f"Алгоритм сжатия должен быть одним из: {', '.join(CODECS)}")
+
+        self.path = path
+        self.codec = codec
+        self.block_rows = block_rows
+        self.blocks = []
+        self._pending = []
+        self._reopened = False
+        self._sealed = 0
+        self._garbage = 0
+
+        if os.path.isfile(path) and os.path.getsize(path) > 0:
+            self._file = open(path, 'r+b')
+            index, end = _read_index(self._file)
+            if index['codec'] != codec:
+                raise ValueError(f"Архив записан алгоритмом {index['codec']}")
+            self.blocks = index['blocks']
+            self._reopened = True
+            # Прежний индекс станет мусором, если будут дописаны новые блоки
+            self._file.seek(end - _TRAILER.size)
+            index_length, _ = _TRAILER.unpack(self._file.read(_TRAILER.size))
+            self._garbage = index.get('garbage', 0) + index_length + _TRAILER.size
+            # Отбрасываются только блоки без индекса от прерванной записи
+            self._file.seek(end)
+            self._file.truncate()
+        else:
+            self._file = open(path, 'wb')
+            self._file.write(MAGIC)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write(self, transactions):
+        """Добавляет операции, запечатывая каждый заполненный блок.
+
+        Args:
+            transactions (Iterable[Transaction]): Операции для записи.
+        """
+        for t in transactions:
+            self._pending.append(t)
+            if len(self._pending) >= self.block_rows:
+                self._seal()
+
+    def _seal(self):
+        """Сжимает накопленные строки в блок и дописывает его в файл."""
+        if not self._pending:
+            return
+
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=FIELDNAMES)
+        dates = []
+        for t in self._pending:
+            row = transaction_to_row(t)
+            dates.append(row['date'])
+            writer.writerow(row)
+
+        data = CODECS[self.codec][0](buffer.getvalue().encode('utf-8'))
+        offset = self._file.tell()
+        self._file.write(data)
+        self.blocks.append({
+            'offset': offset,
+            'length': len(data),
+            'rows': len(self._pending),
+            'min_date': min(dates),
+            'max_date': max(dates),
+        })
+        self._pending = []
+        self._sealed += 1
+
+    def close(self):
+        """Запечатывает неполный блок, записывает индекс и закрывает файл.
+
+        Если в существующий архив ничего не дописано, его индекс остается прежним.
+        """
+        if self._file.closed:
+            return
+        self._seal()
+        if self._reopened and not self._sealed:
+            self._file.close()
+            return
+        live = sum(block['length'] for block in self.blocks)
+        if self._garbage > live * GARBAGE_RATIO:
+            self._file.close()
+            self._compact()
+            return
+        _write_index(self._file, self.codec, self.blocks, self._garbage)
+        self._file.close()
+
+    def _compact(self):
+        """Переписывает архив без устаревших индексов, копируя блоки без пересжатия."""
+        tmp_path = self.path + '.tmp'
+        blocks = []
+        with open(self.path, 'rb') as source, open(tmp_path, 'wb') as target:
+            target.write(MAGIC)
+            for block in self.blocks:
+                source.seek(block['offset'])
+                blocks.append(dict(block, offset=target.tell()))
+                target.write(source.read(block['length']))
+            _write_index(target, self.codec, blocks, 0)
+        os.replace(tmp_path, self.path)
+        self.blocks = blocks
+
+
+def _write_index(f, codec: str, blocks: list, garbage: int):
+    """Дописывает индекс и хвост в открытый архив и сбрасывает его на диск."""
+    index = json.dumps({
+        'version': 1,
+        'codec': codec,
+        'fieldnames': FIELDNAMES,
+        'blocks': blocks,
+        'garbage': garbage,
+    }, ensure_ascii=False).encode('utf-8')
+    f.write(index)
+    f.write(_TRAILER.pack(len(index), FOOTER_MAGIC))
+    f.flush()
+    os.fsync(f.fileno())
+
+
+class BlockReader:
+    """Читает блочный архив, распаковывая только нужные блоки.
+
+    Attributes:
+        path (str): Путь к файлу архива.
+        codec (str): Алгоритм сжатия архива.
+        fieldnames (list[str]): Колонки строк в блоках.
+        blocks (list[dict]): Индекс блоков.
+    """
+
+    def __init__(self, path: str):
+        """Читает индекс архива.
+
+        Args:
+            path (str): Путь к файлу архива.
+
+        Raises:
+            ValueError: Если файл не является корректным блочным архивом.
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            index, _ = _read_index(f)
+        self.codec = index['codec']
+        self.fieldnames = index['fieldnames']
+        self.blocks = index['blocks']
+
+    @property
+    def rows(self) -> int:
+        """Общее количество строк в архиве."""
+        return sum(block['rows'] for block in self.blocks)
+
+    def _read_block(self, block: dict) -> list:
+        """Распаковывает и разбирает один блок."""
+        with open(self.path, 'rb') as f:
+            f.seek(block['offset'])
+            data = f.read(block['length'])
+        content = CODECS[self.codec][1](data).decode('utf-8')
+        return parse_rows(content, fieldnames=self.fieldnames)
+
+    def read_block(self, index: int) -> list:
+        """Распаковывает блок по его номеру в индексе.
+
+        Args:
+            index (int): Номер блока в `blocks`.
+
+        Returns:
+            list[Transaction]: Операции блока в порядке записи.
+        """
+        return self._read_block(self.blocks[index])
+
+    @traced('blockstore.read', rows=lambda result, *args, **kwargs: len(result))
+    def read(self, start: str = None, end: str = None, workers: int = None) -> list:
+        """Возвращает операции за период, распаковывая только пересекающиеся блоки.
+
+        Блоки распаковываются параллельно в пуле потоков (zlib и lzma
+        освобождают GIL на время распаковки).
+
+        Args:
+            start (str, optional): Начальная дата 'YYYY-MM-DD' включительно.
+            end (str, optional): Конечная дата 'YYYY-MM-DD' включительно.
+            workers (int, optional): Размер пула потоков. По умолчанию —
+                число процессоров; 1 — последовательное чтение.
+
+        Returns:
+            list[Transaction]: Операции в порядке записи.
+        """
+        selected = [
+            block for block in self.blocks
+            if (start is None or block['max_date'] >= start)
+            and (end is None or block['min_date'] <= end)
+        ]
+
+        if workers == 1 or len(selected) <= 1:
+            parts = [self._read_block(block) for block in selected]
+        else:
+            with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+                parts = list(pool.map(self._read_block, selected))
+
+        result = []
+        for part in parts:
+            if start is None and end is None:
+                result.extend(part)
+                continue
+            for t in part:
+                day = t.date.strftime('%Y-%m-%d')
+                if (start is None or day >= start) and (end is None or day <= end):
+                    result.append(t)
+        return result
+
+
+def main():
+    """Точка входа: упаковывает CSV-журнал в блочный архив или распаковывает обратно."""
+    parser = argparse.ArgumentParser(description='Блочный сжатый архив журнала операций')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    pack = commands.add_parser('pack', help='Упаковать журнал операций в архив')
+    pack.add_argument('archive')
+    pack.add_argument('--codec', choices=sorted(CODECS), default='zlib')
+    pack.add_argument('--block-rows', type=int, default=BLOCK_ROWS)
+
+    unpack = commands.add_parser('unpack', help='Вывести операции архива в CSV')
+    unpack.add_argument('archive')
+    unpack.add_argument('--start')
+    unpack.add_argument('--end')
+
+    args = parser.parse_args()
+
+    if args.command == 'pack':
+        transactions = storage.load_transactions()
+        with BlockWriter(args.archive, args.codec, args.block_rows) as writer:
+            writer.write(transactions)
+        print(f'Упаковано операций: {len(transactions)}')
+    else:
+        writer = csv.DictWriter(sys.stdout, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        for t in BlockReader(args.archive).read(args.start, args.end):
+            writer.writerow(transaction_to_row(t))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+import datetime
+import pandas as pd
+from utils import format_minor
+from instrumentation import traced
+
+
+# Периоды бюджетов и форматы их ключей (неделя — по ISO 8601)
+PERIODS = ('week', 'month', 'year')
+_KEY_FORMATS = {'week': '%G-W%V', 'month': '%Y-%m', 'year': '%Y'}
+
+# Названия периодов для сообщений и таблицы бюджетов
+PERIOD_NAMES = {'week': 'неделя', 'month': 'месяц', 'year': 'год'}
+
+# Доля лимита, начиная с которой выдается предупреждение
+WARN_RATIO = 0.8
+
+
+def validate_period(period: str) -> str:
+    """Проверяет период бюджета.
+
+    Args:
+        period (str): 'week', 'month' или 'year'.
+
+    Returns:
+        str: Период в нижнем регистре.
+
+    Raises:
+        ValueError: Если период неизвестен.
+    """
+    period = str(period).strip().lower()
+    if period not in PERIODS:
+        raise ValueError(f"Период бюджета должен быть одним из: {', '.join(PERIODS)}")
+    return period
+
+
+def period_key(date, period: str) -> str:
+    """Возвращает ключ периода, в который попадает дата.
+
+    Args:
+        date (datetime.date): Дата операции.
+        period (str): Период бюджета из :data:`PERIODS`.
+
+    Returns:
+        str: '2026-W03' для недели, '2026-01' для месяца, '2026' для года.
+
+    Examples:
+        >>> period_key(datetime.date(2026, 1, 14), 'week')
+        '2026-W03'
+    """
+    return date.strftime(_KEY_FORMATS[period])
+
+
+class BudgetTracker:
+    """Лимиты расходов по категориям и счетчики трат за периоды.
+
+    Траты хранятся в хеш-таблице с ключом ``(категория, период, ключ периода)``,
+    например ``('Еда', 'month', '2026-01')``, поэтому учет новой операции
+    (:meth:`add`) и проверка лимитов (:meth:`check`) выполняются за O(1)
+    независимо от размера истории. Счетчики ведутся для всех категорий
+    расходов, так что новый лимит сразу учитывает уже сделанные траты.
+    При загрузке счетчики строятся одним векторным проходом (:meth:`rebuild`).
+    Все суммы — в копейках базовой валюты.
+
+    Attributes:
+        limits (dict): Лимиты: ``{(категория, период): сумма}``.
+        spent (dict): Траты: ``{(категория, период, ключ периода): сумма}``.
+    """
+
+    def __init__(self, limits: dict = None):
+        """Создает трекер с пустыми счетчиками.
+
+        Args:
+            limits (dict, optional): Лимиты ``{(категория, период): сумма}``
+                (см. :func:`storage.load_budgets`).
+        """
+        self.limits = {}
+        self.spent = {}
+        for (category, period), limit in (limits or {}).items():
+            self.set_limit(category, period, limit)
+
+    def set_limit(self, category: str, period: str, limit: int):
+        """Задает лимит расходов категории за период.
+
+        Args:
+            category (str): Категория расходов.
+            period (str): Период из :data:`PERIODS`.
+            limit (int): Лимит в копейках.
+
+        Raises:
+            ValueError: Если период неизвестен или лимит не положителен.
+        """
+        if limit <= 0:
+            raise ValueError('Лимит должен быть больше нуля')
+        self.limits[(category, validate_period(period))] = int(limit)
+
+    def remove_limit(self, category: str, period: str):
+        """Удаляет лимит; счетчики трат сохраняются."""
+        self.limits.pop((category, period), None)
+
+    @traced('budget.rebuild', rows=lambda result, self, df: len(df))
+    def rebuild(self, df: pd.DataFrame):
+        """Пересчитывает счетчики трат по таблице операций.
+
+        Args:
+            df (pd.DataFrame): Операции с колонками 'date', 'category',
+                'transaction_type' и 'amount' (int64, копейки базовой валюты).
+                Подходят и уже агрегированные по дням строки
+                (например, ячейки :meth:`cube.AggregationCube.to_frame`).
+        """
+        self.spent = {}
+        self.add_df(df)
+
+    def add_df(self, df: pd.DataFrame):
+        """Добавляет операции таблицы в счетчики трат векторно.
+
+        Суммы сначала сворачиваются по категориям и дням, поэтому ключи
+        периодов вычисляются только для различных дней, а не для каждой строки.
+        """
+        expenses = df[df['transaction_type'] == 'expense'] if not df.empty else df
+        if expenses.empty:
+            return
+
+        daily = expenses.groupby(['category', expenses['date'].dt.normalize()], sort=False)['amount'].sum()
+        categories = daily.index.get_level_values(0)
+        day_codes, days = pd.factorize(daily.index.get_level_values(1))
+        for period in PERIODS:
+            # Ключи считаются по различным дням и раздаются строкам по кодам
+            keys = days.strftime(_KEY_FORMATS[period]).to_numpy()[day_codes]
+            totals = daily.groupby([categories, keys], sort=False).sum()
+            for (category, key), amount in zip(totals.index, totals.tolist()):
+                counter = (category, period, key)
+                self.spent[counter] = self.spent.get(counter, 0) + amount
+
+    def add_cube(self, cube):
+        """Добавляет в счетчики расходы из куба агрегатов.
+
+        Используется для холодной истории (:class:`history.ColdHistory`):
+        строки архива не читаются, суммы берутся из дневных ячеек куба.
+
+        Args:
+            cube (AggregationCube): Куб агрегатов в базовой валюте.
+        """
+        cells = cube.to_frame('day')
+        self.add_df(pd.DataFrame({
+            'date': pd.to_datetime(cells['period']),
+            'category': cells['category'],
+            'transaction_type': cells['transaction_type'],
+            'amount': cells['sum'],
+        }))
+
+    def add(self, category: str, amount: int, date: datetime.date):
+        """Учитывает расход в счетчиках всех периодов за O(1).
+
+        Args:
+            category (str): Категория расхода.
+            amount (int): Сумма в копейках базовой валюты.
+            date (datetime.date): Дата операции.
+        """
+        for period in PERIODS:
+            counter = (category, period, period_key(date, period))
+            self.spent[counter] = self.spent.get(counter, 0) + amount
+
+    def spent_in(self, category: str, period: str, date: datetime.date) -> int:
+        """Траты категории за период, в который попадает дата."""
+        return self.spent.get((category, period, period_key(date, period)), 0)
+
+    def check(self, category: str, amount: int, date: datetime.date) -> list:
+        """Проверяет, приблизит ли расход траты к лимитам категории.
+
+        Счетчики не изменяются: проверку можно выполнить до записи операции.
+
+        Args:
+            category (str): Категория расхода.
+            amount (int): Сумма в копейках базовой валюты.
+            date (datetime.date): Дата операции.
+
+        Returns:
+            list[dict]: Предупреждения с ключами 'category', 'period',
+            'key', 'limit', 'spent' (траты вместе с этим расходом), 'ratio'
+            и 'status' ('warning' — достигнуто :data:`WARN_RATIO` лимита,
+            'exceeded' — лимит превышен). Пустой список, если лимиты не задеты.
+        """
+        alerts = []
+        for period in PERIODS:
+            limit = self.limits.get((category, period))
+            if limit is None:
+                continue
+            key = period_key(date, period)
+            spent = self.spent.get((category, period, key), 0) + amount
+            ratio = spent / limit
+            if ratio >= WARN_RATIO:
+                alerts.append({
+                    'category': category,
+                    'period': period,
+                    'key': key,
+                    'limit': limit,
+                    'spent': spent,
+                    'ratio': ratio,
+                    'status': 'exceeded' if spent > limit else 'warning',
+                })
+        return alerts
+
+    def report(self, today: datetime.date = None) -> pd.DataFrame:
+        """Бюджет и фактические траты за текущие периоды.
+
+        Строится только по лимитам и счетчикам, без обращения к операциям.
+
+        Args:
+            today (datetime.date, optional): Дата, определяющая текущие периоды.
+                По умолчанию — сегодня.
+
+        Returns:
+            pd.DataFrame: Колонки 'category', 'period', 'key', 'limit', 'spent',
+            'remaining' (копейки) и 'ratio', отсортированные по категории и периоду.
+        """
+        today = today or datetime.date.today()
+        rows = []
+        for (category, period), limit in self.limits.items():
+            spent = self.spent_in(category, period, today)
+            rows.append((category, period, period_key(today, period), limit, spent, limit - spent, spent / limit))
+        report = pd.DataFrame(rows, columns=['category', 'period', 'key', 'limit', 'spent', 'remaining', 'ratio'])
+        order = report['period'].map(PERIODS.index)
+        return report.assign(_order=order).sort_values(['category', '_order']).drop(columns='_order').reset_index(drop=True)
+
+
+def describe(alert: dict) -> str:
+    """Текст предупреждения о лимите для пользователя."""
+    name = PERIOD_NAMES[alert['period']]
+    if alert['status'] == 'exceeded':
+        head = f"Лимит по категории «{alert['category']}» ({name} {alert['key']}) будет превышен"
+    else:
+        head = f"Траты по категории «{alert['category']}» ({name} {alert['key']}) приближаются к лимиту"
+    return (f"{head}: {format_minor(alert['spent'])} из {format_minor(alert['limit'])} "
+            f"({alert['ratio']:.0%})")
@@ -0,0 +1,247 @@
+import io
+import os
+import json
+import hashlib
+import argparse
+import threading
+from collections import OrderedDict
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+import storage
+from checkpoint import Ledger, file_digest
+from analysis import transactions_to_df, CurrencyConverter
+from cube import AggregationCube
+from models import BASE_CURRENCY
+from utils import MINOR_UNITS
+from instrumentation import traced
+
+
+# Виды графиков: круговые диаграммы расходов и доходов, динамика по времени
+KINDS = ('expense', 'income', 'trend')
+
+# Сколько отрисованных графиков хранится в памяти
+CACHE_CAPACITY = 32
+
+# Сколько графиков хранится на диске; лишние удаляются по времени изменения
+DISK_CACHE_CAPACITY = 256
+
+
+def ledger_version(ledger, rates_digest: str) -> str:
+    """Хеш состояния журнала, от которого зависят графики.
+
+    Учитываются смещения и отпечаток прочитанных файлов хранилища
+    (меняются при любой записи, правке или уплотнении), размер холодной
+    истории и хеш таблицы курсов.
+
+    Args:
+        ledger (checkpoint.Ledger): Журнал операций.
+        rates_digest (str): Хеш таблицы курсов (см. :func:`checkpoint.file_digest`).
+
+    Returns:
+        str: Шестнадцатеричный SHA-256.
+    """
+    state = [ledger.csv_offset, ledger.changes_offset, ledger.fingerprint, ledger.cold_rows, rates_digest]
+    return hashlib.sha256(json.dumps(state, default=str).encode('utf-8')).hexdigest()
+
+
+def chart_key(kind: str, period: str, version: str) -> str:
+    """Адрес графика в кэше: хеш вида, параметров и версии журнала."""
+    return hashlib.sha256(json.dumps([kind, period, version]).encode('utf-8')).hexdigest()
+
+
+@traced('charts.render')
+def render(cube, kind: str, period: str = None) -> bytes:
+    """Отрисовывает график по кубу агрегатов в PNG.
+
+    Используется объектный интерфейс matplotlib (``Figure`` и холст Agg)
+    без pyplot, поэтому отрисовка безопасна в фоновом потоке.
+
+    Args:
+        cube (AggregationCube): Куб агрегатов в базовой валюте.
+        kind (str): Вид графика из :data:`KINDS`.
+        period (str, optional): Год, месяц или день. По умолчанию — вся история.
+
+    Returns:
+        bytes: Изображение PNG или None, если за период нет данных.
+
+    Raises:
+        ValueError: Если вид графика неизвестен.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Вид графика должен быть одним из: {', '.join(KINDS)}")
+
+    if kind == 'trend':
+        level = 'day' if period and len(period) > 4 else 'month'
+        data = cube.time_series(level, period, period)
+        if data.empty:
+            return None
+        figure = Figure(figsize=(8, 5))
+        ax = figure.add_subplot()
+        # Перевод копеек в рубли только для отображения на графике
+        (data / MINOR_UNITS).plot(ax=ax, marker='o', title='Доходы и расходы по времени')
+        ax.set_xlabel('Дата' if level == 'day' else 'Период')
+        ax.set_ylabel('Сумма')
+        ax.grid(True)
+    else:
+        data = cube.category_totals(kind, period, period)
+        if data.empty:
+            return None
+        title = f'{kind.capitalize()} по категориям'
+        if period:
+            title += f' ({period})'
+        figure = Figure(figsize=(6, 6))
+        ax = figure.add_subplot()
+        data.plot(kind='pie', ax=ax, autopct='%1.1f%%', title=title)
+        ax.set_ylabel('')
+
+    buffer = io.BytesIO()
+    FigureCanvasAgg(figure).print_png(buffer)
+    return buffer.getvalue()
+
+
+class ChartCache:
+    """Кэш отрисованных графиков с адресацией по содержимому.
+
+    Ключ — хеш вида графика, его параметров и версии журнала
+    (:func:`ledger_version`), поэтому при изменении данных старые записи
+    просто перестают запрашиваться и вытесняются по LRU. В памяти хранится
+    не более `capacity` изображений; если задана директория, изображения
+    дополнительно сохраняются на диск и переживают перезапуск. На диске
+    хранится не более `disk_capacity` файлов: время изменения файла
+    обновляется при каждом чтении, и при переполнении удаляются файлы,
+    которые дольше всех не запрашивались. Методы потокобезопасны.
+
+    Attributes:
+        capacity (int): Емкость кэша в памяти.
+        directory (str): Директория дискового кэша или None.
+        disk_capacity (int): Емкость дискового кэша.
+    """
+
+    def __init__(self, capacity: int = CACHE_CAPACITY, directory: str = None,
+                 disk_capacity: int = DISK_CACHE_CAPACITY):
+        """Создает кэш.
+
+        Args:
+            capacity (int, optional): Емкость кэша в памяти.
+            directory (str, optional): Директория дискового кэша.
+            disk_capacity (int, optional): Емкость дискового кэша.
+        """
+        self.capacity = capacity
+        self.directory = directory
+        self.disk_capacity = disk_capacity
+        self._images = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.png')
+
+    def get(self, key: str) -> bytes:
+        """Возвращает изображение по ключу или None.
+
+        Изображение, найденное только на диске, поднимается в память.
+        """
+        with self._lock:
+            if key in self._images:
+                self._images.move_to_end(key)
+                return self._images[key]
+
+        if self.directory is None:
+            return None
+        try:
+            with open(self._path(key), 'rb') as f:
+                image = f.read()
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            return None
+        self._remember(key, image)
+        return image
+
+    def put(self, key: str, image: bytes):
+        """Сохраняет изображение в памяти и, если задана директория, на диске."""
+        self._remember(key, image)
+        if self.directory is None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self._path(key) + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(image)
+        os.replace(tmp_path, self._path(key))
+        self._evict_disk()
+
+    def _evict_disk(self):
+        """Удаляет с диска файлы, которые дольше всех не запрашивались."""
+        with self._lock:
+            entries = [entry for entry in os.scandir(self.directory)
+                       if entry.name.endswith('.png')]
+            if len(entries) <= self.disk_capacity:
+                return
+            entries.sort(key=lambda entry: entry.stat().st_mtime_ns)
+            for entry in entries[:len(entries) - self.disk_capacity]:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+    def _remember(self, key: str, image: bytes):
+        with self._lock:
+            self._images[key] = image
+            self._images.move_to_end(key)
+            while len(self._images) > self.capacity:
+                self._images.popitem(last=False)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            if key in self._images:
+                return True
+        return self.directory is not None and os.path.isfile(self._path(key))
+
+    def get_or_render(self, kind: str, period: str, version: str, cube_factory) -> bytes:
+        """Возвращает график из кэша или отрисовывает и кэширует его.
+
+        Args:
+            kind (str): Вид графика.
+            period (str): Период или None.
+            version (str): Версия журнала (см. :func:`ledger_version`).
+            cube_factory (Callable[[], AggregationCube]): Построение куба;
+                вызывается только при промахе кэша.
+
+        Returns:
+            bytes: Изображение PNG или None, если за период нет данных.
+        """
+        key = chart_key(kind, period, version)
+        image = self.get(key)
+        if image is None:
+            image = render(cube_factory(), kind, period)
+            if image is not None:
+                self.put(key, image)
+        return image
+
+
+def main():
+    """Точка входа: сохраняет график текущего журнала в PNG без графического интерфейса."""
+    parser = argparse.ArgumentParser(description='Отрисовка графика журнала в PNG')
+    parser.add_argument('kind', choices=KINDS)
+    parser.add_argument('output', help='Путь к PNG-файлу')
+    parser.add_argument('--period', help='ГГГГ, ГГГГ-ММ или ГГГГ-ММ-ДД')
+    parser.add_argument('--cache-dir', help='Директория дискового кэша графиков')
+    args = parser.parse_args()
+
+    ledger = Ledger.load()
+    ledger.refresh()
+
+    def build_cube():
+        converter = CurrencyConverter(storage.load_rates())
+        return AggregationCube.from_df(converter.convert(transactions_to_df(ledger.transactions), BASE_CURRENCY))
+
+    cache = ChartCache(directory=args.cache_dir)
+    version = ledger_version(ledger, file_digest(storage.RATES_FILE))
+    image = cache.get_or_render(args.kind, args.period, version, build_cube)
+    if image is None:
+        print('Нет данных для графика')
+        return
+    with open(args.output, 'wb') as f:
+        f.write(image)
+
+
+if __name__ == '__main__':
+    main()
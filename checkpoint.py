@@ -0,0 +1,360 @@
+import os
+import pickle
+import hashlib
+import bisect
+import itertools
+from operator import attrgetter
+import numpy as np
+import storage
+from models import TransactionColumns
+from instrumentation import traced
+
+
+# Сигнатура файла контрольной точки и версия формата данных
+MAGIC = b'FPCKPT1\n'
+VERSION = 3
+
+# Поля операции, сохраняемые столбцами
+_OBJECT_COLUMNS = ('category', 'description', 'transaction_type', 'currency', 'id')
+
+# До скольких удалений строки убираются из копии журнала поштучно,
+# а не одной сборкой списка из промежутков между ними
+_INDEX_LOOKUPS = 16
+
+
+def _ids(transactions) -> list:
+    """Возвращает идентификаторы операций в порядке журнала."""
+    if isinstance(transactions, TransactionColumns):
+        return transactions.column('id').tolist()
+    return list(map(attrgetter('id'), transactions))
+
+
+def _with_changes(transactions, edits: dict, deleted: list):
+    """Возвращает копию журнала с замененными и удаленными строками."""
+    if isinstance(transactions, TransactionColumns):
+        return transactions.with_changes(edits, deleted)
+    result = transactions.copy()
+    for position, t in edits.items():
+        result[position] = t
+    if len(deleted) <= _INDEX_LOOKUPS:
+        for position in reversed(deleted):
+            del result[position]
+        return result
+    bounds = [-1] + deleted + [len(result)]
+    return list(itertools.chain.from_iterable(
+        result[start + 1:stop] for start, stop in zip(bounds, bounds[1:])
+    ))
+
+
+def file_digest(path: str) -> str:
+    """Возвращает SHA-256 содержимого файла или None, если файла нет.
+
+    Используется, чтобы проверить, что агрегаты контрольной точки были
+    посчитаны по той же таблице курсов.
+    """
+    if not os.path.isfile(path):
+        return None
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def write_checkpoint(state: dict, path: str = None):
+    """Атомарно записывает контрольную точку.
+
+    Файл состоит из сигнатуры, контрольной суммы SHA-256 и сериализованного
+    состояния. Запись идет во временный файл, который затем заменяет
+    прежнюю контрольную точку через :func:`os.replace`, поэтому при сбое
+    на диске остается либо старая, либо новая точка целиком.
+
+    Args:
+        state (dict): Состояние журнала (см. :meth:`Ledger.save`).
+        path (str, optional): Путь к файлу. По умолчанию `storage.CHECKPOINT_FILE`.
+    """
+    path = path or storage.CHECKPOINT_FILE
+    storage.ensure_data_dir()
+    payload = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(hashlib.sha256(payload).digest())
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_checkpoint(path: str = None) -> dict:
+    """Читает контрольную точку и проверяет ее контрольную сумму.
+
+    Args:
+        path (str, optional): Путь к файлу. По умолчанию `storage.CHECKPOINT_FILE`.
+
+    Returns:
+        dict: Сохраненное состояние или None, если файла нет, он поврежден
+        или записан другой версией формата.
+    """
+    path = path or storage.CHECKPOINT_FILE
+    if not os.path.isfile(path):
+        return None
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    header = len(MAGIC) + hashlib.sha256().digest_size
+    if data[:len(MAGIC)] != MAGIC or len(data) < header:
+        print('Контрольная точка повреждена, выполняется полная загрузка')
+        return None
+    payload = data[header:]
+    if hashlib.sha256(payload).digest() != data[len(MAGIC):header]:
+        print('Контрольная точка повреждена, выполняется полная загрузка')
+        return None
+
+    state = pickle.loads(payload)
+    if state.get('version') != VERSION:
+        return None
+    return state
+
+
+def _to_columns(transactions: list) -> dict:
+    """Раскладывает операции по столбцам NumPy."""
+    if isinstance(transactions, TransactionColumns):
+        return {name: transactions.column(name) for name in ('amount', 'date') + _OBJECT_COLUMNS}
+    columns = {
+        'amount': np.fromiter((t.amount for t in transactions), dtype=np.int64, count=len(transactions)),
+        'date': np.array([t.date for t in transactions], dtype='datetime64[us]'),
+    }
+    for name in _OBJECT_COLUMNS:
+        columns[name] = np.array([getattr(t, name) for t in transactions], dtype=object)
+    return columns
+
+
+class Ledger:
+    """Журнал операций в памяти, который дочитывается из хранилища по смещениям.
+
+    Журнал помнит, до какого смещения прочитаны основной файл и журнал
+    изменений, поэтому :meth:`refresh` разбирает только дописанные байты.
+    Состояние вместе с кубом агрегатов сохраняется в контрольную точку;
+    при запуске :meth:`load` восстанавливает его и дочитывает хвост файлов,
+    так что время запуска пропорционально объему новых данных, а не всей истории.
+
+    Операции, восстановленные из контрольной точки, остаются столбцами
+    (:class:`models.TransactionColumns`): объекты строк создаются только
+    при обращении к ним. Позиции изменяемых операций ищутся по индексу
+    идентификаторов, который строится при первой правке и затем
+    обновляется приращениями.
+
+    Attributes:
+        transactions (list[Transaction]): Актуальные операции (список или
+            :class:`models.TransactionColumns`).
+        rows (int): Сколько строк данных основного файла прочитано.
+        csv_offset (int): Смещение в основном файле, до которого он прочитан.
+        changes_offset (int): Смещение в журнале изменений.
+        fingerprint (tuple): Отпечаток прочитанной части файлов (см. :func:`storage.read_tail`).
+        cube (AggregationCube): Куб агрегатов из контрольной точки или None.
+        rates_digest (str): Хеш таблицы курсов, по которой построен `cube`.
+        cold_rows (int): Сколько операций вынесено в холодную историю
+            (см. :class:`history.ColdHistory`); 0 — в памяти весь журнал.
+        delta (dict): Правки и удаления, примененные последним :meth:`refresh`
+            без перечитывания файлов, или None. Ключи: 'removed' (прежние версии
+            измененных и удаленные операции), 'added' (новые версии измененных),
+            'deleted' и 'edited' (их позиции в журнале до обновления),
+            'appended' (дописанные операции с уже примененными изменениями)
+            и 'unmatched' (изменения операций, которых нет в памяти, например
+            вынесенных в холодную историю).
+        pending (bool): True, если последний :meth:`refresh` с ограничением
+            `max_bytes` прочитал основной файл не до конца.
+    """
+
+    def __init__(self):
+        """Создает пустой журнал."""
+        self.transactions = []
+        self.rows = 0
+        self.csv_offset = 0
+        self.changes_offset = 0
+        self.fingerprint = None
+        self.cube = None
+        self.rates_digest = None
+        self.cold_rows = 0
+        self.delta = None
+        self.pending = False
+        # Индекс позиций: идентификатор -> слот, где слот — позиция строки
+        # без учета удалений после построения индекса; удаленные слоты
+        # (по возрастанию) лежат в _holes
+        self._indexed = None
+        self._slots = {}
+        self._holes = []
+        self._slot_count = 0
+
+    @classmethod
+    @traced('checkpoint.load', rows=lambda result, *args, **kwargs: len(result.transactions))
+    def load(cls, path: str = None) -> 'Ledger':
+        """Восстанавливает журнал из контрольной точки.
+
+        Если контрольной точки нет или она повреждена, журнал остается
+        пустым и первый вызов :meth:`refresh` прочитает файлы целиком.
+
+        Args:
+            path (str, optional): Путь к контрольной точке.
+
+        Returns:
+            Ledger: Журнал, готовый к вызову :meth:`refresh`.
+        """
+        ledger = cls()
+        try:
+            state = read_checkpoint(path)
+        except Exception as e:
+            print(f'Ошибка при чтении контрольной точки: {e}')
+            state = None
+        if state is None:
+            return ledger
+
+        ledger.transactions = TransactionColumns(state['columns'])
+        ledger.rows = state['rows']
+        ledger.csv_offset = state['csv_offset']
+        ledger.changes_offset = state['changes_offset']
+        ledger.fingerprint = state['fingerprint']
+        ledger.cube = state['cube']
+        ledger.rates_digest = state['rates_digest']
+        ledger.cold_rows = state['cold_rows']
+        return ledger
+
+    @traced('checkpoint.refresh', rows=lambda result, self: len(self.transactions))
+    def refresh(self, max_bytes: int = None) -> list:
+        """Дочитывает операции и изменения, записанные после последнего чтения.
+
+        Правки и удаления применяются без перечитывания файлов; что именно
+        изменилось, описывает атрибут :attr:`delta`, чтобы производные
+        структуры можно было обновить приращениями.
+
+        Args:
+            max_bytes (int, optional): Читать основной файл частями не больше
+                примерно `max_bytes` байт (см. :func:`storage.read_tail`).
+                Если файл прочитан не до конца, :attr:`pending` равен True.
+
+        Returns:
+            list[Transaction]: Дописанные операции, если остальные не менялись;
+            None, если были правки или удаления (см. :attr:`delta`) либо файлы
+            были переписаны и прочитаны заново (тогда :attr:`delta` равен None
+            и агрегаты нужно перестроить).
+        """
+        self.delta = None
+        self.pending = False
+        try:
+            tail = storage.read_tail(self.csv_offset, self.changes_offset, self.rows, self.fingerprint, max_bytes)
+        except Exception as e:
+            print(f'Ошибка при загрузке данных: {e}')
+            return []
+
+        if tail['reset']:
+            self.transactions = []
+            self.rows = 0
+            self.cube = None
+            self.cold_rows = 0
+        self.csv_offset = tail['csv_offset']
+        self.changes_offset = tail['changes_offset']
+        self.fingerprint = tail['fingerprint']
+        self.pending = tail['partial']
+        self.rows += len(tail['transactions'])
+        if tail['changes'] and not tail['reset']:
+            self.delta = self._apply_changes(tail['transactions'], tail['changes'])
+            self.cube = None
+            return None
+        self.transactions.extend(tail['transactions'])
+
+        if tail['changes']:
+            self.transactions = storage.apply_changes(self.transactions, tail['changes'])
+            self.cube = None
+        if tail['reset'] or tail['changes']:
+            return None
+        return tail['transactions']
+
+    def _apply_changes(self, appended: list, changes: dict) -> dict:
+        """Применяет изменения к операциям в памяти и описывает их для :attr:`delta`.
+
+        Прежний список не изменяется (его могут читать фоновые задачи):
+        строится копия, в которой заменены измененные и убраны удаленные строки.
+
+        Args:
+            appended (list[Transaction]): Операции, дописанные в основной файл.
+            changes (dict): Новые записи журнала изменений (см. :func:`storage.apply_changes`).
+
+        Returns:
+            dict: Описание изменений (см. :attr:`delta`).
+        """
+        slots = self._index()
+        positions = sorted(
+            slots[key] - bisect.bisect_left(self._holes, slots[key]) for key in changes if key in slots
+        )
+        removed, added, deleted, edited = [], [], [], []
+        edits = {}
+        for position in positions:
+            t = self.transactions[position]
+            op, new = changes[t.id]
+            removed.append(t)
+            if op == 'edit':
+                edits[position] = new
+                added.append(new)
+                edited.append(position)
+            else:
+                deleted.append(position)
+                bisect.insort(self._holes, slots.pop(t.id))
+        result = _with_changes(self.transactions, edits, deleted)
+
+        matched = {t.id for t in removed} | {t.id for t in appended if t.id in changes}
+        appended = storage.apply_changes(appended, changes)
+        result.extend(appended)
+        self.transactions = self._indexed = result
+        return {
+            'removed': removed,
+            'added': added,
+            'deleted': deleted,
+            'edited': edited,
+            'appended': appended,
+            'unmatched': {key: change for key, change in changes.items() if key not in matched},
+        }
+
+    def _index(self) -> dict:
+        """Возвращает индекс слотов операций, достраивая его при необходимости.
+
+        Индекс строится заново, если журнал был заменен (перечитан или
+        вынесен в холодную историю), и дополняется строками, дописанными
+        после последнего обращения.
+
+        Returns:
+            dict: Идентификатор -> слот (см. :meth:`_apply_changes`).
+        """
+        if self.transactions is not self._indexed:
+            self._indexed = self.transactions
+            self._slots = {}
+            self._holes = []
+            self._slot_count = 0
+        indexed = self._slot_count - len(self._holes)
+        if len(self.transactions) > indexed:
+            ids = _ids(self.transactions[indexed:])
+            self._slots.update(zip(ids, range(self._slot_count, self._slot_count + len(ids))))
+            self._slot_count += len(ids)
+        return self._slots
+
+    @traced('checkpoint.save', rows=lambda result, self, *args, **kwargs: len(self.transactions))
+    def save(self, cube=None, rates_digest: str = None, path: str = None):
+        """Записывает контрольную точку с текущим состоянием журнала.
+
+        Args:
+            cube (AggregationCube, optional): Куб агрегатов, соответствующий
+                текущим операциям.
+            rates_digest (str, optional): Хеш таблицы курсов, по которой построен куб.
+            path (str, optional): Путь к контрольной точке.
+        """
+        self.cube = cube
+        self.rates_digest = rates_digest if cube is not None else None
+        write_checkpoint({
+            'version': VERSION,
+            'columns': _to_columns(self.transactions),
+            'rows': self.rows,
+            'csv_offset': self.csv_offset,
+            'changes_offset': self.changes_offset,
+            'fingerprint': self.fingerprint,
+            'cube': self.cube,
+            'rates_digest': self.rates_digest,
+            'cold_rows': self.cold_rows,
+        }, path)
@@ -0,0 +1,164 @@
+import os
+import sys
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+import storage
+from checkpoint import Ledger, file_digest
+from analysis import transactions_to_df, CurrencyConverter
+from cube import AggregationCube, TYPES
+from models import BASE_CURRENCY
+from utils import MINOR_UNITS
+from instrumentation import traced
+
+
+def _empty_partial(directory: str) -> dict:
+    return {
+        'directory': directory,
+        'rows': 0,
+        'categories': pd.DataFrame({'sum': pd.Series(dtype='int64'), 'count': pd.Series(dtype='int64')},
+                                   index=pd.MultiIndex.from_arrays([[], []], names=['transaction_type', 'category'])),
+        'daily': pd.DataFrame({name: pd.Series(dtype='int64') for name in TYPES},
+                              index=pd.DatetimeIndex([], name='date')),
+    }
+
+
+def ledger_partials(directory: str, start: str = None, end: str = None) -> dict:
+    """Считает частичные агрегаты одного журнала (выполняется в процессе-обработчике).
+
+    Если в директории есть контрольная точка с кубом агрегатов, посчитанным
+    по той же таблице курсов (:class:`checkpoint.Ledger`), в куб дописываются
+    только новые строки. Иначе журнал читается векторно
+    (:func:`storage.load_frame`) и куб строится за один проход.
+    Файлы директории не изменяются.
+    Наружу возвращаются только компактные агрегаты, а не строки журнала.
+
+    Args:
+        directory (str): Директория данных журнала.
+        start (str, optional): Начало периода ('YYYY', 'YYYY-MM' или 'YYYY-MM-DD').
+        end (str, optional): Конец периода включительно.
+
+    Returns:
+        dict: Ключи 'directory', 'rows' (операций в журнале), 'categories'
+        (DataFrame с индексом (тип, категория) и колонками 'sum' и 'count')
+        и 'daily' (DataFrame с индексом-датой и колонками типов операций).
+        Суммы — в копейках базовой валюты по курсам этой директории.
+
+    Raises:
+        ValueError: Если директории нет или для пересчета не хватает курсов.
+    """
+    if not os.path.isdir(directory):
+        raise ValueError(f'Директория не найдена: {directory}')
+    storage.set_data_dir(directory)
+    converter = CurrencyConverter(storage.load_rates())
+
+    # Куб контрольной точки годится, если он посчитан по тем же курсам
+    # и весь журнал в памяти; тогда разбираются только дописанные строки
+    cube = None
+    ledger = Ledger.load()
+    if ledger.cube is not None and not ledger.cold_rows and ledger.rates_digest == file_digest(storage.RATES_FILE):
+        appended = ledger.refresh()
+        if appended is not None and ledger.cube is not None:
+            cube = ledger.cube
+            if appended:
+                cube.append_df(converter.convert(transactions_to_df(appended), BASE_CURRENCY))
+            rows = len(ledger.transactions)
+    if cube is None:
+        df = storage.load_frame()
+        cube = AggregationCube.from_df(converter.convert(df, BASE_CURRENCY))
+        rows = len(df)
+
+    partial = _empty_partial(directory)
+    partial['rows'] = rows
+    cells = cube.to_frame('year', start, end)
+    if not cells.empty:
+        partial['categories'] = cells.groupby(['transaction_type', 'category'])[['sum', 'count']].sum().astype('int64')
+    daily = cube.time_series('day', start, end)
+    if not daily.empty:
+        partial['daily'] = daily.reindex(columns=list(TYPES), fill_value=0).astype('int64')
+    return partial
+
+
+def merge_partials(partials: list) -> dict:
+    """Объединяет частичные агрегаты нескольких журналов.
+
+    Суммы и количества складываются по ключам (тип и категория, день),
+    поэтому результат не зависит от порядка журналов.
+
+    Args:
+        partials (list[dict]): Результаты :func:`ledger_partials`.
+
+    Returns:
+        dict: Ключи 'rows' (всего операций), 'ledgers' (``{директория: операций}``),
+        'categories' и 'daily' той же формы, что и у частичных агрегатов.
+    """
+    partials = list(partials) or [_empty_partial(None)]
+    categories = pd.concat([p['categories'] for p in partials])
+    daily = pd.concat([p['daily'] for p in partials])
+    return {
+        'rows': sum(p['rows'] for p in partials),
+        'ledgers': {p['directory']: p['rows'] for p in partials if p['directory'] is not None},
+        'categories': categories.groupby(level=['transaction_type', 'category'], sort=True).sum(),
+        'daily': daily.groupby(level='date', sort=True).sum(),
+    }
+
+
+@traced('consolidate.consolidate', rows=lambda result, *args, **kwargs: result['rows'])
+def consolidate(directories: list, start: str = None, end: str = None, max_workers: int = None) -> dict:
+    """Сводные агрегаты по нескольким журналам, посчитанные параллельно.
+
+    Каждая директория обрабатывается в отдельном процессе пула
+    (:class:`concurrent.futures.ProcessPoolExecutor`): процесс читает журнал
+    и считает частичные агрегаты (:func:`ledger_partials`), а в основной
+    процесс передаются только они. Время работы определяется самым большим
+    журналом и числом ядер, а не суммарным объемом строк.
+
+    Журналы, которые не удалось обработать, пропускаются с сообщением об ошибке.
+
+    Args:
+        directories (list[str]): Директории данных журналов.
+        start (str, optional): Начало периода.
+        end (str, optional): Конец периода включительно.
+        max_workers (int, optional): Число процессов. По умолчанию — число
+            ядер, но не больше числа журналов.
+
+    Returns:
+        dict: Объединенные агрегаты (см. :func:`merge_partials`).
+    """
+    directories = [os.path.abspath(d) for d in directories]
+    if not directories:
+        return merge_partials([])
+    max_workers = max_workers or min(len(directories), os.cpu_count() or 1)
+
+    partials = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(ledger_partials, d, start, end): d for d in directories}
+        for future in as_completed(futures):
+            try:
+                partials[futures[future]] = future.result()
+            except Exception as e:
+                print(f'Ошибка при обработке журнала {futures[future]}: {e}')
+    return merge_partials([partials[d] for d in directories if d in partials])
+
+
+def main():
+    """Точка входа: печатает сводный отчет по нескольким директориям данных."""
+    parser = argparse.ArgumentParser(description='Сводный отчет по нескольким журналам операций')
+    parser.add_argument('directories', nargs='+', help='Директории данных (как data/)')
+    parser.add_argument('--start', help='Начало периода: ГГГГ, ГГГГ-ММ или ГГГГ-ММ-ДД')
+    parser.add_argument('--end', help='Конец периода включительно')
+    parser.add_argument('--workers', type=int, help='Число процессов')
+    parser.add_argument('--daily', help='CSV-файл для ряда сумм по дням')
+    args = parser.parse_args()
+
+    report = consolidate(args.directories, args.start, args.end, args.workers)
+    for directory, rows in report['ledgers'].items():
+        print(f'{directory}: {rows} операций', file=sys.stderr)
+    for (transaction_type, category), row in report['categories'].iterrows():
+        print(f"{transaction_type}\t{category}\t{row['sum'] / MINOR_UNITS:.2f}\t{row['count']}")
+    if args.daily:
+        (report['daily'] / MINOR_UNITS).to_csv(args.daily)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,309 @@
+import numpy as np
+import pandas as pd
+
+
+# Типы операций — фиксированная ось куба
+TYPES = ('expense', 'income')
+
+# Уровни детализации периода: от крупного к мелкому
+LEVELS = ('year', 'month', 'day')
+
+# Пустые ячейки: min/max инициализируются крайними значениями int64
+_EMPTY_MIN = np.iinfo(np.int64).max
+_EMPTY_MAX = np.iinfo(np.int64).min
+
+
+class AggregationCube:
+    """Материализованный куб агрегатов «день × категория × тип».
+
+    Для каждой ячейки хранятся сумма, количество, минимум и максимум сумм
+    операций (в копейках) в плотных массивах NumPy формы
+    ``(дни, категории, типы)``. Ось дней разреженная: в ней только дни,
+    за которые были операции, поэтому одна далекая дата добавляет одну
+    строку, а не все дни до нее. Куб строится за один векторный проход по
+    DataFrame и обновляется инкрементально при дозаписи, правке и удалении
+    операций.
+    Свертка по месяцам и годам (roll-up) и детализация
+    год → месяц → день (drill-down) выполняются по массивам куба без обращения
+    к исходным операциям.
+
+    Attributes:
+        day_index (numpy.ndarray): Дни оси периодов (datetime64[D], по возрастанию).
+        categories (list[str]): Названия категорий в порядке оси куба.
+        sums (numpy.ndarray): Суммы, int64.
+        counts (numpy.ndarray): Количество операций, int64.
+        mins (numpy.ndarray): Минимальные суммы, int64 (пустые ячейки — максимум int64).
+        maxs (numpy.ndarray): Максимальные суммы, int64 (пустые ячейки — минимум int64).
+    """
+
+    def __init__(self):
+        """Создает пустой куб."""
+        self.day_index = np.array([], dtype='datetime64[D]')
+        self.categories = []
+        self._category_codes = {}
+        shape = (0, 0, len(TYPES))
+        self.sums = np.zeros(shape, dtype=np.int64)
+        self.counts = np.zeros(shape, dtype=np.int64)
+        self.mins = np.full(shape, _EMPTY_MIN, dtype=np.int64)
+        self.maxs = np.full(shape, _EMPTY_MAX, dtype=np.int64)
+
+    @classmethod
+    def from_df(cls, df: pd.DataFrame) -> 'AggregationCube':
+        """Строит куб по таблице операций за один векторный проход.
+
+        Args:
+            df (pd.DataFrame): Операции с колонками 'date', 'category',
+                'transaction_type' и 'amount' (int64, копейки) в одной валюте.
+
+        Returns:
+            AggregationCube: Заполненный куб.
+        """
+        cube = cls()
+        cube.append_df(df)
+        return cube
+
+    def copy(self) -> 'AggregationCube':
+        """Возвращает независимую копию куба."""
+        cube = AggregationCube()
+        cube.day_index = self.day_index.copy()
+        cube.categories = list(self.categories)
+        cube._category_codes = dict(self._category_codes)
+        cube.sums = self.sums.copy()
+        cube.counts = self.counts.copy()
+        cube.mins = self.mins.copy()
+        cube.maxs = self.maxs.copy()
+        return cube
+
+    @property
+    def days(self) -> pd.DatetimeIndex:
+        """Даты оси периодов куба."""
+        return pd.DatetimeIndex(self.day_index)
+
+    def _resize(self, days, n_categories):
+        """Расширяет оси куба так, чтобы он вмещал дни и категории."""
+        day_index = np.union1d(self.day_index, days)
+        extra_categories = n_categories - self.sums.shape[1]
+        if len(day_index) == len(self.day_index) and not extra_categories:
+            return
+
+        # Прежние строки переносятся на свои места в объединенной оси дней
+        rows = np.searchsorted(day_index, self.day_index)
+        shape = (len(day_index), n_categories, len(TYPES))
+        for name, fill in (('sums', 0), ('counts', 0), ('mins', _EMPTY_MIN), ('maxs', _EMPTY_MAX)):
+            array = np.full(shape, fill, dtype=np.int64)
+            old = getattr(self, name)
+            array[rows, :old.shape[1]] = old
+            setattr(self, name, array)
+        self.day_index = day_index
+
+    def append_df(self, df: pd.DataFrame):
+        """Добавляет операции в куб (инкрементальное обновление).
+
+        Args:
+            df (pd.DataFrame): Новые операции с колонками 'date', 'category',
+                'transaction_type' и 'amount' (int64, копейки).
+
+        Raises:
+            ValueError: Если встречен неизвестный тип операции.
+        """
+        self._accumulate(df, 1)
+
+    def remove_df(self, df: pd.DataFrame):
+        """Вычитает из куба операции, добавленные в него раньше.
+
+        Суммы и количества пересчитываются точно. Минимум и максимум ячейки
+        без исходных строк восстановить нельзя: они сбрасываются, только когда
+        ячейка опустела, а иначе остаются прежними границами.
+
+        Args:
+            df (pd.DataFrame): Удаляемые операции (колонки как в :meth:`append_df`).
+
+        Raises:
+            ValueError: Если встречен неизвестный тип операции.
+        """
+        self._accumulate(df, -1)
+
+    def _accumulate(self, df: pd.DataFrame, sign: int):
+        """Прибавляет (`sign` = 1) или вычитает (`sign` = -1) операции."""
+        if df.empty:
+            return
+
+        days = df['date'].to_numpy().astype('datetime64[D]')
+        type_codes = pd.Categorical(df['transaction_type'], categories=TYPES).codes
+        if (type_codes < 0).any():
+            raise ValueError(f"Тип операции должен быть одним из: {', '.join(TYPES)}")
+
+        # Новые категории дописываются в конец оси
+        categories, labels = pd.factorize(df['category'])
+        for label in labels:
+            if label not in self._category_codes:
+                self._category_codes[label] = len(self.categories)
+                self.categories.append(label)
+        mapping = np.array([self._category_codes[label] for label in labels], dtype=np.int64)
+        category_codes = mapping[categories]
+
+        self._resize(np.unique(days), len(self.categories))
+        day_codes = np.searchsorted(self.day_index, days)
+
+        # Плоский индекс ячейки; группировка через сортировку — точная в int64
+        shape = self.sums.shape
+        flat = np.ravel_multi_index((day_codes, category_codes, type_codes.astype(np.int64)), shape)
+        order = np.argsort(flat, kind='stable')
+        flat_sorted = flat[order]
+        amounts = df['amount'].to_numpy(dtype=np.int64)[order]
+        starts = np.flatnonzero(np.r_[True, flat_sorted[1:] != flat_sorted[:-1]])
+        cells = flat_sorted[starts]
+
+        sums, counts = self.sums.reshape(-1), self.counts.reshape(-1)
+        mins, maxs = self.mins.reshape(-1), self.maxs.reshape(-1)
+        sums[cells] += sign * np.add.reduceat(amounts, starts)
+        counts[cells] += sign * np.diff(np.r_[starts, len(amounts)])
+        if sign > 0:
+            mins[cells] = np.minimum(mins[cells], np.minimum.reduceat(amounts, starts))
+            maxs[cells] = np.maximum(maxs[cells], np.maximum.reduceat(amounts, starts))
+        else:
+            emptied = cells[counts[cells] == 0]
+            mins[emptied] = _EMPTY_MIN
+            maxs[emptied] = _EMPTY_MAX
+
+    def _period_bounds(self, level: str):
+        """Возвращает метки периодов уровня и индексы их начала на оси дней."""
+        if level not in LEVELS:
+            raise ValueError(f"Уровень должен быть одним из: {', '.join(LEVELS)}")
+        days = self.days
+        if level == 'day':
+            return days.strftime('%Y-%m-%d'), np.arange(len(days))
+        keys = days.to_period('M' if level == 'month' else 'Y')
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.array([], dtype=int)
+        return keys[starts].astype(str), starts
+
+    def _day_range(self, start=None, end=None):
+        """Переводит границы периода в срез по оси дней.
+
+        Границы задаются строками 'YYYY', 'YYYY-MM' или 'YYYY-MM-DD' и
+        включаются целиком: ``end='2026-01'`` означает «по 31 января».
+        """
+        first, last = 0, len(self.day_index)
+        if start is not None:
+            first = np.searchsorted(self.day_index, np.datetime64(start).astype('datetime64[D]'))
+        if end is not None:
+            # Начало следующего года, месяца или дня — первая дата после периода
+            after = (np.datetime64(end) + 1).astype('datetime64[D]')
+            last = np.searchsorted(self.day_index, after)
+        return slice(int(first), int(max(first, last)))
+
+    def rollup(self, level: str = 'month', start: str = None, end: str = None) -> dict:
+        """Сворачивает куб до уровня 'year', 'month' или 'day'.
+
+        Args:
+            level (str, optional): Уровень детализации периода.
+            start (str, optional): Начало периода ('YYYY', 'YYYY-MM' или 'YYYY-MM-DD').
+            end (str, optional): Конец периода включительно, в тех же форматах.
+
+        Returns:
+            dict: Метки периодов 'periods' и массивы 'sum', 'count', 'min', 'max'
+            формы ``(периоды, категории, типы)``.
+        """
+        window = self._day_range(start, end)
+        labels, starts = self._period_bounds(level)
+        # Оставляем периоды, пересекающиеся с окном, и обрезаем их по окну
+        keep = (starts < window.stop) & (np.r_[starts[1:], self.sums.shape[0]] > window.start)
+        labels = np.asarray(labels)[keep]
+        starts = np.maximum(starts[keep], window.start) - window.start
+
+        part = (slice(window.start, window.stop),)
+        if len(starts) == 0:
+            shape = (0,) + self.sums.shape[1:]
+            return {
+                'periods': labels,
+                'sum': np.zeros(shape, dtype=np.int64),
+                'count': np.zeros(shape, dtype=np.int64),
+                'min': np.full(shape, _EMPTY_MIN, dtype=np.int64),
+                'max': np.full(shape, _EMPTY_MAX, dtype=np.int64),
+            }
+        return {
+            'periods': labels,
+            'sum': np.add.reduceat(self.sums[part], starts, axis=0),
+            'count': np.add.reduceat(self.counts[part], starts, axis=0),
+            'min': np.minimum.reduceat(self.mins[part], starts, axis=0),
+            'max': np.maximum.reduceat(self.maxs[part], starts, axis=0),
+        }
+
+    def to_frame(self, level: str = 'month', start: str = None, end: str = None) -> pd.DataFrame:
+        """Возвращает непустые ячейки свертки в виде таблицы.
+
+        Returns:
+            pd.DataFrame: Колонки 'period', 'category', 'transaction_type',
+            'sum', 'count', 'min', 'max'.
+        """
+        cube = self.rollup(level, start, end)
+        p, c, t = np.nonzero(cube['count'])
+        return pd.DataFrame({
+            'period': cube['periods'][p] if len(p) else np.array([], dtype=object),
+            'category': np.array(self.categories, dtype=object)[c] if len(c) else np.array([], dtype=object),
+            'transaction_type': np.array(TYPES, dtype=object)[t],
+            'sum': cube['sum'][p, c, t],
+            'count': cube['count'][p, c, t],
+            'min': cube['min'][p, c, t],
+            'max': cube['max'][p, c, t],
+        })
+
+    def drill_down(self, period: str) -> pd.DataFrame:
+        """Детализирует период на уровень ниже: год → месяцы, месяц → дни.
+
+        Args:
+            period (str): Год ('2026') или месяц ('2026-01').
+
+        Returns:
+            pd.DataFrame: Непустые ячейки вложенных периодов (см. :meth:`to_frame`).
+
+        Raises:
+            ValueError: Если период задан не годом и не месяцем.
+        """
+        level = {4: 'month', 7: 'day'}.get(len(period))
+        if level is None:
+            raise ValueError("Детализировать можно год ('YYYY') или месяц ('YYYY-MM')")
+        return self.to_frame(level, period, period)
+
+    def category_totals(self, transaction_type: str, start: str = None, end: str = None) -> pd.Series:
+        """Суммы по категориям за период (аналог :func:`analysis.group_by_category`).
+
+        Args:
+            transaction_type (str): 'expense' или 'income'.
+            start (str, optional): Начало периода.
+            end (str, optional): Конец периода включительно.
+
+        Returns:
+            pd.Series: Суммы в копейках по категориям, где были операции.
+        """
+        window = self._day_range(start, end)
+        t = TYPES.index(transaction_type)
+        sums = self.sums[window, :, t].sum(axis=0)
+        counts = self.counts[window, :, t].sum(axis=0)
+        nonempty = np.flatnonzero(counts)
+        return pd.Series(
+            sums[nonempty],
+            index=pd.Index(np.array(self.categories, dtype=object)[nonempty], name='category'),
+            name='amount',
+            dtype=np.int64,
+        )
+
+    def time_series(self, level: str = 'day', start: str = None, end: str = None) -> pd.DataFrame:
+        """Ряд сумм по периодам для каждого типа операций.
+
+        Returns:
+            pd.DataFrame: Индекс — периоды, где были операции; колонки — типы
+            операций, значения — суммы в копейках.
+        """
+        cube = self.rollup(level, start, end)
+        sums = cube['sum'].sum(axis=1)
+        counts = cube['count'].sum(axis=1)
+        present = [i for i, name in enumerate(TYPES) if counts[:, i].any()]
+        nonempty = counts.sum(axis=1) > 0
+        index = cube['periods'][nonempty]
+        if level == 'day':
+            index = pd.to_datetime(index)
+        return pd.DataFrame(
+            {TYPES[i]: sums[nonempty, i] for i in present},
+            index=pd.Index(index, name='date'),
+        )
@@ -1,10 +1,71 @@
+import os
+import queue
+import base64
 import datetime
+import threading
 import tkinter as tk
-from tkinter import ttk, messagebox
-from models import Transaction
-from storage import save_transactions, load_transactions
-from utils import validate_amount, validate_date, validate_category
-from analysis import transactions_to_df, plot_pie_by_category, plot_income_expence_over_time
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import ttk, messagebox, filedialog
+import instrumentation
+from instrumentation import traced
+from models import Transaction, BASE_CURRENCY
+from storage import save_transactions, load_rates, RATES_FILE, edit_transaction, delete_transaction, FileWatcher, \
+    load_budgets, save_budgets
+from utils import validate_amount, validate_date, validate_category, validate_currency, MINOR_UNITS
+from analysis import transactions_to_df, CurrencyConverter
+from cube import AggregationCube
+from checkpoint import Ledger, file_digest
+from tableview import SortedView
+from history import ColdHistory, hot_cutoff, PAGE_BUDGET_ROWS
+from anomaly import AnomalyDetector, describe
+from charts import ChartCache, chart_key, ledger_version, render
+from budget import BudgetTracker, PERIODS, PERIOD_NAMES, validate_period, describe as describe_budget
+
+
+# Период записи контрольной точки, мс
+CHECKPOINT_INTERVAL_MS = 60_000
+
+# Размер части журнала, читаемой за раз в режиме холодной истории, байт
+LEDGER_CHUNK_BYTES = 16 * 1024 * 1024
+
+# Период проверки файлов хранилища на внешние изменения, мс
+WATCH_INTERVAL_MS = 1000
+
+# Период опроса результатов фоновой аналитики, мс (около 60 кадров в секунду)
+ANALYTICS_POLL_MS = 16
+
+# Задержка фоновой отрисовки графиков после изменения журнала, мс
+PRERENDER_DELAY_MS = 500
+
+# Высота строки таблицы истории, пикселей (для расчета числа видимых строк)
+ROW_HEIGHT = 20
+
+# Заголовки колонок таблицы истории
+HEADINGS = {
+    'type': 'Тип',
+    'amount': 'Сумма',
+    'category': 'Категория',
+    'date': 'Дата',
+    'description': 'Описание',
+}
+
+
+def format_amount(amount: int, currency: str) -> str:
+    """Форматирует сумму в копейках для отображения: '1 234.50 RUB'.
+
+    Это единственное место, где целые копейки превращаются в рубли:
+    хранение и расчеты ведутся в целых числах.
+
+    Args:
+        amount (int): Сумма в копейках.
+        currency (str): Код валюты.
+
+    Returns:
+        str: Строка для вывода в интерфейсе.
+    """
+    sign = '-' if amount < 0 else ''
+    units, cents = divmod(abs(amount), MINOR_UNITS)
+    return f'{sign}{units:,}.{cents:02d} {currency}'.replace(',', ' ')
 
 
 class FinancialPlannerApp:
@@ -23,32 +84,117 @@ class FinancialPlannerApp:
         date_var (tk.StringVar): Буфер для ввода даты (формат YYYY-MM-DD).
         desc_var (tk.StringVar): Буфер для ввода описания.
         type_var (tk.StringVar): Переключатель типа операции ('expense'/'income').
-        tree (ttk.Treeview): Виджет таблицы для отображения истории транзакций.
+        currency_var (tk.StringVar): Буфер для ввода кода валюты операции.
+        converter (CurrencyConverter): Пересчет сумм в валюту отчетов
+            по локальной таблице курсов.
+        ledger (checkpoint.Ledger): Журнал операций, дочитываемый из хранилища
+            по смещениям и сохраняемый в контрольную точку.
+        history (history.ColdHistory): Холодная история в режиме ограниченной
+            памяти или None; `transactions` тогда содержит только горячее окно.
+        anomalies (AnomalyDetector): Статистика расходов по категориям для
+            предупреждения о необычных суммах при добавлении.
+        charts (ChartCache): Кэш отрисованных графиков по версии журнала.
+        cube (AggregationCube): Куб агрегатов для графиков (в базовой валюте);
+            строится при первом построении графика и дополняется при добавлении операций.
+            Изменяется только в потоке аналитики под блокировкой `_cube_lock`.
+        period_var (tk.StringVar): Период для графиков: '', 'YYYY', 'YYYY-MM' или 'YYYY-MM-DD'.
+        view (SortedView): Порядок строк таблицы истории с кэшем сортировок по колонкам.
+        tree (ttk.Treeview): Виджет таблицы; содержит только видимое окно строк `view`.
+        debug_window (tk.Toplevel): Окно отладочной панели замеров или None.
     """
 
-    def __init__(self, root):
+    def __init__(self, root, hot_months: int = None, page_budget: int = PAGE_BUDGET_ROWS,
+                 chart_cache_dir: str = None):
         """Инициализирует приложение, настраивает главное окно и загружает данные.
 
-        При создании объекта происходит автоматическая загрузка истории из 
-        файла через :func:`load_transactions` и первичная отрисовка всех 
-        компонентов интерфейса.
+        При создании объекта история восстанавливается из контрольной точки
+        (:class:`checkpoint.Ledger`) с дочитыванием новых записей файла,
+        после чего отрисовываются все компоненты интерфейса.
 
         Args:
             root (tk.Tk): Корневой объект окна Tkinter, в котором будет 
                 развернуто приложение.
+            hot_months (int, optional): Режим ограниченной памяти: в памяти
+                хранятся только операции за последние `hot_months` месяцев,
+                более старые переносятся в холодную историю на диске
+                (:class:`history.ColdHistory`). По умолчанию в памяти весь журнал.
+            page_budget (int, optional): Сколько строк холодной истории может
+                быть подгружено в память одновременно.
+            chart_cache_dir (str, optional): Директория дискового кэша
+                отрисованных графиков. По умолчанию графики кэшируются только в памяти.
         """
         self.root = root
         self.root.title('Финансовый Планер')
         self.root.geometry('800x600')
         self.root.minsize(700, 500)
 
-        # Загружаем существующие операции
-        self.transactions = load_transactions()
+        self.debug_window = None
+        self.converter = None
+        self._rates_mtime = None
+
+        # Аналитика считается в одном фоновом потоке: задачи выполняются по
+        # очереди, результаты передаются в главный поток через очередь
+        self._analytics = ThreadPoolExecutor(max_workers=1, thread_name_prefix='analytics')
+        self._analytics_results = queue.Queue()
+        self._cube_lock = threading.Lock()
+        self._chart_generation = 0
+        self._chart_future = None
+        self._polling = False
+        self.charts = ChartCache(directory=chart_cache_dir)
+        self._prerender_job = None
+        self._background_results = queue.Queue()
+        self._background_pending = 0
+        self._background_polling = False
+        self._anomaly_generation = 0
+
+        # Восстанавливаем операции и куб из контрольной точки и дочитываем
+        # только то, что было записано после нее
+        self.ledger = Ledger.load()
+        self._hot_months = hot_months
+        self.history = ColdHistory(budget_rows=page_budget) if hot_months else None
+        if self.ledger.cold_rows != (self.history.rows if self.history else 0):
+            # Контрольная точка не согласована с холодной историей — читаем журнал заново
+            if self.history:
+                self.history.clear()
+            self.ledger = Ledger()
+        self.transactions = self.ledger.transactions
+        self.view = SortedView(self.transactions)
+        self.cube = self.ledger.cube
+        self._rates_digest = self.ledger.rates_digest
+        self.anomalies = None
+        self.budgets = None
+        self._sync_ledger()
+        self._evict_cold()
+        self.watcher = FileWatcher()
+
+        # Статистика для проверки новых расходов строится одним векторным
+        # проходом в потоке аналитики; до этого проверка не выполняется
+        self.anomalies = AnomalyDetector()
+        self._refit_anomalies()
+
+        # Счетчики бюджетов: суммы расходов по категориям и периодам
+        self.budget_window = None
+        self._budget_converter = None
+        self._budget_rates_mtime = None
+        self._budget_generation = 0
+        try:
+            limits = load_budgets()
+        except Exception as e:
+            print(f'Ошибка при загрузке бюджетов: {e}')
+            limits = {}
+        self.budgets = BudgetTracker(limits)
+        self._refresh_budget_rates()
+        self._rebuild_budgets()
+        self._checkpointed = self._checkpoint_key()
 
         # Создаём виджеты
         self.create_widgets()
         self.refresh_transaction_table()
 
+        self.root.after(WATCH_INTERVAL_MS, self._watch_files)
+        self.root.after(CHECKPOINT_INTERVAL_MS, self._periodic_checkpoint)
+        self.root.protocol('WM_DELETE_WINDOW', self.on_close)
+
     def create_widgets(self):
         """Создает и размещает все элементы пользовательского интерфейса.
 
@@ -71,7 +217,7 @@ class FinancialPlannerApp:
         input_frame.pack(fill='x', padx=10, pady=(10, 5))
 
         # Сумма
-        ttk.Label(input_frame, text='Сумма (RUB):').grid(row=0, column=0, sticky='w', padx=(0, 10))
+        ttk.Label(input_frame, text='Сумма:').grid(row=0, column=0, sticky='w', padx=(0, 10))
         self.amount_var = tk.StringVar()
         amount_entry = ttk.Entry(input_frame, textvariable=self.amount_var, width=15)
         amount_entry.grid(row=0, column=1, sticky='w')
@@ -103,24 +249,38 @@ class FinancialPlannerApp:
         expense_rb.grid(row=2, column=1, sticky='w', pady=(10, 0))
         income_rb.grid(row=2, column=1, sticky='w', padx=(80, 0), pady=(10, 0))
 
-        # Кнопка 'Добавить'
-        add_btn = ttk.Button(input_frame, text=' Добавить операцию', command=self.add_transaction)
-        add_btn.grid(row=3, column=0, columnspan=4, pady=(15, 0))
+        # Валюта
+        ttk.Label(input_frame, text='Валюта:').grid(row=2, column=2, sticky='w', padx=(20, 10), pady=(10, 0))
+        self.currency_var = tk.StringVar(value=BASE_CURRENCY)
+        currency_box = ttk.Combobox(input_frame, textvariable=self.currency_var, width=6,
+                                    values=(BASE_CURRENCY, 'USD', 'EUR', 'CNY'))
+        currency_box.grid(row=2, column=3, sticky='w', pady=(10, 0))
+
+        # Кнопки 'Добавить', 'Сохранить изменения' и 'Удалить'
+        buttons_frame = ttk.Frame(input_frame)
+        buttons_frame.grid(row=3, column=0, columnspan=4, pady=(15, 0))
+        add_btn = ttk.Button(buttons_frame, text=' Добавить операцию', command=self.add_transaction)
+        add_btn.pack(side='left', padx=5)
+        edit_btn = ttk.Button(buttons_frame, text=' Сохранить изменения', command=self.edit_selected)
+        edit_btn.pack(side='left', padx=5)
+        delete_btn = ttk.Button(buttons_frame, text=' Удалить', command=self.delete_selected)
+        delete_btn.pack(side='left', padx=5)
 
         # === Таблица операций ===
         table_frame = ttk.LabelFrame(self.root, text=' 📜 История операций ', padding=(10, 10))
         table_frame.pack(fill='both', expand=True, padx=10, pady=5)
 
-        # Создаём Treeview (таблицу)
-        columns = ('type', 'amount', 'category', 'date', 'description')
+        # Создаём Treeview (таблицу). Таблица виртуальная: в виджете только
+        # видимые строки, прокрутка и сортировка меняют их набор
+        columns = tuple(HEADINGS)
         self.tree = ttk.Treeview(table_frame, columns=columns, show='headings', height=12)
+        self._top_row = 0
+        self._visible_rows = 12
+        self._visible = {}
 
-        # Заголовки
-        self.tree.heading('type', text='Тип')
-        self.tree.heading('amount', text='Сумма (RUB)')
-        self.tree.heading('category', text='Категория')
-        self.tree.heading('date', text='Дата')
-        self.tree.heading('description', text='Описание')
+        # Заголовки; щелчок по заголовку сортирует таблицу по колонке
+        for column in columns:
+            self.tree.heading(column, text=HEADINGS[column], command=lambda c=column: self.sort_by(c))
 
         # Ширина колонок
         self.tree.column('type', width=80, anchor='center')
@@ -129,18 +289,31 @@ class FinancialPlannerApp:
         self.tree.column('date', width=100, anchor='center')
         self.tree.column('description', width=250)
 
-        # Полоса прокрутки
-        scrollbar = ttk.Scrollbar(table_frame, orient='vertical', command=self.tree.yview)
-        self.tree.configure(yscroll=scrollbar.set)
+        # Выбор строки заполняет форму для редактирования
+        self.tree.bind('<<TreeviewSelect>>', self.on_select)
+
+        # Полоса прокрутки управляет окном строк, а не самим виджетом
+        self.scrollbar = ttk.Scrollbar(table_frame, orient='vertical', command=self._on_scroll)
+        self.tree.bind('<Configure>', self._on_tree_resize)
+        self.tree.bind('<MouseWheel>', lambda e: self._scroll_rows(-1 if e.delta > 0 else 1))
+        self.tree.bind('<Button-4>', lambda e: self._scroll_rows(-1))
+        self.tree.bind('<Button-5>', lambda e: self._scroll_rows(1))
 
         # Размещение
         self.tree.pack(side='left', fill='both', expand=True)
-        scrollbar.pack(side='right', fill='y')
+        self.scrollbar.pack(side='right', fill='y')
 
         # === Нижняя панель: аналитика ===
         analyze_frame = ttk.LabelFrame(self.root, text=' 📊 Аналитика', padding=(10, 10))
         analyze_frame.pack(fill='x', padx=10, pady=(10, 5))
 
+        # Период для графиков (пусто — вся история)
+        ttk.Label(analyze_frame, text='Период:').grid(row=1, column=0, sticky='e', padx=10, pady=(10, 0))
+        self.period_var = tk.StringVar()
+        period_entry = ttk.Entry(analyze_frame, textvariable=self.period_var, width=12)
+        period_entry.grid(row=1, column=1, sticky='w', pady=(10, 0))
+        ttk.Label(analyze_frame, text='ГГГГ, ГГГГ-ММ или ГГГГ-ММ-ДД').grid(row=1, column=2, columnspan=2, sticky='w', pady=(10, 0))
+
         # Кнопка 'Расходы'
         expense_btn = ttk.Button(analyze_frame, text=' Расходы', command=self.expense_dia)
         expense_btn.grid(row=0, column=0, padx=10)
@@ -153,7 +326,22 @@ class FinancialPlannerApp:
         trends_btn = ttk.Button(analyze_frame, text=' Динамика', command=self.cashflow_trends)
         trends_btn.grid(row=0, column=2, padx=10)
 
+        # Кнопка 'Отладка' (также по клавише F12)
+        debug_btn = ttk.Button(analyze_frame, text=' Отладка', command=self.show_debug_panel)
+        debug_btn.grid(row=0, column=3, padx=10)
+        self.root.bind('<F12>', lambda event: self.show_debug_panel())
+
+        # Кнопка 'Бюджеты'
+        budget_btn = ttk.Button(analyze_frame, text=' Бюджеты', command=self.show_budget_panel)
+        budget_btn.grid(row=0, column=4, padx=10)
+
+        # Индикатор выполнения аналитики (виден, пока график считается)
+        self.busy_bar = ttk.Progressbar(analyze_frame, mode='indeterminate', length=100)
+        self.busy_bar.grid(row=0, column=5, padx=10)
+        self.busy_bar.grid_remove()
 
+
+    @traced('gui.add_transaction', rows=lambda result, self: len(self.transactions))
     def add_transaction(self):
         """Обрабатывает добавление новой транзакции через интерфейс.
 
@@ -162,8 +350,12 @@ class FinancialPlannerApp:
         2. Вызывает функции внешней валидации: :func:`validate_amount`, 
            :func:`validate_category` и :func:`validate_date`.
         3. При успешной проверке создает объект :class:`Transaction`.
-        4. Инициирует сохранение в CSV-файл и обновляет локальный список.
-        5. Перерисовывает таблицу в интерфейсе и очищает поля ввода.
+        4. Проверяет расход на необычность (:class:`AnomalyDetector`) и до записи
+           просит подтверждение, если сумма далеко за пределами нормы категории.
+        5. Проверяет лимиты бюджетов (:class:`budget.BudgetTracker`): при
+           превышении просит подтверждение, при приближении к лимиту предупреждает.
+        6. Инициирует сохранение в CSV-файл и обновляет локальный список.
+        7. Перерисовывает таблицу в интерфейсе и очищает поля ввода.
 
         В случае любой ошибки валидации или записи процесс прерывается, 
         и пользователю выводится модальное окно с описанием проблемы.
@@ -174,35 +366,126 @@ class FinancialPlannerApp:
                 их через `messagebox.showerror`.
         """
         try:
-            # 1. Получаем и валидируем данные
-            amount = validate_amount(self.amount_var.get())
-            category = validate_category(self.category_var.get())
-            date = validate_date(self.date_var.get())
-            description = self.desc_var.get().strip()
-            trans_type = self.type_var.get()
-
-            # 2. Создаём объект
-            transaction = Transaction(
-                amount=amount,
-                category=category,
-                date=date,
-                description=description,
-                transaction_type=trans_type
-            )
-
-            # 3. Сохраняем
+            # 1-2. Получаем, валидируем данные и создаём объект
+            transaction = self._read_form()
+
+            # 3. Проверяем на необычность до записи
+            score = self.anomalies.score(transaction)
+            if score is not None and score['anomaly']:
+                if not messagebox.askyesno('Необычная операция', f'{describe(transaction, score)}\n\nДобавить операцию?'):
+                    return
+
+            # 4. Проверяем лимиты бюджетов
+            alerts = self._check_budget(transaction)
+            exceeded = [describe_budget(a) for a in alerts if a['status'] == 'exceeded']
+            if exceeded:
+                if not messagebox.askyesno('Превышение бюджета', '\n'.join(exceeded) + '\n\nДобавить операцию?'):
+                    return
+
+            # 5. Сохраняем
             save_transactions([transaction])
-            self.transactions.append(transaction)
+            self._sync_ledger()
 
-            # 4. Обновляем интерфейс
+            # 6. Обновляем интерфейс
             self.refresh_transaction_table()
             self.clear_input_fields()
 
-            messagebox.showinfo('Успех', 'Операция добавлена')
+            warnings = [describe_budget(a) for a in alerts if a['status'] == 'warning']
+            if warnings:
+                messagebox.showwarning('Бюджет', 'Операция добавлена\n\n' + '\n'.join(warnings))
+            else:
+                messagebox.showinfo('Успех', 'Операция добавлена')
 
         except Exception as e:
             messagebox.showerror('Ошибка ввода', f'Не удалось добавить операцию:\n{e}')
 
+    def _read_form(self, transaction_id: str = None) -> Transaction:
+        """Валидирует поля формы и создает по ним объект :class:`Transaction`.
+
+        Args:
+            transaction_id (str, optional): Идентификатор, если форма описывает
+                новую версию существующей операции.
+
+        Returns:
+            Transaction: Операция с данными формы.
+
+        Raises:
+            ValueError: Если данные формы не прошли валидацию.
+        """
+        amount = validate_amount(self.amount_var.get())
+        category = validate_category(self.category_var.get())
+        date = validate_date(self.date_var.get())
+        currency = validate_currency(self.currency_var.get())
+        description = self.desc_var.get().strip()
+        trans_type = self.type_var.get()
+
+        return Transaction(
+            amount=amount,
+            category=category,
+            date=date,
+            description=description,
+            transaction_type=trans_type,
+            currency=currency,
+            id=transaction_id
+        )
+
+    def on_select(self, event=None):
+        """Заполняет форму данными выбранной в таблице операции."""
+        selection = self.tree.selection()
+        if not selection:
+            return
+        t = self._visible[selection[0]]
+        units, cents = divmod(t.amount, MINOR_UNITS)
+        self.amount_var.set(f'{units}.{cents:02d}')
+        self.category_var.set(t.category)
+        self.date_var.set(t.date.strftime('%Y-%m-%d'))
+        self.desc_var.set(t.description)
+        self.type_var.set(t.transaction_type)
+        self.currency_var.set(t.currency)
+
+    @traced('gui.edit_selected', rows=lambda result, self: len(self.transactions))
+    def edit_selected(self):
+        """Сохраняет данные формы как новую версию выбранной операции.
+
+        Изменение дописывается в журнал изменений (:func:`edit_transaction`),
+        основной файл не переписывается.
+        """
+        selection = self.tree.selection()
+        if not selection:
+            messagebox.showwarning('Изменение', 'Выберите операцию в таблице')
+            return
+        try:
+            transaction = self._read_form(selection[0])
+            edit_transaction(transaction)
+            self._sync_ledger()     # куб будет перестроен при следующем графике
+
+            self.refresh_transaction_table()
+            self.clear_input_fields()
+        except Exception as e:
+            messagebox.showerror('Ошибка ввода', f'Не удалось изменить операцию:\n{e}')
+
+    @traced('gui.delete_selected', rows=lambda result, self: len(self.transactions))
+    def delete_selected(self):
+        """Удаляет выбранные операции после подтверждения.
+
+        Удаление записывается в журнал изменений (:func:`delete_transaction`).
+        """
+        selection = self.tree.selection()
+        if not selection:
+            messagebox.showwarning('Удаление', 'Выберите операцию в таблице')
+            return
+        if not messagebox.askyesno('Удаление', f'Удалить выбранные операции ({len(selection)})?'):
+            return
+        try:
+            for transaction_id in selection:
+                delete_transaction(transaction_id)
+            self._sync_ledger()
+
+            self.refresh_transaction_table()
+            self.clear_input_fields()
+        except Exception as e:
+            messagebox.showerror('Ошибка', f'Не удалось удалить операцию:\n{e}')
+
     def clear_input_fields(self):
         """Сбрасывает значения в текстовых полях формы ввода.
 
@@ -214,70 +497,941 @@ class FinancialPlannerApp:
         self.category_var.set('')
         self.desc_var.set('')
 
+    @traced('gui.refresh_transaction_table', rows=lambda result, self: len(self.transactions))
     def refresh_transaction_table(self):
         """Синхронизирует виджет таблицы с актуальным списком транзакций.
 
-        Метод полностью очищает текущие записи в графическом виджете `Treeview` 
-        и заново заполняет его данными из атрибута `self.transactions`. 
-        В процессе выполняется форматирование данных: преобразование типов 
-        в человекочитаемый вид (например, 'income' в 'Доход') и округление сумм.
+        Таблица виртуальная: в виджет `Treeview` вставляются только строки
+        видимого окна из :class:`SortedView`, поэтому стоимость обновления
+        не зависит от размера журнала. В процессе выполняется форматирование
+        данных: преобразование типов в человекочитаемый вид (например,
+        'income' в 'Доход') и перевод сумм из копеек в рубли (см. :func:`format_amount`).
 
-        После обновления таблицы выполняется автоматическая прокрутка к 
-        последней (самой новой) записи.
+        Если таблица не отсортирована, она прокручивается к последней
+        (самой новой) записи.
         """
-        # Очищаем текущие строки
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        if self.view.column is None:
+            self._top_row = self._table_size()
+        self._render_rows()
+
+    def _cold_rows_in_table(self) -> int:
+        """Сколько строк холодной истории предшествует горячим в таблице.
 
-        # Добавляем все операции
-        for t in self.transactions:
+        Холодная история показывается только в порядке журнала; сортировка
+        по колонкам работает по горячему окну.
+        """
+        if self.history is None or self.view.column is not None:
+            return 0
+        return self.history.visible_rows
+
+    def _table_size(self) -> int:
+        """Общее количество строк таблицы."""
+        return self._cold_rows_in_table() + len(self.view)
+
+    def _table_window(self, start: int, count: int) -> list:
+        """Возвращает строки таблицы с позиции `start`, подгружая холодную историю по запросу."""
+        cold = self._cold_rows_in_table()
+        rows = []
+        if start < cold:
+            rows = self.history.rows_range(start, min(count, cold - start))
+        return rows + self.view.window(max(0, start - cold), count - len(rows))
+
+    def _render_rows(self):
+        """Перерисовывает видимое окно строк таблицы."""
+        total = self._table_size()
+        self._top_row = max(0, min(self._top_row, total - self._visible_rows))
+        rows = self._table_window(self._top_row, self._visible_rows)
+
+        selection = self.tree.selection()
+        self.tree.delete(*self.tree.get_children())
+        self._visible = {}
+        for t in rows:
             row_type = 'Доход' if t.transaction_type == 'income' else 'Расход'
-            self.tree.insert('', 'end', values=(
+            self.tree.insert('', 'end', iid=t.id, values=(
                 row_type,
-                f'{t.amount:.2f}',
+                format_amount(t.amount, t.currency),
                 t.category,
-                t.date,
+                t.date.strftime('%Y-%m-%d'),
                 t.description
             ))
+            self._visible[t.id] = t
+        # Выделение сохраняется, пока строка остается в окне
+        kept = [iid for iid in selection if iid in self._visible]
+        if kept:
+            self.tree.selection_set(kept)
+
+        if total:
+            self.scrollbar.set(self._top_row / total, min(1.0, (self._top_row + len(rows)) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _scroll_rows(self, delta: int):
+        """Сдвигает окно таблицы на `delta` строк."""
+        self._top_row += delta
+        self._render_rows()
+
+    def _on_scroll(self, action, value, unit=None):
+        """Обрабатывает команды полосы прокрутки ('moveto' и 'scroll')."""
+        if action == 'moveto':
+            self._top_row = int(float(value) * self._table_size())
+        elif unit == 'pages':
+            self._top_row += int(value) * self._visible_rows
+        else:
+            self._top_row += int(value)
+        self._render_rows()
+
+    def _on_tree_resize(self, event):
+        """Пересчитывает число видимых строк при изменении размера таблицы."""
+        # Одна строка занята заголовками колонок
+        rows = max(1, event.height // ROW_HEIGHT - 1)
+        if rows != self._visible_rows:
+            self._visible_rows = rows
+            self._render_rows()
+
+    def sort_by(self, column: str):
+        """Сортирует таблицу по колонке; повторный щелчок меняет направление.
+
+        Перестановки строк вычисляются один раз для колонки и кэшируются
+        (см. :class:`SortedView`), поэтому повторная сортировка не трогает журнал.
+        Третий щелчок возвращает порядок журнала.
+
+        Args:
+            column (str): Колонка таблицы.
+        """
+        if self.view.column != column:
+            self.view.sort(column)
+        elif not self.view.descending:
+            self.view.sort(column, descending=True)
+        else:
+            self.view.sort(None)
+
+        for name, text in HEADINGS.items():
+            if name == self.view.column:
+                text += ' ▼' if self.view.descending else ' ▲'
+            self.tree.heading(name, text=text)
+        self._top_row = 0 if self.view.column is not None else self._table_size()
+        self._render_rows()
+
+    def _refresh_converter(self) -> bool:
+        """Перечитывает таблицу курсов, если файл изменился.
+
+        Returns:
+            bool: True, если содержимое таблицы курсов отличается от того,
+            по которому был построен куб агрегатов.
+        """
+        mtime = os.path.getmtime(RATES_FILE) if os.path.isfile(RATES_FILE) else None
+        if self.converter is not None and mtime == self._rates_mtime:
+            return False
+
+        rates = load_rates()
+        if self.converter is None:
+            self.converter = CurrencyConverter(rates)
+        else:
+            self.converter.set_rates(rates)
+        self._rates_mtime = mtime
+
+        digest = file_digest(RATES_FILE)
+        changed = digest != self._rates_digest
+        self._rates_digest = digest
+        return changed
+
+    def report_df(self, transactions=None, version=None):
+        """Готовит DataFrame операций с суммами, пересчитанными в базовую валюту.
+
+        Таблица курсов перечитывается из файла только при изменении его
+        времени модификации; если передана версия журнала, пересчитанные
+        суммы кэширует :class:`CurrencyConverter`.
+
+        Args:
+            transactions (list[Transaction], optional): Операции. По умолчанию
+                все операции приложения.
+            version (str, optional): Версия журнала, которой соответствуют
+                `transactions` (см. :meth:`_chart_version`).
+
+        Returns:
+            pd.DataFrame: Операции с суммами в :data:`models.BASE_CURRENCY`.
+
+        Raises:
+            ValueError: Если для пересчета не хватает курсов.
+        """
+        self._refresh_converter()
+        df = transactions_to_df(self.transactions if transactions is None else transactions)
+        return self.converter.convert(df, BASE_CURRENCY, version)
+
+    def report_cube(self, transactions=None, version=None):
+        """Возвращает куб агрегатов в базовой валюте, строя его при необходимости.
 
-        # Скролл вниз (к новой операции)
-        self.tree.yview_moveto(1.0)
+        Куб перестраивается целиком только при первом обращении и при смене
+        таблицы курсов; новые операции добавляются в него инкрементально.
+        Вызывается в потоке аналитики под блокировкой `_cube_lock`.
 
+        Args:
+            transactions (list[Transaction], optional): Операции для перестроения
+                куба. По умолчанию все операции приложения.
+            version (str, optional): Версия журнала для кэша пересчитанных сумм.
+
+        Returns:
+            AggregationCube: Куб агрегатов.
+
+        Raises:
+            ValueError: Если для пересчета не хватает курсов.
+        """
+        if self._refresh_converter() or self.cube is None:
+            if self.history is None:
+                self.cube = AggregationCube.from_df(self.report_df(transactions, version))
+            else:
+                # Агрегаты холодной истории объединяются с горячими строками
+                cube = self.history.cube(self._convert, self._rates_digest).copy()
+                cube.append_df(self.report_df(transactions, version))
+                self.cube = cube
+        return self.cube
+
+    def _convert(self, df):
+        """Пересчитывает таблицу операций в базовую валюту."""
+        return self.converter.convert(df, BASE_CURRENCY)
+
+    def _append_to_cube(self, transactions, removed=()):
+        """Дописывает новые операции в куб, если он уже построен.
+
+        Обновление выполняется в потоке аналитики после уже поставленных
+        в очередь задач, поэтому не блокирует интерфейс.
+
+        Args:
+            transactions (list[Transaction]): Добавляемые операции.
+            removed (list[Transaction], optional): Прежние версии измененных
+                и удаленные операции; вычитаются из куба.
+        """
+        def task():
+            with self._cube_lock:
+                if self.cube is None:
+                    return
+                try:
+                    if self._refresh_converter():
+                        self.cube = None    # курсы изменились — куб будет перестроен целиком
+                        return
+                    self.cube.remove_df(self.report_df(removed))
+                    self.cube.append_df(self.report_df(transactions))
+                except ValueError:
+                    self.cube = None    # нет курса — куб будет перестроен при построении графика
+
+        self._analytics.submit(task)
+
+    def _reset_cube(self):
+        """Сбрасывает куб агрегатов; он будет перестроен при следующем графике."""
+        def task():
+            with self._cube_lock:
+                self.cube = None
+
+        self._analytics.submit(task)
+
+    def _sync_ledger(self):
+        """Дочитывает из хранилища операции и изменения, записанные после последнего чтения.
+
+        Новые операции дописываются в куб агрегатов. Правки и удаления
+        применяются приращениями (см. :attr:`checkpoint.Ledger.delta`):
+        прежние версии строк вычитаются из куба, статистики необычных
+        расходов и счетчиков бюджетов, новые — добавляются; порядок таблицы
+        обновляется только по измененным строкам. Правки холодной истории
+        запоминаются без ее перечитывания; тогда куб и бюджеты пересчитываются
+        в потоке аналитики. Только после перезаписи файлов (уплотнение) журнал
+        читается заново.
+
+        В режиме холодной истории файл читается частями (:data:`LEDGER_CHUNK_BYTES`),
+        поэтому без контрольной точки в памяти не оказывается весь журнал.
+        """
+        max_bytes = LEDGER_CHUNK_BYTES if self.history is not None else None
+        appended = self.ledger.refresh(max_bytes)
+        delta = self.ledger.delta
+        rewritten = appended is None and delta is None and self.history is not None and self.history.rows
+        if rewritten or self.ledger.pending:
+            if rewritten:
+                # Файл переписан — холодная история строится заново
+                self.history.clear()
+                self.ledger = Ledger()
+                self.ledger.refresh(max_bytes)
+            self._read_ledger(max_bytes)
+            appended = delta = None     # производные структуры строятся заново
+        self.transactions = self.ledger.transactions
+        if delta is not None:
+            self.view.update(self.transactions, delta['deleted'], delta['edited'], delta['appended'])
+            cold_changes = self.history is not None and self.history.rows and delta['unmatched']
+            if cold_changes:
+                self._change_cold(delta['unmatched'])
+                self._reset_cube()
+            else:
+                self._append_to_cube(delta['added'] + delta['appended'], delta['removed'])
+            if self.anomalies is not None:
+                # Статистика строится только по горячим строкам
+                for t in delta['removed']:
+                    self.anomalies.remove(t)
+                for t in delta['added'] + delta['appended']:
+                    self.anomalies.update(t)
+            if self.budgets is not None:
+                if cold_changes:
+                    self._rebuild_budgets()
+                else:
+                    self._count_budget(delta['removed'], sign=-1)
+                    self._count_budget(delta['added'] + delta['appended'])
+        elif appended is None:
+            self._reset_cube()
+            self.view.reset(self.transactions)
+            if self.anomalies is not None:
+                self._refit_anomalies()
+            if self.budgets is not None:
+                self._rebuild_budgets()
+        elif appended:
+            self._append_to_cube(appended)
+            self.view.extend(appended)
+            if self.anomalies is not None:
+                for t in appended:
+                    self.anomalies.update(t)
+            if self.budgets is not None:
+                self._count_budget(appended)
+        if appended is None or appended:
+            self._schedule_prerender()
+
+    def _read_ledger(self, max_bytes: int):
+        """Дочитывает журнал частями, после каждой части перенося старые операции в архив.
+
+        Изменения, прочитанные с последней частью, применяются к горячим строкам
+        журналом, а к уже вынесенным — холодной историей.
+        """
+        while True:
+            delta = self.ledger.delta
+            if delta is not None and delta['unmatched'] and self.history.rows:
+                with self._cube_lock:
+                    self.history.apply_changes(delta['unmatched'])
+            self._evict_cold(wait=True)
+            if not self.ledger.pending:
+                return
+            self.ledger.refresh(max_bytes)
+
+    def _change_cold(self, changes: dict):
+        """Применяет правки операций холодной истории в потоке аналитики.
+
+        Куб холодной истории пересчитывается потоково при следующем графике;
+        таблица перерисовывается, когда правки записаны.
+        """
+        def compute():
+            with self._cube_lock:
+                self.history.apply_changes(changes)
+
+        self._run_background(compute, lambda result: self._render_rows())
+
+    def _refit_anomalies(self):
+        """Перестраивает статистику необычных расходов в потоке аналитики.
+
+        Пока она считается, проверка идет по прежней статистике. Операции,
+        дописанные за это время, учитываются при подмене.
+        """
+        self._anomaly_generation += 1
+        generation = self._anomaly_generation
+        transactions, count = self.transactions, len(self.transactions)
+
+        def compute():
+            detector = AnomalyDetector()
+            detector.fit(transactions_to_df(transactions[:count]))
+            return detector
+
+        def apply(detector):
+            if generation != self._anomaly_generation:
+                return      # запрошен более новый пересчет
+            if self.transactions is not transactions:
+                self._refit_anomalies()     # журнал заменен, пока шел пересчет
+                return
+            for t in transactions[count:]:
+                detector.update(t)
+            self.anomalies = detector
+
+        self._run_background(compute, apply)
+
+    def _run_background(self, compute, apply):
+        """Выполняет `compute` в потоке аналитики, а `apply(результат)` — в главном потоке.
+
+        Tkinter нельзя вызывать из других потоков, поэтому результат
+        передается через очередь, которую главный поток опрашивает по таймеру.
+        Ошибки вычисления выводятся в консоль, `apply` тогда не вызывается.
+        """
+        def task():
+            try:
+                self._background_results.put((apply, compute()))
+            except Exception as e:
+                print(f'Ошибка фоновой задачи: {e}')
+                self._background_results.put((None, None))
+
+        self._background_pending += 1
+        self._analytics.submit(task)
+        if not self._background_polling:
+            self._background_polling = True
+            self.root.after(ANALYTICS_POLL_MS, self._poll_background)
+
+    def _poll_background(self):
+        """Передает готовые результаты фоновых задач их обработчикам."""
+        while True:
+            try:
+                apply, result = self._background_results.get_nowait()
+            except queue.Empty:
+                break
+            self._background_pending -= 1
+            if apply is not None:
+                apply(result)
+        if self._background_pending:
+            self.root.after(ANALYTICS_POLL_MS, self._poll_background)
+        else:
+            self._background_polling = False
+
+    def _evict_cold(self, wait: bool = False):
+        """Переносит операции старше горячего окна в холодную историю.
+
+        Args:
+            wait (bool, optional): Ждать завершения текущей задачи аналитики,
+                а не откладывать перенос до следующей контрольной точки.
+        """
+        if self.history is None:
+            return
+        if not self._cube_lock.acquire(blocking=wait):
+            return
+        try:
+            if self._refresh_converter():
+                self.cube = None
+            hot = self.history.evict(self.ledger.transactions, hot_cutoff(self._hot_months),
+                                     self._convert, self._rates_digest)
+            if hot is not self.ledger.transactions:
+                self.ledger.transactions = hot
+                self.ledger.cold_rows = self.history.rows
+                self.transactions = hot
+                self.view.reset(hot)
+        except Exception as e:
+            print(f'Ошибка при переносе операций в холодную историю: {e}')
+        finally:
+            self._cube_lock.release()
+
+    def _checkpoint_key(self):
+        """Состояние, по которому определяется, нужна ли новая контрольная точка."""
+        return self.ledger.csv_offset, self.ledger.changes_offset, self.ledger.cold_rows, id(self.cube)
+
+    def save_checkpoint(self, wait: bool = False):
+        """Записывает контрольную точку, если состояние изменилось с прошлой записи.
+
+        Args:
+            wait (bool, optional): Ждать завершения текущей задачи аналитики,
+                а не пропускать запись.
+        """
+        key = self._checkpoint_key()
+        if key == self._checkpointed:
+            return
+        # Пока куб считается в потоке аналитики, запись откладывается до следующего раза
+        if not self._cube_lock.acquire(blocking=wait):
+            return
+        try:
+            self.ledger.save(self.cube, self._rates_digest)
+            self._checkpointed = self._checkpoint_key()
+        except Exception as e:
+            print(f'Ошибка при записи контрольной точки: {e}')
+        finally:
+            self._cube_lock.release()
+
+    def _watch_files(self):
+        """Подхватывает изменения файлов хранилища, сделанные другими программами.
+
+        Раз в :data:`WATCH_INTERVAL_MS` проверяются только метаданные файлов
+        (:class:`storage.FileWatcher`). Если файлы изменились, дочитываются
+        лишь дописанные байты; после усечения или перезаписи файла журнал
+        читается заново (см. :meth:`checkpoint.Ledger.refresh`). Если таблица
+        была прокручена к концу, она следует за новыми записями.
+        """
+        try:
+            if self.watcher.changed():
+                offsets = self.ledger.csv_offset, self.ledger.changes_offset
+                at_end = self._top_row + self._visible_rows >= self._table_size()
+                self._sync_ledger()
+                if offsets != (self.ledger.csv_offset, self.ledger.changes_offset):
+                    if at_end:
+                        self.refresh_transaction_table()
+                    else:
+                        self._render_rows()
+        except Exception as e:
+            print(f'Ошибка при проверке файлов данных: {e}')
+        self.root.after(WATCH_INTERVAL_MS, self._watch_files)
+
+    def _periodic_checkpoint(self):
+        """Периодически переносит старые операции в холодную историю и сохраняет контрольную точку."""
+        cold_rows = self.ledger.cold_rows
+        self._evict_cold()
+        if cold_rows != self.ledger.cold_rows:
+            self._render_rows()
+        self.save_checkpoint()
+        self.root.after(CHECKPOINT_INTERVAL_MS, self._periodic_checkpoint)
+
+    def on_close(self):
+        """Сохраняет контрольную точку и закрывает приложение."""
+        self._chart_generation += 1     # незавершенные графики больше не нужны
+        self._analytics.shutdown(wait=False, cancel_futures=True)
+        self.save_checkpoint(wait=True)
+        self.root.destroy()
+
+    def _chart_period(self):
+        """Возвращает выбранный период графиков или None для всей истории."""
+        period = self.period_var.get().strip()
+        return period or None
+
+    def _run_analytics(self, compute, show):
+        """Считает данные графика в потоке аналитики и отображает их в главном потоке.
+
+        Каждый запрос получает номер поколения; новый запрос отменяет
+        предыдущий, если тот еще не начал выполняться, а результаты
+        устаревших запросов отбрасываются. Пока запрос выполняется,
+        показывается индикатор занятости.
+
+        Args:
+            compute (Callable[[AggregationCube], Any]): Вычисление по кубу
+                агрегатов; выполняется в потоке аналитики.
+            show (Callable[[Any], None]): Отображение результата; выполняется
+                в главном потоке.
+        """
+        self._chart_generation += 1
+        generation = self._chart_generation
+        if self._chart_future is not None:
+            self._chart_future.cancel()
+
+        # Снимок списка: операции только дописываются в конец, так что
+        # первые `count` элементов не изменятся, пока считается график
+        transactions, count = self.transactions, len(self.transactions)
+        version = self._chart_version()
+
+        def task():
+            if generation != self._chart_generation:
+                return
+            try:
+                # Блокировка нужна только на время обновления куба: другие
+                # задачи с кубом выполняются в этом же потоке, а главный поток
+                # его только читает, поэтому график рисуется без блокировки
+                with self._cube_lock:
+                    cube = self._current_cube(transactions, count, version)
+                if generation != self._chart_generation:
+                    return
+                result = compute(cube)
+                self._analytics_results.put((generation, show, result, None))
+            except ValueError as e:
+                self._analytics_results.put((generation, show, None, e))
+            except Exception as e:
+                # Иначе ошибка осталась бы в Future и график молча не появился бы
+                print(f'Ошибка при построении графика: {e}')
+                self._analytics_results.put((generation, show, None, e))
+
+        self._chart_future = self._analytics.submit(task)
+        self.busy_bar.grid()
+        self.busy_bar.start(ANALYTICS_POLL_MS)
+        if not self._polling:
+            self._polling = True
+            self.root.after(ANALYTICS_POLL_MS, self._poll_analytics)
+
+    def _current_cube(self, transactions, count, version):
+        """Возвращает куб агрегатов для первых `count` операций списка.
+
+        Вызывается в потоке аналитики под блокировкой `_cube_lock`.
+        `version` — версия журнала, снятая в главном потоке вместе с `count`.
+        """
+        if self._refresh_converter():
+            self.cube = None
+        return self.report_cube(transactions[:count] if self.cube is None else None, version)
+
+    def _poll_analytics(self):
+        """Забирает готовые результаты аналитики (в главном потоке)."""
+        while True:
+            try:
+                generation, show, result, error = self._analytics_results.get_nowait()
+            except queue.Empty:
+                break
+            if generation != self._chart_generation:
+                continue    # результат устарел
+            self._polling = False
+            self.busy_bar.stop()
+            self.busy_bar.grid_remove()
+            if error is not None:
+                messagebox.showerror('Ошибка построения графика', str(error))
+            else:
+                show(result)
+            return
+
+        if self._chart_future.done() and self._analytics_results.empty():
+            self._polling = False
+            self.busy_bar.stop()
+            self.busy_bar.grid_remove()
+            return
+        self.root.after(ANALYTICS_POLL_MS, self._poll_analytics)
+
+    def _chart_version(self) -> str:
+        """Версия журнала для ключей кэша графиков."""
+        return ledger_version(self.ledger, file_digest(RATES_FILE))
+
+    def _show_chart(self, kind: str):
+        """Показывает график из кэша или отрисовывает его в потоке аналитики.
+
+        Args:
+            kind (str): Вид графика (см. :data:`charts.KINDS`).
+        """
+        period = self._chart_period()
+        key = chart_key(kind, period, self._chart_version())
+        image = self.charts.get(key)
+        if image is not None:
+            self._display_chart(kind, period, image)
+            return
+
+        def compute(cube):
+            image = render(cube, kind, period)
+            if image is not None:
+                self.charts.put(key, image)
+            return image
+
+        self._run_analytics(compute, lambda image: self._display_chart(kind, period, image))
+
+    def _display_chart(self, kind: str, period: str, image: bytes):
+        """Открывает окно с отрисованным графиком (в главном потоке)."""
+        if image is None:
+            messagebox.showinfo('График', 'Нет данных для графика')
+            return
+        window = tk.Toplevel(self.root)
+        title = {'expense': 'Расходы', 'income': 'Доходы', 'trend': 'Динамика'}[kind]
+        window.title(f'{title} ({period})' if period else title)
+        photo = tk.PhotoImage(master=window, data=base64.b64encode(image))
+        label = ttk.Label(window, image=photo)
+        label.image = photo     # ссылка, чтобы изображение не удалил сборщик мусора
+        label.pack()
+
+    def _schedule_prerender(self):
+        """Планирует фоновую отрисовку графиков после изменения журнала.
+
+        Серия изменений подряд (например, импорт) приводит к одной отрисовке.
+        """
+        if self._prerender_job is not None:
+            self.root.after_cancel(self._prerender_job)
+        self._prerender_job = self.root.after(PRERENDER_DELAY_MS, self._prerender)
+
+    def _prerender(self):
+        """Отрисовывает в потоке аналитики графики выбранного периода, которых нет в кэше."""
+        self._prerender_job = None
+        period = self._chart_period()
+        version = self._chart_version()
+        transactions, count = self.transactions, len(self.transactions)
+
+        for kind in ('expense', 'income', 'trend'):
+            key = chart_key(kind, period, version)
+            if key in self.charts:
+                continue
+
+            def task(kind=kind, key=key):
+                try:
+                    with self._cube_lock:
+                        cube = self._current_cube(transactions, count, version)
+                    image = render(cube, kind, period)
+                    if image is not None:
+                        self.charts.put(key, image)
+                except ValueError:
+                    pass    # нет курса — ошибка будет показана при запросе графика
+                except Exception as e:
+                    print(f'Ошибка при фоновой отрисовке графика: {e}')
+
+            self._analytics.submit(task)
+
+    @traced('gui.expense_dia', rows=lambda result, self: len(self.transactions))
     def expense_dia(self):
         """Обработчик события: генерирует и отображает круговую диаграмму расходов.
 
-        Метод подготавливает данные, конвертируя текущий список транзакций 
-        в формат DataFrame, и инициирует построение графика распределения 
-        расходов по категориям.
+        Суммы по категориям за выбранный период берутся из куба агрегатов
+        (в базовой валюте); готовое изображение берется из кэша графиков,
+        а при промахе отрисовывается в потоке аналитики.
         """
-        df = transactions_to_df(self.transactions)
-
-        # Круговая диаграмма расходов
-        plot_pie_by_category(df, 'expense')
+        self._show_chart('expense')
 
+    @traced('gui.income_dia', rows=lambda result, self: len(self.transactions))
     def income_dia(self):
         """Обработчик события: генерирует и отображает круговую диаграмму доходов.
 
-        Метод подготавливает данные, конвертируя текущий список транзакций 
-        в формат DataFrame, и инициирует построение графика распределения 
-        доходов по категориям.
+        Суммы по категориям за выбранный период берутся из куба агрегатов
+        (в базовой валюте); готовое изображение берется из кэша графиков,
+        а при промахе отрисовывается в потоке аналитики.
         """
-        df = transactions_to_df(self.transactions)
-
-        # Круговая диаграмма доходов
-        plot_pie_by_category(df, 'income')
+        self._show_chart('income')
 
+    @traced('gui.cashflow_trends', rows=lambda result, self: len(self.transactions))
     def cashflow_trends(self):
         """Обработчик события: формирует и отображает график динамики денежных потоков.
 
-        Метод преобразует текущую историю транзакций в формат временного ряда 
-        и визуализирует тренды доходов и расходов. Это позволяет пользователю 
-        проанализировать финансовую активность в хронологическом порядке.
+        Ряд доходов и расходов строится из куба агрегатов: по дням для
+        выбранного месяца или дня и по месяцам для года или всей истории.
+        Готовое изображение берется из кэша графиков.
+        """
+        self._show_chart('trend')
+
+    def _refresh_budget_rates(self) -> bool:
+        """Перечитывает таблицу курсов для бюджетов, если файл изменился.
+
+        У счетчиков бюджетов свой конвертер валют: они обновляются в главном
+        потоке и не должны делить состояние с потоком аналитики.
+
+        Returns:
+            bool: True, если курсы были перечитаны.
+        """
+        mtime = os.path.getmtime(RATES_FILE) if os.path.isfile(RATES_FILE) else None
+        if self._budget_converter is not None and mtime == self._budget_rates_mtime:
+            return False
+        self._budget_converter = CurrencyConverter(load_rates())
+        self._budget_rates_mtime = mtime
+        return True
+
+    def _budget_convert(self, df):
+        """Пересчитывает таблицу операций в базовую валюту для счетчиков бюджетов."""
+        return self._budget_converter.convert(df, BASE_CURRENCY)
+
+    def _rebuild_budgets(self):
+        """Пересчитывает счетчики бюджетов по всему журналу в потоке аналитики.
+
+        Новые счетчики строятся векторно по снимку журнала (холодная история —
+        по кубу агрегатов, без чтения архива строк) со своим конвертером валют
+        и подменяют прежние в главном потоке. Пока идет пересчет, лимиты
+        проверяются по прежним счетчикам; операции, дописанные за это время,
+        учитываются при подмене.
+        """
+        self._budget_generation += 1
+        generation = self._budget_generation
+        transactions, count = self.transactions, len(self.transactions)
+
+        def compute():
+            mtime = os.path.getmtime(RATES_FILE) if os.path.isfile(RATES_FILE) else None
+            converter = CurrencyConverter(load_rates())
+
+            def convert(df):
+                return converter.convert(df, BASE_CURRENCY)
+
+            tracker = BudgetTracker()
+            try:
+                tracker.rebuild(convert(transactions_to_df(transactions[:count])))
+                if self.history is not None and self.history.rows:
+                    with self._cube_lock:
+                        tracker.add_cube(self.history.cube(convert, file_digest(RATES_FILE)))
+            except ValueError as e:
+                print(f'Ошибка при пересчете бюджетов: {e}')
+                return None
+            return tracker, converter, mtime
+
+        def apply(result):
+            if result is None or generation != self._budget_generation:
+                return
+            if self.transactions is not transactions:
+                self._rebuild_budgets()     # журнал заменен, пока шел пересчет
+                return
+            tracker, self._budget_converter, self._budget_rates_mtime = result
+            tracker.limits = self.budgets.limits
+            self.budgets = tracker
+            self._count_budget(transactions[count:])
+
+        self._run_background(compute, apply)
+
+    def _count_budget(self, transactions, sign: int = 1):
+        """Учитывает новые операции в счетчиках бюджетов.
+
+        Расходы в базовой валюте учитываются поштучно за O(1); остальные
+        пересчитываются по курсам одной таблицей.
+
+        Args:
+            transactions (list[Transaction]): Операции.
+            sign (int, optional): -1, чтобы вычесть операции из счетчиков
+                (прежние версии измененных и удаленные операции).
+        """
+        if self._refresh_budget_rates():
+            self._rebuild_budgets()     # курсы изменились — пересчитываем все траты
+            return
+        foreign = []
+        for t in transactions:
+            if t.transaction_type != 'expense':
+                continue
+            if t.currency == BASE_CURRENCY:
+                self.budgets.add(t.category, sign * t.amount, t.date)
+            else:
+                foreign.append(t)
+        if foreign:
+            try:
+                df = self._budget_convert(transactions_to_df(foreign))
+                self.budgets.add_df(df.assign(amount=df['amount'] * sign))
+            except ValueError as e:
+                print(f'Ошибка при учете бюджетов: {e}')
+
+    def _check_budget(self, transaction) -> list:
+        """Проверяет расход по лимитам бюджетов до записи (см. :meth:`BudgetTracker.check`)."""
+        if transaction.transaction_type != 'expense':
+            return []
+        amount = transaction.amount
+        if transaction.currency != BASE_CURRENCY:
+            self._refresh_budget_rates()
+            try:
+                amount = int(self._budget_convert(transactions_to_df([transaction]))['amount'].iloc[0])
+            except ValueError:
+                return []   # нет курса — проверка лимитов невозможна
+        return self.budgets.check(transaction.category, amount, transaction.date)
+
+    def show_budget_panel(self):
+        """Открывает окно бюджетов: лимиты по категориям и фактические траты.
+
+        Таблица строится по счетчикам :class:`budget.BudgetTracker` за
+        текущие неделю, месяц и год и обновляется раз в секунду. Форма
+        под таблицей задает или удаляет лимит; лимиты сохраняются
+        в `data/budgets.csv`.
+        """
+        if self.budget_window is not None and self.budget_window.winfo_exists():
+            self.budget_window.lift()
+            return
+
+        self.budget_window = tk.Toplevel(self.root)
+        self.budget_window.title('Бюджеты')
+        self.budget_window.geometry('640x360')
+
+        columns = ('category', 'period', 'limit', 'spent', 'remaining', 'ratio')
+        self.budget_tree = ttk.Treeview(self.budget_window, columns=columns, show='headings')
+        for column, text, width in (('category', 'Категория', 150), ('period', 'Период', 110),
+                                    ('limit', 'Лимит', 90), ('spent', 'Потрачено', 90),
+                                    ('remaining', 'Остаток', 90), ('ratio', '%', 60)):
+            self.budget_tree.heading(column, text=text)
+            self.budget_tree.column(column, width=width, anchor='w' if column in ('category', 'period') else 'e')
+        self.budget_tree.pack(fill='both', expand=True, padx=10, pady=(10, 5))
+
+        form = ttk.Frame(self.budget_window)
+        form.pack(fill='x', padx=10, pady=(0, 10))
+        ttk.Label(form, text='Категория:').pack(side='left')
+        self.budget_category_var = tk.StringVar()
+        ttk.Entry(form, textvariable=self.budget_category_var, width=15).pack(side='left', padx=5)
+        self.budget_period_var = tk.StringVar(value='month')
+        ttk.Combobox(form, textvariable=self.budget_period_var, values=PERIODS, width=7,
+                     state='readonly').pack(side='left', padx=5)
+        ttk.Label(form, text='Лимит:').pack(side='left')
+        self.budget_limit_var = tk.StringVar()
+        ttk.Entry(form, textvariable=self.budget_limit_var, width=10).pack(side='left', padx=5)
+        ttk.Button(form, text=' Сохранить', command=self.set_budget).pack(side='left', padx=5)
+        ttk.Button(form, text=' Удалить', command=self.remove_budget).pack(side='left', padx=5)
+
+        self._refresh_budget_panel()
+
+    def _refresh_budget_panel(self):
+        """Перерисовывает таблицу бюджетов и планирует следующее обновление."""
+        if self.budget_window is None or not self.budget_window.winfo_exists():
+            self.budget_window = None
+            return
+
+        selection = self.budget_tree.selection()
+        self.budget_tree.delete(*self.budget_tree.get_children())
+        for row in self.budgets.report().itertuples(index=False):
+            self.budget_tree.insert('', 'end', iid=f'{row.category}\t{row.period}', values=(
+                row.category,
+                f'{PERIOD_NAMES[row.period]} {row.key}',
+                format_amount(row.limit, BASE_CURRENCY),
+                format_amount(row.spent, BASE_CURRENCY),
+                format_amount(row.remaining, BASE_CURRENCY),
+                f'{row.ratio:.0%}',
+            ))
+        kept = [iid for iid in selection if self.budget_tree.exists(iid)]
+        if kept:
+            self.budget_tree.selection_set(kept)
+
+        self.budget_window.after(1000, self._refresh_budget_panel)
+
+    def set_budget(self):
+        """Задает лимит из формы окна бюджетов и сохраняет лимиты в файл."""
+        try:
+            category = validate_category(self.budget_category_var.get())
+            period = validate_period(self.budget_period_var.get())
+            self.budgets.set_limit(category, period, validate_amount(self.budget_limit_var.get()))
+            save_budgets(self.budgets.limits)
+            self.budget_limit_var.set('')
+        except Exception as e:
+            messagebox.showerror('Бюджеты', f'Не удалось сохранить лимит:\n{e}', parent=self.budget_window)
+
+    def remove_budget(self):
+        """Удаляет лимиты, выбранные в таблице окна бюджетов."""
+        selection = self.budget_tree.selection()
+        if not selection:
+            messagebox.showwarning('Бюджеты', 'Выберите лимит в таблице', parent=self.budget_window)
+            return
+        try:
+            for iid in selection:
+                self.budgets.remove_limit(*iid.split('\t'))
+            save_budgets(self.budgets.limits)
+        except Exception as e:
+            messagebox.showerror('Бюджеты', f'Не удалось удалить лимит:\n{e}', parent=self.budget_window)
+
+    def show_debug_panel(self):
+        """Открывает отладочную панель с последними замерами горячих путей.
+
+        При открытии панели включается сбор замеров (см. :mod:`instrumentation`);
+        при закрытии он выключается, если до открытия панели был выключен.
+        Таблица показывает для каждого участка длительность последнего вызова
+        и количество обработанных строк и обновляется раз в полсекунды.
+        Кнопка экспорта сохраняет замеры в формате Chrome trace-event JSON.
+        """
+        if self.debug_window is not None and self.debug_window.winfo_exists():
+            self.debug_window.lift()
+            return
+
+        enabled_here = not instrumentation.is_enabled()
+        if enabled_here:
+            instrumentation.enable()
+
+        self.debug_window = tk.Toplevel(self.root)
+        self.debug_window.title('Отладка: замеры')
+        self.debug_window.geometry('520x300')
+        self.debug_window.protocol('WM_DELETE_WINDOW', lambda: self._close_debug_panel(enabled_here))
+
+        columns = ('name', 'ms', 'rows')
+        self.debug_tree = ttk.Treeview(self.debug_window, columns=columns, show='headings')
+        self.debug_tree.heading('name', text='Участок')
+        self.debug_tree.heading('ms', text='Время (мс)')
+        self.debug_tree.heading('rows', text='Строк')
+        self.debug_tree.column('name', width=280)
+        self.debug_tree.column('ms', width=100, anchor='e')
+        self.debug_tree.column('rows', width=100, anchor='e')
+        self.debug_tree.pack(fill='both', expand=True, padx=10, pady=(10, 5))
+
+        export_btn = ttk.Button(self.debug_window, text=' Экспорт trace', command=self.export_trace)
+        export_btn.pack(pady=(0, 10))
+
+        self._refresh_debug_panel()
+
+    def _close_debug_panel(self, disable: bool):
+        """Закрывает отладочную панель.
+
+        Args:
+            disable (bool): Выключить сбор замеров (он был включен панелью).
         """
-        df = transactions_to_df(self.transactions)
+        if disable:
+            instrumentation.disable()
+        self.debug_window.destroy()
+        self.debug_window = None
+
+    def _refresh_debug_panel(self):
+        """Перерисовывает таблицу отладочной панели и планирует следующее обновление."""
+        if self.debug_window is None or not self.debug_window.winfo_exists():
+            self.debug_window = None
+            return
+
+        for item in self.debug_tree.get_children():
+            self.debug_tree.delete(item)
+        for name, span in sorted(instrumentation.latest_by_name().items()):
+            self.debug_tree.insert('', 'end', values=(
+                name,
+                f"{span['duration'] * 1000:.2f}",
+                '' if span['rows'] is None else span['rows']
+            ))
+
+        self.debug_window.after(500, self._refresh_debug_panel)
 
-        # Динамика доходов и расходов по времени
-        plot_income_expence_over_time(df)
+    def export_trace(self):
+        """Сохраняет накопленные замеры в файл Chrome trace-event JSON."""
+        path = filedialog.asksaveasfilename(
+            parent=self.debug_window,
+            defaultextension='.json',
+            filetypes=[('Chrome trace', '*.json')]
+        )
+        if path:
+            instrumentation.export_chrome_trace(path)
 
 
 # === Точка входа для запуска GUI ===
@@ -0,0 +1,311 @@
+import os
+import datetime
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import storage
+from blockstore import BlockWriter, BlockReader
+from checkpoint import read_checkpoint, write_checkpoint, VERSION
+from cube import AggregationCube
+from analysis import transactions_to_df
+from models import TransactionColumns
+from instrumentation import traced
+
+
+# Сколько последних месяцев хранится в памяти целиком (горячее окно)
+HOT_MONTHS = 12
+
+# Бюджет подгруженных из холодной истории строк по умолчанию
+PAGE_BUDGET_ROWS = 100_000
+
+
+def hot_cutoff(months: int = HOT_MONTHS, today: datetime.date = None) -> datetime.datetime:
+    """Возвращает начало горячего окна: первый день месяца `months - 1` месяцев назад.
+
+    Окно выравнивается по началу месяца, чтобы месячные агрегаты холодной
+    и горячей частей не пересекались.
+
+    Args:
+        months (int, optional): Длина горячего окна в месяцах.
+        today (datetime.date, optional): Текущая дата. По умолчанию — сегодня.
+
+    Returns:
+        datetime.datetime: Операции раньше этой даты относятся к холодной истории.
+    """
+    today = today or datetime.date.today()
+    first = pd.Period(today, freq='M') - (months - 1)
+    return first.start_time.to_pydatetime()
+
+
+class ColdHistory:
+    """Холодная часть журнала: сжатый блочный архив строк и куб агрегатов.
+
+    Операции старше горячего окна переносятся из памяти в блочный архив
+    (:class:`blockstore.BlockWriter`), а их суммы — в куб агрегатов,
+    который хранится на диске рядом с архивом. Графики строятся по кубу
+    холодной части, объединенному с горячими строками, поэтому результат
+    не зависит от того, где лежат операции. Сами строки холодной истории
+    подгружаются поблочно только по запросу (прокрутка таблицы назад,
+    выборка за период); подгруженные блоки хранятся в LRU-кэше, общий
+    объем которого ограничен бюджетом строк.
+
+    Архив только дописывается. Правки и удаления вынесенных операций
+    хранятся отдельно (:attr:`changes`) и применяются к строкам при чтении
+    и к кубу при его потоковом пересчете, поэтому правка старой операции
+    не требует ни переписывать архив, ни загружать историю в память.
+
+    Attributes:
+        rows (int): Количество строк в архиве (с учетом удаленных).
+        visible_rows (int): Количество неудаленных строк архива.
+        cutoff (datetime.datetime): Граница: все операции раньше нее вынесены в архив.
+        budget_rows (int): Бюджет подгруженных строк.
+        rates_digest (str): Хеш таблицы курсов, по которой посчитан куб.
+        changes (dict): Изменения строк архива в формате :func:`storage.apply_changes`.
+    """
+
+    def __init__(self, directory: str = None, budget_rows: int = PAGE_BUDGET_ROWS):
+        """Открывает холодную историю в директории данных.
+
+        Если состояние на диске повреждено или не соответствует архиву,
+        холодная история очищается.
+
+        Args:
+            directory (str, optional): Директория файлов. По умолчанию `storage.DATA_DIR`.
+            budget_rows (int, optional): Бюджет подгруженных строк.
+        """
+        directory = directory or storage.DATA_DIR
+        self.archive_path = os.path.join(directory, 'cold.fpb')
+        self.state_path = os.path.join(directory, 'cold.bin')
+        self.budget_rows = budget_rows
+        self._pages = OrderedDict()
+        self._paged_rows = 0
+
+        self.rows = 0
+        self.cutoff = None
+        self.rates_digest = None
+        self.changes = {}
+        # Сколько строк каждого блока архива удалено: {номер блока: количество}
+        self._deleted = {}
+        self._cube = None
+        self._reader = None
+
+        try:
+            state = read_checkpoint(self.state_path)
+            if state is not None and os.path.isfile(self.archive_path):
+                self._reader = BlockReader(self.archive_path)
+                if self._reader.rows == state['rows']:
+                    self.rows = state['rows']
+                    self.cutoff = state['cutoff']
+                    self.rates_digest = state['rates_digest']
+                    self._cube = state['cube']
+                    self.changes = state.get('changes', {})
+                    self._deleted = state.get('deleted', {})
+                    return
+        except Exception as e:
+            print(f'Ошибка при чтении холодной истории: {e}')
+        self.clear()
+
+    def clear(self):
+        """Удаляет архив и агрегаты холодной истории."""
+        for path in (self.archive_path, self.state_path):
+            if os.path.isfile(path):
+                os.remove(path)
+        self.rows = 0
+        self.cutoff = None
+        self.rates_digest = None
+        self.changes = {}
+        self._deleted = {}
+        self._cube = None
+        self._reader = None
+        self._pages.clear()
+        self._paged_rows = 0
+
+    def _save_state(self):
+        """Атомарно записывает агрегаты и сведения об архиве."""
+        write_checkpoint({
+            'version': VERSION,
+            'rows': self.rows,
+            'cutoff': self.cutoff,
+            'cube': self._cube,
+            'rates_digest': self.rates_digest,
+            'changes': self.changes,
+            'deleted': self._deleted,
+        }, self.state_path)
+
+    @property
+    def visible_rows(self) -> int:
+        """Количество строк архива без удаленных операций."""
+        return self.rows - sum(self._deleted.values())
+
+    def apply_changes(self, changes: dict):
+        """Запоминает правки и удаления операций холодной истории.
+
+        Куб агрегатов будет пересчитан потоково при следующем обращении
+        (:meth:`cube`); строки архива не переписываются. Для новых удалений
+        архив просматривается поблочно (до первого блока, после которого все
+        удаленные строки найдены), чтобы знать, сколько строк осталось в
+        каждом блоке.
+
+        Args:
+            changes (dict): Изменения операций, которых нет в горячем окне
+                (см. :attr:`checkpoint.Ledger.delta`).
+        """
+        if not changes or not self.rows:
+            return
+        removed = {key for key, (op, _) in changes.items()
+                   if op == 'delete' and self.changes.get(key, ('edit',))[0] != 'delete'}
+        deleted = dict(self._deleted)
+        for index in range(len(self._reader.blocks) if removed else 0):
+            rows = self._pages.get(index) or self._reader.read_block(index)
+            found = {t.id for t in rows if t.id in removed}
+            if found:
+                deleted[index] = deleted.get(index, 0) + len(found)
+                removed -= found
+                if not removed:
+                    break
+        # Правки и счетчики подменяются вместе: таблица читает их из главного потока
+        self.changes = {**self.changes, **changes}
+        self._deleted = deleted
+        self._cube = None
+        self._save_state()
+
+    @traced('history.evict', rows=lambda result, self, *args, **kwargs: self.rows)
+    def evict(self, transactions: list, cutoff: datetime.datetime, convert, rates_digest: str) -> list:
+        """Переносит операции раньше границы в архив и агрегаты холодной истории.
+
+        Args:
+            transactions (list[Transaction]): Операции в памяти.
+            cutoff (datetime.datetime): Начало горячего окна.
+            convert (Callable[[pd.DataFrame], pd.DataFrame]): Пересчет таблицы
+                операций в базовую валюту (см. :meth:`analysis.CurrencyConverter.convert`).
+            rates_digest (str): Хеш таблицы курсов, используемой `convert`.
+
+        Returns:
+            list[Transaction]: Операции горячего окна. Если переносить нечего,
+            возвращается исходный список.
+        """
+        if isinstance(transactions, TransactionColumns):
+            is_cold = transactions.column('date') < np.datetime64(cutoff, 'us')
+            if not is_cold.any():
+                return transactions
+            cold, hot = transactions.compress(is_cold), transactions.compress(~is_cold)
+        else:
+            cold = [t for t in transactions if t.date < cutoff]
+            if not cold:
+                return transactions
+            hot = [t for t in transactions if t.date >= cutoff]
+
+        storage.ensure_data_dir()
+        with BlockWriter(self.archive_path) as writer:
+            writer.write(cold)
+        self._reader = BlockReader(self.archive_path)
+        self.rows += len(cold)
+        self.cutoff = max(cutoff, self.cutoff) if self.cutoff else cutoff
+
+        if self._cube is not None and rates_digest == self.rates_digest:
+            try:
+                self._cube.append_df(convert(transactions_to_df(cold)))
+            except ValueError:
+                self._cube = None   # нет курса — агрегаты будут пересчитаны по архиву
+        else:
+            self._cube = None
+        self._save_state()
+        return hot
+
+    @traced('history.cube', rows=lambda result, self, *args, **kwargs: self.rows)
+    def cube(self, convert, rates_digest: str) -> AggregationCube:
+        """Возвращает куб агрегатов холодной истории в базовой валюте.
+
+        Если куба нет или он посчитан по другой таблице курсов, он
+        пересчитывается потоково, по одному блоку архива (без LRU-кэша
+        и без загрузки всей истории в память).
+
+        Args:
+            convert (Callable[[pd.DataFrame], pd.DataFrame]): Пересчет в базовую валюту.
+            rates_digest (str): Хеш таблицы курсов, используемой `convert`.
+
+        Returns:
+            AggregationCube: Куб агрегатов (не изменяйте его; для объединения
+            с горячими строками используйте :meth:`AggregationCube.copy`).
+
+        Raises:
+            ValueError: Если для пересчета не хватает курсов.
+        """
+        if self._cube is None or rates_digest != self.rates_digest:
+            cube = AggregationCube()
+            if self._reader is not None:
+                for index in range(len(self._reader.blocks)):
+                    rows = storage.apply_changes(self._reader.read_block(index), self.changes)
+                    cube.append_df(convert(transactions_to_df(rows)))
+            self._cube = cube
+            self.rates_digest = rates_digest
+            self._save_state()
+        return self._cube
+
+    def _page(self, index: int) -> list:
+        """Возвращает строки блока архива, подгружая его в LRU-кэш."""
+        if index in self._pages:
+            self._pages.move_to_end(index)
+            return self._pages[index]
+
+        rows = self._reader.read_block(index)
+        self._pages[index] = rows
+        self._paged_rows += len(rows)
+        # Вытесняем давно не использованные блоки, оставляя хотя бы текущий
+        while self._paged_rows > self.budget_rows and len(self._pages) > 1:
+            _, evicted = self._pages.popitem(last=False)
+            self._paged_rows -= len(evicted)
+        return rows
+
+    @property
+    def paged_rows(self) -> int:
+        """Сколько строк холодной истории сейчас подгружено в память."""
+        return self._paged_rows
+
+    def rows_range(self, start: int, count: int) -> list:
+        """Возвращает строки холодной истории по позиции среди неудаленных строк.
+
+        Args:
+            start (int): Позиция первой строки (от 0 до :attr:`visible_rows`).
+            count (int): Количество строк.
+
+        Returns:
+            list[Transaction]: Строки в порядке архива с примененными правками;
+            удаленные операции не показываются и не занимают позиций.
+        """
+        result = []
+        first = 0
+        stop = min(start + count, self.visible_rows)
+        changes, deleted = self.changes, self._deleted
+        for index, block in enumerate(self._reader.blocks if self._reader else []):
+            last = first + block['rows'] - deleted.get(index, 0)
+            if last > start and first < stop:
+                rows = storage.apply_changes(self._page(index), changes)
+                result.extend(rows[max(0, start - first):stop - first])
+            if last >= stop:
+                break
+            first = last
+        return result
+
+    def read(self, start: str = None, end: str = None) -> list:
+        """Возвращает операции холодной истории за период.
+
+        Подгружаются только блоки, диапазон дат которых пересекается с периодом
+        (по датам строк в архиве, без учета правок).
+
+        Args:
+            start (str, optional): Начальная дата 'YYYY-MM-DD' включительно.
+            end (str, optional): Конечная дата 'YYYY-MM-DD' включительно.
+
+        Returns:
+            list[Transaction]: Операции в порядке архива.
+        """
+        result = []
+        for index, block in enumerate(self._reader.blocks if self._reader else []):
+            if (start is not None and block['max_date'] < start) or (end is not None and block['min_date'] > end):
+                continue
+            for t in storage.apply_changes(self._page(index), self.changes):
+                day = t.date.strftime('%Y-%m-%d')
+                if (start is None or day >= start) and (end is None or day <= end):
+                    result.append(t)
+        return result
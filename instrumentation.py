@@ -0,0 +1,198 @@
+import os
+import json
+import time
+import logging
+import threading
+import functools
+import contextlib
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+
+# Журнал для ротируемого лога замеров
+logger = logging.getLogger('financial_planner.spans')
+
+# Состояние подсистемы: выключена по умолчанию
+_enabled = False
+_spans = deque(maxlen=10000)
+_lock = threading.Lock()
+_log_handler = None
+
+
+def is_enabled() -> bool:
+    """Возвращает True, если сбор замеров включен."""
+    return _enabled
+
+
+def enable(log_path: str = None, max_bytes: int = 1024 * 1024, backup_count: int = 3, capacity: int = 10000):
+    """Включает сбор замеров (spans).
+
+    Args:
+        log_path (str, optional): Путь к ротируемому лог-файлу. Если не задан,
+            замеры хранятся только в памяти.
+        max_bytes (int, optional): Размер лог-файла, после которого начинается новый.
+        backup_count (int, optional): Количество хранимых старых лог-файлов.
+        capacity (int, optional): Сколько последних замеров хранить в памяти.
+    """
+    global _enabled, _spans, _log_handler
+    with _lock:
+        if _spans.maxlen != capacity:
+            _spans = deque(_spans, maxlen=capacity)
+        if log_path and _log_handler is None:
+            directory = os.path.dirname(log_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            _log_handler = RotatingFileHandler(log_path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+            _log_handler.setFormatter(logging.Formatter('%(message)s'))
+            logger.addHandler(_log_handler)
+            logger.setLevel(logging.INFO)
+        _enabled = True
+
+
+def disable():
+    """Выключает сбор замеров и закрывает лог-файл."""
+    global _enabled, _log_handler
+    with _lock:
+        _enabled = False
+        if _log_handler is not None:
+            logger.removeHandler(_log_handler)
+            _log_handler.close()
+            _log_handler = None
+
+
+def clear():
+    """Удаляет накопленные в памяти замеры."""
+    with _lock:
+        _spans.clear()
+
+
+def _record(name: str, started: float, duration: float, rows):
+    """Сохраняет завершенный замер в памяти и, при необходимости, в лог."""
+    span = {
+        'name': name,
+        'start': started,
+        'duration': duration,
+        'rows': rows,
+        'thread': threading.get_ident(),
+    }
+    with _lock:
+        _spans.append(span)
+    if _log_handler is not None:
+        logger.info(json.dumps(span, ensure_ascii=False))
+
+
+@contextlib.contextmanager
+def span(name: str, rows: int = None):
+    """Контекстный менеджер, замеряющий длительность блока кода.
+
+    Количество обработанных строк можно указать сразу или позже,
+    записав его в ключ 'rows' возвращаемого словаря.
+
+    Args:
+        name (str): Название замера, например 'analysis.group_by_category'.
+        rows (int, optional): Количество обработанных строк.
+
+    Yields:
+        dict: Изменяемый контекст замера.
+
+    Example:
+        >>> with span('import.parse') as ctx:
+        ...     ctx['rows'] = len(parse_file())
+    """
+    ctx = {'rows': rows}
+    if not _enabled:
+        yield ctx
+        return
+    started = time.time()
+    counter = time.perf_counter()
+    try:
+        yield ctx
+    finally:
+        _record(name, started, time.perf_counter() - counter, ctx['rows'])
+
+
+def traced(name: str, rows=None):
+    """Декоратор, оборачивающий функцию в замер :func:`span`.
+
+    Когда сбор выключен, накладные расходы сводятся к проверке одного флага.
+
+    Args:
+        name (str): Название замера.
+        rows (callable, optional): Функция ``rows(result, *args, **kwargs)``,
+            возвращающая количество обработанных строк.
+
+    Returns:
+        callable: Декоратор.
+
+    Example:
+        >>> @traced('storage.load_transactions', rows=lambda result: len(result))
+        ... def load_transactions(): ...
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            started = time.time()
+            counter = time.perf_counter()
+            result = None
+            try:
+                result = func(*args, **kwargs)
+                return result
+            finally:
+                duration = time.perf_counter() - counter
+                count = None
+                if rows is not None:
+                    try:
+                        count = rows(result, *args, **kwargs)
+                    except Exception:
+                        count = None
+                _record(name, started, duration, count)
+        return wrapper
+    return decorator
+
+
+def latest_spans(limit: int = None) -> list:
+    """Возвращает последние замеры (от старых к новым).
+
+    Args:
+        limit (int, optional): Максимальное количество замеров.
+
+    Returns:
+        list[dict]: Замеры с ключами 'name', 'start', 'duration', 'rows', 'thread'.
+    """
+    with _lock:
+        spans = list(_spans)
+    return spans[-limit:] if limit else spans
+
+
+def latest_by_name() -> dict:
+    """Возвращает последний замер для каждого названия."""
+    result = {}
+    for s in latest_spans():
+        result[s['name']] = s
+    return result
+
+
+def export_chrome_trace(path: str):
+    """Сохраняет накопленные замеры в формате Chrome trace-event JSON.
+
+    Файл открывается в ``chrome://tracing`` или https://ui.perfetto.dev.
+
+    Args:
+        path (str): Путь к создаваемому файлу.
+    """
+    events = [
+        {
+            'name': s['name'],
+            'ph': 'X',
+            'ts': int(s['start'] * 1_000_000),
+            'dur': int(s['duration'] * 1_000_000),
+            'pid': os.getpid(),
+            'tid': s['thread'],
+            'args': {'rows': s['rows']} if s['rows'] is not None else {},
+        }
+        for s in latest_spans()
+    ]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
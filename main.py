@@ -1,7 +1,28 @@
+import os
 import tkinter as tk
+import instrumentation
 from gui import FinancialPlannerApp
 
 if __name__ == "__main__":
+    # FINPLANNER_TRACE=<путь к логу> включает замеры с записью в ротируемый лог
+    trace_log = os.environ.get('FINPLANNER_TRACE')
+    if trace_log:
+        instrumentation.enable(log_path=trace_log)
+
+    # FINPLANNER_HOT_MONTHS=<месяцев> включает режим ограниченной памяти:
+    # в памяти только последние месяцы, остальная история — на диске
+    options = {}
+    hot_months = os.environ.get('FINPLANNER_HOT_MONTHS')
+    if hot_months:
+        options['hot_months'] = int(hot_months)
+    page_budget = os.environ.get('FINPLANNER_PAGE_BUDGET')
+    if page_budget:
+        options['page_budget'] = int(page_budget)
+    # FINPLANNER_CHART_CACHE=<директория> сохраняет отрисованные графики на диск
+    chart_cache = os.environ.get('FINPLANNER_CHART_CACHE')
+    if chart_cache:
+        options['chart_cache_dir'] = chart_cache
+
     root = tk.Tk()
-    app = FinancialPlannerApp(root)
+    app = FinancialPlannerApp(root, **options)
     root.mainloop()
\ No newline at end of file
@@ -1,4 +1,18 @@
+import uuid
+import numbers
 import datetime
+from collections.abc import Sequence
+import numpy as np
+
+
+# Базовая валюта учета: в ней выражены курсы из таблицы курсов
+BASE_CURRENCY = 'RUB'
+
+# Поля операции в порядке аргументов :meth:`Transaction.from_trusted`
+FIELDS = ('amount', 'category', 'date', 'description', 'transaction_type', 'currency', 'id')
+
+# По сколько строк столбцы переводятся в объекты Python при обходе
+_ITER_ROWS = 65536
 
 
 class Transaction:
@@ -8,52 +22,241 @@ class Transaction:
     денежных средств с валидацией даты и очисткой строковых данных.
 
     Attributes:
-        amount (float): Сумма денежных средств.
+        amount (int): Сумма в минимальных единицах валюты (копейках).
         category (str): Категория операции (например, продукты, бензин, зарплата).
         date (datetime.datetime): Объект даты операции.
         description (str): Дополнительное описание транзакции.
         transaction_type (str): Тип операции ('expense' или 'income').
+        currency (str): Трехбуквенный код валюты суммы (например, 'RUB', 'USD').
+        id (str): Стабильный идентификатор операции; по нему записываются
+            правки и удаления.
     """
     def __init__(
             self,
-            amount: float,
+            amount: int,
             category: str,
             date: str,
             description: str = '',
-            transaction_type: str = 'expense'
+            transaction_type: str = 'expense',
+            currency: str = BASE_CURRENCY,
+            id: str = None
             ):
         """Инициализирует объект транзакции.
 
         Args:
-            amount (float): Сумма операции.
+            amount (int): Сумма операции в копейках. Дробные значения не
+                принимаются: суммы хранятся и суммируются точно, в целых числах.
             category (str): Категория операции. Строка очищается от пробелов.
             date (str): Дата в строковом формате 'YYYY-MM-DD'.
             description (str, optional): Описание операции. По умолчанию ''.
             transaction_type (str, optional): Тип операции: 'expense' (расход) 
                 или 'income' (доход). По умолчанию 'expense'.
+            currency (str, optional): Код валюты суммы. Приводится к верхнему
+                регистру. По умолчанию :data:`BASE_CURRENCY`.
+            id (str, optional): Идентификатор операции. Если не задан,
+                генерируется новый (UUID4 в шестнадцатеричной записи).
 
         Raises:
+            ValueError: Если `amount` не является целым числом.
             ValueError: Если формат даты `date` не соответствует 'YYYY-MM-DD'.
         """
-        self.amount = amount
+        if isinstance(amount, bool) or not isinstance(amount, numbers.Integral):
+            raise ValueError("Сумма должна быть целым числом копеек")
+        self.amount = int(amount)
         self.category = category.strip()
         # Преобразование строки в объект datetime согласно формату
         self.date = datetime.datetime.strptime(date, '%Y-%m-%d')
         self.description = description.strip()
         self.transaction_type = transaction_type.strip()
+        self.currency = currency.strip().upper()
+        self.id = id or uuid.uuid4().hex
+
+
+    @classmethod
+    def from_trusted(cls, amount, category, date, description, transaction_type, currency, id):
+        """Создает операцию из уже проверенных данных без повторной валидации.
 
+        Используется при восстановлении журнала из контрольной точки, где
+        данные были проверены при первоначальной загрузке.
+
+        Args:
+            amount (int): Сумма в копейках.
+            category (str): Категория.
+            date (datetime.datetime): Дата операции.
+            description (str): Описание.
+            transaction_type (str): Тип операции.
+            currency (str): Код валюты.
+            id (str): Идентификатор операции.
+
+        Returns:
+            Transaction: Восстановленная операция.
+        """
+        t = cls.__new__(cls)
+        t.amount = amount
+        t.category = category
+        t.date = date
+        t.description = description
+        t.transaction_type = transaction_type
+        t.currency = currency
+        t.id = id
+        return t
 
     def to_dict(self):
         """Возвращает данные транзакции в виде словаря.
 
         Returns:
             dict: Словарь, содержащий ключи 'amount', 'category', 'date', 
-                'description' и 'transaction_type'. 
+                'description', 'transaction_type', 'currency' и 'id'.
         """
         return {
             'amount': self.amount,
             'category': self.category,
             'date': self.date,
             'description': self.description,
-            'transaction_type': self.transaction_type
-        }
\ No newline at end of file
+            'transaction_type': self.transaction_type,
+            'currency': self.currency,
+            'id': self.id
+        }
+
+
+class TransactionColumns(Sequence):
+    """Операции, хранящиеся столбцами NumPy; объекты создаются только при обращении.
+
+    Так хранится журнал, восстановленный из контрольной точки: загрузка
+    не создает по объекту :class:`Transaction` на строку, а агрегаты,
+    ключи сортировки и вынос в холодную историю считаются прямо по
+    столбцам (см. :meth:`column`). Объект строки создается при первом
+    обращении к ней и запоминается. Столбцы не изменяются: правки
+    строят новый экземпляр (см. :meth:`with_changes`), поэтому прежний
+    могут продолжать читать фоновые задачи. Операции, дописанные после
+    загрузки, хранятся обычным списком объектов в конце.
+
+    Attributes:
+        columns (dict): Столбцы загруженных строк по полям :data:`FIELDS`:
+            'amount' — int64, 'date' — datetime64[us], остальные — object.
+        tail (list[Transaction]): Операции, дописанные после столбцов.
+    """
+
+    def __init__(self, columns: dict, tail: list = None):
+        """Создает журнал из столбцов.
+
+        Args:
+            columns (dict): Столбцы по полям :data:`FIELDS` одинаковой длины.
+            tail (list[Transaction], optional): Операции после столбцов.
+        """
+        self.columns = columns
+        self.tail = [] if tail is None else tail
+        self._rows = len(columns['amount'])
+        # Позиция в столбцах -> уже созданный объект операции
+        self._objects = {}
+
+    def __len__(self):
+        return self._rows + len(self.tail)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            stop = max(start, stop)
+            columns = {name: values[start:stop] for name, values in self.columns.items()}
+            return TransactionColumns(columns, self.tail[max(0, start - self._rows):max(0, stop - self._rows)])
+        if index < 0:
+            index += len(self)
+        if index >= self._rows:
+            return self.tail[index - self._rows]
+        if index < 0:
+            raise IndexError('индекс операции вне диапазона')
+        t = self._objects.get(index)
+        if t is None:
+            t = Transaction.from_trusted(*(self.columns[name].item(index) for name in FIELDS))
+            self._objects[index] = t
+        return t
+
+    def __iter__(self):
+        for start in range(0, self._rows, _ITER_ROWS):
+            stop = min(start + _ITER_ROWS, self._rows)
+            rows = zip(*(self.columns[name][start:stop].tolist() for name in FIELDS))
+            for index, values in enumerate(rows, start):
+                t = self._objects.get(index)
+                if t is None:
+                    t = Transaction.from_trusted(*values)
+                    self._objects[index] = t
+                yield t
+        yield from self.tail
+
+    def append(self, transaction: Transaction):
+        """Дописывает операцию в конец."""
+        self.tail.append(transaction)
+
+    def extend(self, transactions):
+        """Дописывает операции в конец."""
+        self.tail.extend(transactions)
+
+    def copy(self) -> 'TransactionColumns':
+        """Возвращает копию, которую можно дописывать независимо от исходной."""
+        copy = TransactionColumns(self.columns, self.tail.copy())
+        copy._objects = self._objects    # столбцы общие и не изменяются
+        return copy
+
+    def column(self, name: str) -> np.ndarray:
+        """Возвращает значения поля всех операций одним массивом.
+
+        Массив может разделять память со столбцами, изменять его нельзя.
+
+        Args:
+            name (str): Поле из :data:`FIELDS`.
+
+        Returns:
+            numpy.ndarray: Значения поля в порядке журнала.
+        """
+        values = self.columns[name]
+        if not self.tail:
+            return values
+        return np.concatenate([values, np.array([getattr(t, name) for t in self.tail], dtype=values.dtype)])
+
+    def compress(self, mask: np.ndarray) -> 'TransactionColumns':
+        """Возвращает операции, для которых `mask` истинна.
+
+        Args:
+            mask (numpy.ndarray): Булев массив длины журнала.
+
+        Returns:
+            TransactionColumns: Выбранные операции в прежнем порядке.
+        """
+        head = mask[:self._rows]
+        columns = {name: values[head] for name, values in self.columns.items()}
+        return TransactionColumns(columns, [t for t, keep in zip(self.tail, mask[self._rows:].tolist()) if keep])
+
+    def with_changes(self, edits: dict, deleted: list) -> 'TransactionColumns':
+        """Возвращает новый журнал с замененными и удаленными строками.
+
+        Args:
+            edits (dict): Позиция -> новая версия операции.
+            deleted (list[int]): Позиции удаленных строк.
+
+        Returns:
+            TransactionColumns: Журнал с примененными изменениями.
+        """
+        columns = self.columns
+        head_edits = {i: t for i, t in edits.items() if i < self._rows}
+        head_deleted = [i for i in deleted if i < self._rows]
+        if head_edits:
+            columns = {name: values.copy() for name, values in columns.items()}
+            for i, t in head_edits.items():
+                for name in FIELDS:
+                    columns[name][i] = getattr(t, name)
+        if head_deleted:
+            columns = {name: np.delete(values, head_deleted) for name, values in columns.items()}
+
+        tail = self.tail.copy()
+        for i, t in edits.items():
+            if i >= self._rows:
+                tail[i - self._rows] = t
+        gone = {i - self._rows for i in deleted if i >= self._rows}
+        if gone:
+            tail = [t for i, t in enumerate(tail) if i not in gone]
+        result = TransactionColumns(columns, tail)
+        if columns is self.columns:
+            result._objects = self._objects
+        return result
@@ -0,0 +1,347 @@
+import json
+import asyncio
+import argparse
+from urllib.parse import urlsplit, parse_qs
+from models import Transaction, BASE_CURRENCY
+from storage import load_transactions, BatchWriter
+from utils import validate_amount, validate_date, validate_category, validate_currency
+
+
+# Предельные размеры входящего запроса
+MAX_HEADER_LINES = 100
+MAX_BODY_SIZE = 1024 * 1024
+
+# Количество строк в одном фрагменте потокового ответа
+STREAM_CHUNK_ROWS = 500
+
+_REASONS = {
+    200: 'OK',
+    201: 'Created',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error',
+}
+
+
+class LedgerService:
+    """Хранит журнал операций в памяти и поддерживает «прогретые» агрегаты.
+
+    Все суммы хранятся и отдаются в копейках (целые числа).
+
+    Журнал загружается один раз при создании сервиса, после чего суммы
+    по категориям и дневные ряды обновляются инкрементально при каждой
+    новой операции, без повторного разбора CSV-файла.
+
+    Attributes:
+        transactions (list[Transaction]): Все операции журнала.
+        totals (dict): Суммы по категориям: ``{тип: {категория: сумма}}``.
+        daily (dict): Дневные суммы: ``{дата 'YYYY-MM-DD': {тип: сумма}}``.
+    """
+
+    def __init__(self, transactions=None, writer=None):
+        """Загружает журнал и строит агрегаты.
+
+        Args:
+            transactions (list[Transaction], optional): Начальный набор операций.
+                По умолчанию загружается через :func:`load_transactions`.
+            writer (BatchWriter, optional): Писатель для новых операций.
+                Если не указан, операции хранятся только в памяти.
+        """
+        self.transactions = []
+        self.totals = {}
+        self.daily = {}
+        self.writer = writer
+
+        for t in (load_transactions() if transactions is None else transactions):
+            self._apply(t)
+
+    def _apply(self, t):
+        """Добавляет операцию в журнал и обновляет агрегаты."""
+        self.transactions.append(t)
+        by_category = self.totals.setdefault(t.transaction_type, {})
+        by_category[t.category] = by_category.get(t.category, 0) + t.amount
+        by_type = self.daily.setdefault(t.date.strftime('%Y-%m-%d'), {})
+        by_type[t.transaction_type] = by_type.get(t.transaction_type, 0) + t.amount
+
+    def category_totals(self, transaction_type: str) -> dict:
+        """Возвращает суммы по категориям для заданного типа операций."""
+        return dict(self.totals.get(transaction_type, {}))
+
+    def time_series(self) -> list:
+        """Возвращает дневной ряд доходов и расходов, упорядоченный по дате."""
+        return [
+            {
+                'date': day,
+                'income': self.daily[day].get('income', 0),
+                'expense': self.daily[day].get('expense', 0),
+            }
+            for day in sorted(self.daily)
+        ]
+
+    def filter(self, category=None, transaction_type=None, start=None, end=None):
+        """Перебирает операции, удовлетворяющие фильтрам.
+
+        Args:
+            category (str, optional): Категория операции.
+            transaction_type (str, optional): Тип операции.
+            start (str, optional): Начальная дата 'YYYY-MM-DD' включительно.
+            end (str, optional): Конечная дата 'YYYY-MM-DD' включительно.
+
+        Yields:
+            Transaction: Подходящие операции в порядке журнала.
+        """
+        for t in self.transactions:
+            if category is not None and t.category != category:
+                continue
+            if transaction_type is not None and t.transaction_type != transaction_type:
+                continue
+            day = t.date.strftime('%Y-%m-%d')
+            if start is not None and day < start:
+                continue
+            if end is not None and day > end:
+                continue
+            yield t
+
+    async def append(self, payload: dict) -> Transaction:
+        """Валидирует и добавляет новую операцию.
+
+        Поля проверяются функциями из :mod:`utils`. Если задан писатель,
+        операция сначала фиксируется на диске и только затем попадает
+        в агрегаты.
+
+        Args:
+            payload (dict): Поля операции в строковом виде: 'amount' (в рублях,
+                например "100.50"), 'category', 'date', 'description',
+                'transaction_type', 'currency'.
+
+        Returns:
+            Transaction: Добавленная операция.
+
+        Raises:
+            ValueError: Если данные не прошли валидацию.
+            OSError: Если операцию не удалось записать на диск.
+        """
+        transaction_type = payload.get('transaction_type', 'expense')
+        if transaction_type not in ('expense', 'income'):
+            raise ValueError("Тип операции должен быть 'expense' или 'income'")
+        description = payload.get('description', '')
+        if not isinstance(description, str):
+            raise ValueError("Описание должно быть строкой")
+
+        t = Transaction(
+            amount=validate_amount(payload.get('amount')),
+            category=validate_category(payload.get('category')),
+            date=validate_date(payload.get('date')),
+            description=description,
+            transaction_type=transaction_type,
+            currency=validate_currency(payload.get('currency', BASE_CURRENCY))
+        )
+
+        if self.writer is not None:
+            # Ошибка записи пробрасывается, и операция не попадает в агрегаты
+            await asyncio.wrap_future(self.writer.submit([t]))
+
+        self._apply(t)
+        return t
+
+
+def _row(t) -> dict:
+    """Сериализует операцию в JSON-совместимый словарь."""
+    row = t.to_dict()
+    row['date'] = t.date.strftime('%Y-%m-%d')
+    return row
+
+
+class LedgerHTTPServer:
+    """Минимальный HTTP/1.1 сервер на asyncio поверх :class:`LedgerService`.
+
+    Поддерживает постоянные соединения (keep-alive) и потоковую отдачу
+    больших выборок (chunked transfer encoding, по одной JSON-строке на операцию).
+
+    Маршруты:
+        - ``GET /health`` — проверка доступности;
+        - ``GET /totals?type=expense`` — суммы по категориям;
+        - ``GET /timeseries`` — дневной ряд доходов и расходов;
+        - ``GET /transactions?category=&type=&start=&end=`` — поток операций (NDJSON);
+        - ``POST /transactions`` — добавление операции (тело в JSON).
+    """
+
+    def __init__(self, service: LedgerService, host: str = '127.0.0.1', port: int = 8765):
+        """Сохраняет параметры сервера.
+
+        Args:
+            service (LedgerService): Сервис данных.
+            host (str, optional): Адрес прослушивания. По умолчанию только локальный.
+            port (int, optional): Порт. 0 — выбрать свободный автоматически.
+        """
+        self.service = service
+        self.host = host
+        self.port = port
+        self.server = None
+
+    async def start(self):
+        """Запускает прослушивание порта и возвращает фактический номер порта."""
+        self.server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port, backlog=1024
+        )
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def serve_forever(self):
+        """Запускает сервер и обслуживает запросы до остановки."""
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        """Останавливает сервер."""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def _handle_connection(self, reader, writer):
+        """Обслуживает запросы одного соединения, пока клиент его не закроет."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self._send_json(writer, 400, {'error': 'Некорректная строка запроса'}, False)
+                    break
+
+                headers = {}
+                for _ in range(MAX_HEADER_LINES):
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                length = headers.get('content-length', '0') or '0'
+                if not (length.isascii() and length.isdigit()):
+                    await self._send_json(writer, 400, {'error': 'Некорректный заголовок Content-Length'}, False)
+                    break
+                length = int(length)
+                if length > MAX_BODY_SIZE:
+                    await self._send_json(writer, 413, {'error': 'Слишком большой запрос'}, False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                await self._dispatch(writer, method, target, body, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except ValueError:
+            # Строка запроса или заголовка длиннее буфера потока
+            try:
+                await self._send_json(writer, 400, {'error': 'Слишком длинная строка запроса'}, False)
+            except ConnectionError:
+                pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _dispatch(self, writer, method, target, body, keep_alive):
+        """Направляет запрос в обработчик соответствующего маршрута."""
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        service = self.service
+
+        if url.path == '/health' and method == 'GET':
+            await self._send_json(writer, 200, {'status': 'ok', 'rows': len(service.transactions)}, keep_alive)
+        elif url.path == '/totals' and method == 'GET':
+            await self._send_json(writer, 200, service.category_totals(query.get('type', 'expense')), keep_alive)
+        elif url.path == '/timeseries' and method == 'GET':
+            await self._send_json(writer, 200, service.time_series(), keep_alive)
+        elif url.path == '/transactions' and method == 'GET':
+            rows = service.filter(
+                category=query.get('category'),
+                transaction_type=query.get('type'),
+                start=query.get('start'),
+                end=query.get('end'),
+            )
+            await self._stream_rows(writer, rows, keep_alive)
+        elif url.path == '/transactions' and method == 'POST':
+            try:
+                payload = json.loads(body.decode('utf-8') or '{}')
+                if not isinstance(payload, dict):
+                    raise ValueError("Ожидается JSON-объект")
+                t = await service.append(payload)
+            except ValueError as e:
+                await self._send_json(writer, 400, {'error': str(e)}, keep_alive)
+            except OSError as e:
+                await self._send_json(writer, 500, {'error': f'Не удалось сохранить операцию: {e}'}, keep_alive)
+            else:
+                await self._send_json(writer, 201, _row(t), keep_alive)
+        elif url.path in ('/health', '/totals', '/timeseries', '/transactions'):
+            await self._send_json(writer, 405, {'error': 'Метод не поддерживается'}, keep_alive)
+        else:
+            await self._send_json(writer, 404, {'error': 'Маршрут не найден'}, keep_alive)
+
+    @staticmethod
+    def _headers(status, extra, keep_alive) -> bytes:
+        """Формирует строку статуса и заголовки ответа."""
+        lines = [f'HTTP/1.1 {status} {_REASONS[status]}', 'Content-Type: application/json; charset=utf-8']
+        lines.extend(extra)
+        lines.append('Connection: keep-alive' if keep_alive else 'Connection: close')
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+    async def _send_json(self, writer, status, data, keep_alive):
+        """Отправляет ответ с JSON-телом фиксированной длины."""
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        writer.write(self._headers(status, [f'Content-Length: {len(body)}'], keep_alive) + body)
+        await writer.drain()
+
+    async def _stream_rows(self, writer, rows, keep_alive):
+        """Отправляет операции потоком NDJSON фрагментами по `STREAM_CHUNK_ROWS` строк."""
+        writer.write(self._headers(200, ['Transfer-Encoding: chunked'], keep_alive))
+        chunk = []
+        for t in rows:
+            chunk.append(json.dumps(_row(t), ensure_ascii=False))
+            if len(chunk) >= STREAM_CHUNK_ROWS:
+                self._write_chunk(writer, chunk)
+                chunk = []
+                await writer.drain()    # отдаем управление другим клиентам
+        if chunk:
+            self._write_chunk(writer, chunk)
+        writer.write(b'0\r\n\r\n')
+        await writer.drain()
+
+    @staticmethod
+    def _write_chunk(writer, lines):
+        """Записывает один фрагмент chunked-ответа."""
+        data = ('\n'.join(lines) + '\n').encode('utf-8')
+        writer.write(f'{len(data):X}\r\n'.encode('latin-1') + data + b'\r\n')
+
+
+def main():
+    """Точка входа: загружает журнал и запускает локальный JSON API."""
+    parser = argparse.ArgumentParser(description='Локальный JSON API журнала операций')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    writer = BatchWriter()
+    server = LedgerHTTPServer(LedgerService(writer=writer), args.host, args.port)
+    print(f'Сервер запущен на http://{args.host}:{args.port}')
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        writer.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,420 @@
+import re
+import sys
+import html
+import uuid
+import argparse
+import functools
+import numpy as np
+import storage
+from models import Transaction, BASE_CURRENCY
+from utils import validate_amounts, validate_dates, validate_categories, validate_currencies
+from instrumentation import traced
+
+
+# Сколько операций в одном пакете
+BATCH_SIZE = 10_000
+
+# Размер блока чтения OFX-файла, символов
+CHUNK_SIZE = 1 << 16
+
+# Категория операций, для которых выписка не задает категорию
+DEFAULT_CATEGORY = 'Импорт'
+
+# Разделы QIF с операциями по счетам (инвестиционные и служебные пропускаются)
+_QIF_SECTIONS = {'bank', 'cash', 'ccard', 'oth a', 'oth l'}
+
+# Форматы дат QIF: ISO, европейский с точками и американский M/D/Y
+# (апостроф перед двузначным годом в Quicken означает 20xx)
+_QIF_ISO_RE = re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})')
+_QIF_DOTTED_RE = re.compile(r'(\d{1,2})\.(\d{1,2})\.(\d{2}|\d{4})')
+_QIF_US_RE = re.compile(r"(\d{1,2})/(\d{1,2})(['/])(\d{2}|\d{4})")
+
+# Кодировка OFX объявляется в заголовке: CHARSET:1251 (SGML) или encoding="..." (XML)
+_OFX_CHARSET_RE = re.compile(rb'CHARSET:\s*(\d+)|encoding\s*=\s*["\']([\w-]+)["\']', re.IGNORECASE)
+
+# Сообщения об отклоненных записях, в порядке проверки
+_REJECT_MESSAGES = (
+    ('amount', 'Неверная сумма'),
+    ('date', 'Неверная дата'),
+    ('category', 'Недопустимая категория'),
+    ('currency', 'Неверный код валюты'),
+)
+
+
+def _new_batch() -> dict:
+    return {'number': [], 'amount': [], 'type': [], 'date': [], 'category': [], 'description': [], 'currency': []}
+
+
+def _split_amount(text: str) -> tuple:
+    """Разделяет сумму выписки со знаком на тип операции и модуль.
+
+    Отрицательная сумма — расход, положительная — доход. Разделитель дробной
+    части определяется по последнему из символов '.' и ','; остальные
+    считаются разделителями разрядов.
+
+    Returns:
+        tuple: ('expense' или 'income', строка модуля суммы с точкой).
+    """
+    text = text.strip().replace(' ', '').replace('\xa0', '')
+    transaction_type = 'expense' if text.startswith('-') else 'income'
+    text = text.lstrip('+-')
+    if ',' in text:
+        decimal = text.rfind(',')
+        if '.' in text[decimal:] or len(text) - decimal - 1 > 2:
+            text = text.replace(',', '')     # запятые разделяют разряды
+        else:
+            text = text[:decimal].replace('.', '').replace(',', '') + '.' + text[decimal + 1:]
+    return transaction_type, text
+
+
+def _add_record(batch: dict, number: int, amount: str, date: str, category: str, description: str, currency: str):
+    transaction_type, amount = _split_amount(amount)
+    batch['number'].append(number)
+    batch['amount'].append(amount)
+    batch['type'].append(transaction_type)
+    batch['date'].append(date)
+    batch['category'].append(category)
+    batch['description'].append(description)
+    batch['currency'].append(currency)
+
+
+def _join(*parts) -> str:
+    """Собирает описание из непустых неповторяющихся частей."""
+    result = []
+    for part in parts:
+        if part and part not in result:
+            result.append(part)
+    return ' '.join(result)
+
+
+@traced('statements.validate', rows=lambda result, batch, on_reject=None: len(batch['number']))
+def _to_transactions(batch: dict, on_reject=None) -> list:
+    """Проверяет пакет записей выписки пакетными валидаторами и создает операции.
+
+    Args:
+        batch (dict): Столбцы записей (см. :func:`_add_record`).
+        on_reject (Callable[[int, str], None], optional): Вызывается для каждой
+            отклоненной записи с ее номером в файле и причиной.
+
+    Returns:
+        list[Transaction]: Корректные операции пакета.
+    """
+    checks = {}
+    amounts, checks['amount'] = validate_amounts(batch['amount'])
+    dates, checks['date'] = validate_dates(batch['date'])
+    categories, checks['category'] = validate_categories(batch['category'])
+    currencies, checks['currency'] = validate_currencies(batch['currency'])
+    valid = checks['amount'] & checks['date'] & checks['category'] & checks['currency']
+
+    if on_reject is not None and not valid.all():
+        for index in np.flatnonzero(~valid):
+            message = next(text for name, text in _REJECT_MESSAGES if not checks[name][index])
+            on_reject(batch['number'][index], message)
+
+    descriptions = np.array(batch['description'], dtype=object)[valid]
+    types = np.array(batch['type'], dtype=object)[valid]
+    return [
+        Transaction.from_trusted(amount, category, date, description.strip(), transaction_type, currency, uuid.uuid4().hex)
+        for amount, category, date, description, transaction_type, currency in zip(
+            amounts[valid].tolist(),
+            categories[valid].tolist(),
+            dates[valid].astype('datetime64[us]').astype(object).tolist(),
+            descriptions.tolist(),
+            types.tolist(),
+            currencies[valid].tolist(),
+        )
+    ]
+
+
+def _ofx_elements(f, chunk_size: int = CHUNK_SIZE):
+    """Потоково разбирает OFX на пары (тег, текст).
+
+    Файл читается блоками, поэтому память не зависит от его размера и от
+    того, разбит ли XML на строки. Подходит и для SGML (OFX 1.x, теги без
+    закрывающих пар), и для XML (OFX 2.x): закрывающие теги возвращаются
+    с префиксом '/', заголовки и инструкции обработки пропускаются.
+
+    Yields:
+        tuple[str, str]: Имя тега в верхнем регистре и текст после него.
+    """
+    rest = ''
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        pieces = (rest + chunk).split('<')
+        rest = pieces.pop()     # последний фрагмент может быть недочитан
+        for piece in pieces:
+            element = _ofx_element(piece)
+            if element is not None:
+                yield element
+    element = _ofx_element(rest)
+    if element is not None:
+        yield element
+
+
+def _ofx_element(piece: str) -> tuple:
+    """Разбирает фрагмент 'ТЕГ>текст'; для заголовков и инструкций возвращает None."""
+    tag, closed, text = piece.partition('>')
+    if not closed or tag.startswith(('?', '!')):
+        return None
+    text = text.strip()
+    return tag.strip().upper(), html.unescape(text) if '&' in text else text
+
+
+@functools.lru_cache(maxsize=4096)
+def _ofx_date(text: str) -> str:
+    """Переводит дату OFX (YYYYMMDD[HHMMSS[.XXX]][[±H:TZ]]) в 'YYYY-MM-DD'."""
+    digits = text[:8]
+    if len(digits) == 8 and digits.isdigit():
+        return f'{digits[:4]}-{digits[4:6]}-{digits[6:]}'
+    return text
+
+
+def parse_ofx(f, batch_size: int = BATCH_SIZE, category: str = DEFAULT_CATEGORY,
+              currency: str = BASE_CURRENCY, on_reject=None):
+    """Потоково читает выписку OFX (SGML или XML) пакетами операций.
+
+    Каждая запись ``<STMTTRN>`` становится операцией: сумма со знаком
+    (TRNAMT) задает тип, описание собирается из NAME и MEMO, валюта
+    берется из CURDEF выписки. В памяти одновременно находится не больше
+    одного пакета.
+
+    Args:
+        f (io.TextIOBase): Открытый текстовый файл.
+        batch_size (int, optional): Размер пакета.
+        category (str, optional): Категория операций (в OFX категорий нет).
+        currency (str, optional): Валюта, если выписка не объявляет CURDEF.
+        on_reject (Callable[[int, str], None], optional): Обработчик отклоненных
+            записей (номер записи и причина).
+
+    Yields:
+        list[Transaction]: Проверенные операции очередного пакета.
+    """
+    batch = _new_batch()
+    record = None
+    number = 0
+    for tag, text in _ofx_elements(f):
+        if tag == 'CURDEF':
+            currency = text
+        elif tag == 'STMTTRN':
+            record = {}
+        elif tag == '/STMTTRN' and record is not None:
+            number += 1
+            _add_record(batch, number, record.get('TRNAMT', ''), _ofx_date(record.get('DTPOSTED', '')),
+                        category, _join(record.get('NAME'), record.get('MEMO')), currency)
+            record = None
+            if len(batch['number']) >= batch_size:
+                transactions = _to_transactions(batch, on_reject)
+                batch = _new_batch()
+                if transactions:
+                    yield transactions
+        elif record is not None and not tag.startswith('/'):
+            record[tag] = text
+
+    if batch['number']:
+        transactions = _to_transactions(batch, on_reject)
+        if transactions:
+            yield transactions
+
+
+@functools.lru_cache(maxsize=4096)
+def _qif_date(text: str) -> str:
+    """Переводит дату QIF в 'YYYY-MM-DD'; нераспознанная дата возвращается как есть.
+
+    В выписке много операций за одни и те же дни, поэтому результаты кэшируются.
+    """
+    text = text.replace(' ', '')
+    match = _QIF_ISO_RE.fullmatch(text)
+    if match:
+        year, month, day = (int(x) for x in match.groups())
+        separator = '-'
+    else:
+        match = _QIF_DOTTED_RE.fullmatch(text)
+        if match:
+            day, month, year = (int(x) for x in match.groups())
+            separator = '.'
+        else:
+            match = _QIF_US_RE.fullmatch(text)
+            if match is None:
+                return text
+            month, day, separator, year = match.groups()
+            month, day, year = int(month), int(day), int(year)
+        if year < 100:
+            year += 2000 if separator == "'" or year < 50 else 1900
+    return f'{year:04d}-{month:02d}-{day:02d}'
+
+
+@functools.lru_cache(maxsize=4096)
+def _qif_category(text: str, default: str) -> str:
+    """Категория QIF без подкатегории и класса; переводы между счетами — категория по умолчанию."""
+    if not text or text.startswith('['):
+        return default
+    return text.split('/', 1)[0].split(':', 1)[0].strip() or default
+
+
+def parse_qif(f, batch_size: int = BATCH_SIZE, category: str = DEFAULT_CATEGORY,
+              currency: str = BASE_CURRENCY, on_reject=None):
+    """Потоково читает выписку QIF пакетами операций.
+
+    Учитываются разделы счетов (Bank, Cash, CCard, Oth A, Oth L); записи
+    заканчиваются строкой '^'. Сумма со знаком (T или U) задает тип,
+    категория берется из L (без подкатегории), описание — из P и M.
+    Разбивки (S, E, $) не разворачиваются. Файл читается построчно.
+
+    Args:
+        f (io.TextIOBase): Открытый текстовый файл.
+        batch_size (int, optional): Размер пакета.
+        category (str, optional): Категория записей без L и переводов между счетами.
+        currency (str, optional): Валюта операций (в QIF валюты нет).
+        on_reject (Callable[[int, str], None], optional): Обработчик отклоненных записей.
+
+    Yields:
+        list[Transaction]: Проверенные операции очередного пакета.
+    """
+    batch = _new_batch()
+    section = None
+    record = {}
+    number = 0
+    for line in f:
+        line = line.rstrip('\r\n')
+        if not line:
+            continue
+        if line.startswith('!'):
+            header = line[1:].strip().lower()
+            if header.startswith('type:'):
+                section = header[5:].strip()
+            elif not header.startswith(('option', 'clear')):
+                section = header    # !Account и другие служебные разделы
+            record = {}
+            continue
+
+        code, value = line[0], line[1:].strip()
+        if code == '^':
+            if section in _QIF_SECTIONS and record:
+                number += 1
+                _add_record(batch, number, record.get('T') or record.get('U', ''), _qif_date(record.get('D', '')),
+                            _qif_category(record.get('L'), category), _join(record.get('P'), record.get('M')), currency)
+                if len(batch['number']) >= batch_size:
+                    transactions = _to_transactions(batch, on_reject)
+                    batch = _new_batch()
+                    if transactions:
+                        yield transactions
+            record = {}
+        elif code in 'DTUPML' and code not in record:
+            record[code] = value
+
+    if batch['number']:
+        transactions = _to_transactions(batch, on_reject)
+        if transactions:
+            yield transactions
+
+
+def _sniff_encoding(path: str) -> str:
+    """Определяет кодировку по заголовку OFX; по умолчанию UTF-8."""
+    with open(path, 'rb') as f:
+        match = _OFX_CHARSET_RE.search(f.read(4096))
+    if match is None:
+        return 'utf-8-sig'
+    if match.group(1):
+        return 'cp1252' if match.group(1) == b'1252' else 'cp1251' if match.group(1) == b'1251' else 'utf-8-sig'
+    return match.group(2).decode('ascii')
+
+
+def read_statement(path: str, batch_size: int = BATCH_SIZE, category: str = DEFAULT_CATEGORY,
+                   currency: str = BASE_CURRENCY, on_reject=None, encoding: str = None):
+    """Читает файл выписки пакетами операций; формат определяется по расширению.
+
+    Args:
+        path (str): Путь к файлу .ofx, .qfx или .qif.
+        batch_size (int, optional): Размер пакета.
+        category (str, optional): Категория по умолчанию.
+        currency (str, optional): Валюта по умолчанию.
+        on_reject (Callable[[int, str], None], optional): Обработчик отклоненных записей.
+        encoding (str, optional): Кодировка файла. По умолчанию — из заголовка
+            OFX или UTF-8; непредставимые байты заменяются.
+
+    Yields:
+        list[Transaction]: Проверенные операции очередного пакета.
+
+    Raises:
+        ValueError: Если формат файла не поддерживается.
+    """
+    extension = path.lower().rsplit('.', 1)[-1]
+    if extension in ('ofx', 'qfx'):
+        parse = parse_ofx
+    elif extension == 'qif':
+        parse = parse_qif
+    else:
+        raise ValueError('Поддерживаются выписки OFX (.ofx, .qfx) и QIF (.qif)')
+
+    with open(path, encoding=encoding or _sniff_encoding(path), errors='replace', newline='') as f:
+        yield from parse(f, batch_size, category, currency, on_reject)
+
+
+@traced('statements.import_statement', rows=lambda result, *args, **kwargs: result['imported'])
+def import_statement(path: str, batch_size: int = BATCH_SIZE, category: str = DEFAULT_CATEGORY,
+                     currency: str = BASE_CURRENCY, on_reject=None) -> dict:
+    """Импортирует выписку в журнал операций.
+
+    Каждый пакет дописывается в журнал одной операцией записи
+    (:func:`storage.append_transactions`), поэтому память не зависит от
+    размера выписки. Открытое приложение подхватит новые строки
+    автоматически. Если пакет записать не удалось, импорт останавливается:
+    уже записанные пакеты остаются в журнале.
+
+    Args:
+        path (str): Путь к файлу выписки.
+        batch_size (int, optional): Размер пакета.
+        category (str, optional): Категория по умолчанию.
+        currency (str, optional): Валюта по умолчанию.
+        on_reject (Callable[[int, str], None], optional): Обработчик отклоненных записей.
+
+    Returns:
+        dict: Количество импортированных ('imported') и отклоненных ('rejected') записей.
+
+    Raises:
+        ValueError: Если формат файла не поддерживается.
+        OSError: Если файл не удалось прочитать или пакет — записать в журнал.
+    """
+    rejected = 0
+
+    def reject(number, message):
+        nonlocal rejected
+        rejected += 1
+        if on_reject is not None:
+            on_reject(number, message)
+
+    imported = 0
+    for transactions in read_statement(path, batch_size, category, currency, reject):
+        try:
+            storage.append_transactions(transactions)
+        except OSError as e:
+            print(f'Импорт остановлен после {imported} операций: {e}')
+            raise
+        imported += len(transactions)
+    return {'imported': imported, 'rejected': rejected}
+
+
+def main():
+    """Точка входа: импортирует выписку OFX или QIF в журнал операций."""
+    parser = argparse.ArgumentParser(description='Импорт банковской выписки OFX или QIF')
+    parser.add_argument('file', help='Файл выписки (.ofx, .qfx или .qif)')
+    parser.add_argument('--category', default=DEFAULT_CATEGORY, help='Категория операций без категории')
+    parser.add_argument('--currency', default=BASE_CURRENCY, help='Валюта, если выписка ее не указывает')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    try:
+        result = import_statement(
+            args.file, args.batch_size, args.category, args.currency,
+            on_reject=lambda number, message: print(f'Запись {number}: {message}', file=sys.stderr)
+        )
+    except (OSError, ValueError) as e:
+        print(f'Ошибка импорта: {e}', file=sys.stderr)
+        sys.exit(1)
+    print(f"Импортировано операций: {result['imported']}, отклонено: {result['rejected']}")
+
+
+if __name__ == '__main__':
+    main()
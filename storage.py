@@ -1,14 +1,48 @@
+import io
 import os
 import csv
+import queue
+import hashlib
 import datetime
+import itertools
+import threading
+import contextlib
+from concurrent.futures import Future
 import pandas as pd
-from models import Transaction
+from models import Transaction, BASE_CURRENCY
+from instrumentation import traced
+from utils import parse_minor, format_minor, validate_amounts
+
+try:
+    import fcntl
+except ImportError:     # Windows
+    fcntl = None
+    import msvcrt
 
 
 # Пути к файлам с данными
 _base_dir = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(_base_dir, 'data')
 CSV_FILE = os.path.join(DATA_DIR, f'transactions.csv')
+RATES_FILE = os.path.join(DATA_DIR, 'rates.csv')
+CHANGES_FILE = os.path.join(DATA_DIR, 'changes.csv')
+CHECKPOINT_FILE = os.path.join(DATA_DIR, 'checkpoint.bin')
+BUDGETS_FILE = os.path.join(DATA_DIR, 'budgets.csv')
+
+# Порядок колонок в CSV-файле
+FIELDNAMES = ['amount', 'category', 'date', 'description', 'transaction_type', 'currency', 'id']
+
+# Колонки файла бюджетов
+BUDGET_FIELDNAMES = ['category', 'period', 'limit']
+
+# Журнал изменений: операция ('edit' или 'delete') и запись-замена
+CHANGE_FIELDNAMES = ['op'] + FIELDNAMES
+
+# Размер журнала изменений (в байтах), после которого запускается уплотнение
+COMPACTION_THRESHOLD = 64 * 1024
+
+# Сколько байт перед смещением учитывается в отпечатке файла (см. read_tail)
+_FINGERPRINT_BYTES = 4096
 
 
 def ensure_data_dir():
@@ -29,6 +63,139 @@ def ensure_data_dir():
     if not os.path.exists(DATA_DIR):
         os.makedirs(DATA_DIR)
 
+def set_data_dir(directory: str):
+    """Переключает хранилище на другую директорию данных.
+
+    Пути ко всем файлам хранилища пересчитываются относительно `directory`.
+    Используется процессами консолидации (см. :mod:`consolidate`): каждый
+    процесс читает журнал своей директории.
+
+    Args:
+        directory (str): Директория данных.
+    """
+    global DATA_DIR, CSV_FILE, RATES_FILE, CHANGES_FILE, CHECKPOINT_FILE, BUDGETS_FILE
+    DATA_DIR = directory
+    CSV_FILE = os.path.join(directory, 'transactions.csv')
+    RATES_FILE = os.path.join(directory, 'rates.csv')
+    CHANGES_FILE = os.path.join(directory, 'changes.csv')
+    CHECKPOINT_FILE = os.path.join(directory, 'checkpoint.bin')
+    BUDGETS_FILE = os.path.join(directory, 'budgets.csv')
+
+@contextlib.contextmanager
+def _file_lock(path: str, exclusive: bool = True):
+    """Захватывает межпроцессную рекомендательную (advisory) блокировку файла.
+
+    Блокировка ставится не на сам файл данных, а на соседний файл
+    ``<path>.lock``: так писатели и читатели координируются независимо
+    от того, в каком режиме открыт основной файл.
+
+    Args:
+        path (str): Путь к защищаемому файлу.
+        exclusive (bool, optional): Эксклюзивная блокировка для записи (True)
+            или разделяемая для чтения (False). В Windows разделяемых блокировок
+            нет, поэтому всегда используется эксклюзивная.
+
+    Yields:
+        None: Управление возвращается, пока блокировка удерживается.
+    """
+    lock_path = path + '.lock'
+    with open(lock_path, 'a+') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+def transaction_to_row(t) -> dict:
+    """Готовит словарь транзакции к записи в CSV.
+
+    Сумма в копейках записывается десятичной строкой (:func:`utils.format_minor`),
+    дата — в формате 'YYYY-MM-DD'.
+    """
+    row = t.to_dict()
+    row['amount'] = format_minor(t.amount)
+    row['date'] = t.date.strftime('%Y-%m-%d')
+    return row
+
+def _legacy_id(index: int) -> str:
+    """Идентификатор строки, записанной до появления колонки 'id'.
+
+    Зависит только от порядкового номера строки, поэтому одинаков при каждой
+    загрузке и сохраняется при переписывании файла.
+    """
+    return f'legacy-{index}'
+
+def _upgrade_header(path: str):
+    """Приводит заголовок существующего CSV-файла к текущему набору колонок.
+
+    Файлы, созданные до появления новых колонок (например, 'currency' или 'id'),
+    переписываются один раз: недостающие значения заполняются теми же
+    значениями по умолчанию, что и при загрузке. Замена выполняется атомарно (временный файл +
+    :func:`os.replace`). Вызывается только под эксклюзивной блокировкой.
+
+    Args:
+        path (str): Путь к CSV-файлу.
+    """
+    with open(path, mode='r', encoding='utf-8', newline='') as f:
+        reader = csv.DictReader(f)
+        if reader.fieldnames is None or reader.fieldnames == FIELDNAMES:
+            return
+        rows = list(reader)
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, mode='w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES, extrasaction='ignore')
+        writer.writeheader()
+        for index, row in enumerate(rows):
+            row['currency'] = row.get('currency') or BASE_CURRENCY
+            row['id'] = row.get('id') or _legacy_id(index)
+            writer.writerow(row)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def _append_rows(path: str, transactions) -> int:
+    """Дописывает транзакции в CSV одной операцией записи под эксклюзивной блокировкой.
+
+    Все строки предварительно сериализуются в буфер, поэтому другой процесс
+    никогда не увидит перемешанные строки. Заголовок записывается только если
+    файл пуст на момент захвата блокировки.
+
+    Args:
+        path (str): Путь к CSV-файлу.
+        transactions (list[Transaction]): Транзакции для дозаписи.
+
+    Returns:
+        int: Зафиксированное смещение (размер файла в байтах) после записи.
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=FIELDNAMES)
+    for t in transactions:
+        writer.writerow(transaction_to_row(t))
+
+    with _file_lock(path, exclusive=True):
+        if os.path.isfile(path) and os.path.getsize(path) > 0:
+            _upgrade_header(path)
+        with open(path, mode='a', newline='', encoding='utf-8') as f:
+            # Размер проверяется под блокировкой: заголовок не задвоится
+            if f.tell() == 0:
+                header = io.StringIO()
+                csv.DictWriter(header, fieldnames=FIELDNAMES).writeheader()
+                f.write(header.getvalue())
+            f.write(buffer.getvalue())
+            f.flush()
+            os.fsync(f.fileno())
+            return f.buffer.tell()
+
+@traced('storage.save_transactions', rows=lambda result, transactions: len(transactions or []))
 def save_transactions(transactions):
     """Сохраняет список транзакций в CSV-файл.
 
@@ -36,6 +203,10 @@ def save_transactions(transactions):
     Если файл не существует, он создается вместе с заголовками столбцов. 
     При пустом входном списке запись не производится.
 
+    Запись выполняется под межпроцессной блокировкой (см. :func:`_file_lock`)
+    и одной операцией, поэтому несколько процессов (например, импорт и GUI)
+    могут безопасно писать в один и тот же файл.
+
     Args:
         transactions (list[Transaction]): Список объектов транзакций для сохранения.
             Каждый объект должен иметь метод `to_dict()`.
@@ -44,36 +215,213 @@ def save_transactions(transactions):
         - Использует глобальную константу `CSV_FILE` для определения пути к файлу.
         - Автоматически вызывает `ensure_data_dir()` перед началом записи.
         - Данные сохраняются в кодировке UTF-8.
+        - Суммы (в копейках) записываются точной десятичной строкой с двумя знаками.
 
     Raises:
         Exception: Если возникает ошибка при открытии файла или процессе записи 
             (ошибка перехватывается внутри функции и выводится в консоль).
 
     Example:
-        >>> tx = Transaction(100.0, "Еда", "2026-01-06", "Хлеб", "expense")
+        >>> tx = Transaction(10000, "Еда", "2026-01-06", "Хлеб", "expense")
         >>> save_transactions([tx])
     """
     if not transactions:
         return  # Ничего не делаем
 
-    ensure_data_dir()   # Создаем папку
-    file_exists = os.path.isfile(CSV_FILE)
-
     try:
-        with open(CSV_FILE, mode='a', newline='', encoding='utf-8') as f:
-            fieldnames = ['amount', 'category', 'date', 'description', 'transaction_type']
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-
-            # Если файл новый, записываем заголовки
-            if not file_exists:
-                writer.writeheader()
-
-            for t in transactions:
-                writer.writerow(t.to_dict())
+        append_transactions(transactions)
 
     except Exception as e:
         print(f'Ошибка при сохранении данных: {e}')
 
+def append_transactions(transactions) -> int:
+    """Дописывает транзакции в CSV-файл, не перехватывая ошибки записи.
+
+    Вариант :func:`save_transactions` для вызывающего кода, которому нужно
+    знать, записаны ли строки (например, пакетного импорта).
+
+    Args:
+        transactions (list[Transaction]): Транзакции для дозаписи.
+
+    Returns:
+        int: Зафиксированное смещение после записи.
+
+    Raises:
+        OSError: Если файл не удалось открыть, заблокировать или записать.
+    """
+    ensure_data_dir()
+    return _append_rows(CSV_FILE, transactions)
+
+def committed_offset(path: str = None) -> int:
+    """Возвращает смещение последней полностью зафиксированной строки CSV-файла.
+
+    Читатели, которые обрабатывают файл инкрементально, должны читать данные
+    только до этого смещения: всё, что лежит дальше, может оказаться
+    недописанной строкой.
+
+    Args:
+        path (str, optional): Путь к CSV-файлу. По умолчанию `CSV_FILE`.
+
+    Returns:
+        int: Позиция в байтах сразу после последнего символа перевода строки
+        или 0, если файл отсутствует.
+    """
+    path = path or CSV_FILE
+    if not os.path.isfile(path):
+        return 0
+
+    with _file_lock(path, exclusive=False):
+        with open(path, mode='rb') as f:
+            size = f.seek(0, os.SEEK_END)
+            # Ищем последний перевод строки с конца файла
+            position = size
+            while position > 0:
+                step = min(4096, position)
+                f.seek(position - step)
+                chunk = f.read(step)
+                index = chunk.rfind(b'\n')
+                if index != -1:
+                    return position - step + index + 1
+                position -= step
+            return 0
+
+
+class FileWatcher:
+    """Дешевое отслеживание изменений файлов по метаданным.
+
+    При каждом вызове :meth:`changed` для файлов выполняется только
+    ``os.stat``; сами файлы не открываются. Изменение времени модификации,
+    размера или inode (файл переписан и заменен) означает, что файл нужно
+    дочитать. Что именно изменилось — дописан хвост, файл усечен или
+    переписан — определяет :func:`read_tail` по смещениям и отпечатку.
+
+    Attributes:
+        paths (tuple[str]): Отслеживаемые файлы.
+    """
+
+    def __init__(self, paths: tuple = None):
+        """Создает наблюдатель и запоминает текущее состояние файлов.
+
+        Args:
+            paths (tuple[str], optional): Отслеживаемые файлы. По умолчанию
+                основной файл и журнал изменений.
+        """
+        self.paths = tuple(paths or (CSV_FILE, CHANGES_FILE))
+        self._stats = self._snapshot()
+
+    def _snapshot(self) -> tuple:
+        stats = []
+        for path in self.paths:
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                stats.append(None)
+                continue
+            stats.append((st.st_mtime_ns, st.st_size, st.st_ino))
+        return tuple(stats)
+
+    def changed(self) -> bool:
+        """Проверяет, изменились ли файлы с прошлого вызова.
+
+        Returns:
+            bool: True, если метаданные хотя бы одного файла отличаются
+            от запомненных (новое состояние запоминается).
+        """
+        stats = self._snapshot()
+        if stats == self._stats:
+            return False
+        self._stats = stats
+        return True
+
+
+class BatchWriter:
+    """Единственный писатель, объединяющий строки от многих производителей в пакеты.
+
+    Производители (потоки GUI, импорта и т.п.) только кладут транзакции
+    в очередь через :meth:`submit` и не конкурируют за файловую блокировку.
+    Фоновый поток забирает из очереди всё накопленное и записывает одной
+    операцией :func:`_append_rows`, поэтому пропускная способность растет
+    с числом производителей, а не падает из-за борьбы за блокировку.
+    Между процессами писатели координируются файловой блокировкой.
+
+    Attributes:
+        path (str): Путь к CSV-файлу.
+        max_batch (int): Максимальное количество транзакций в одном пакете.
+        committed_offset (int): Смещение в файле после последнего
+            зафиксированного пакета.
+    """
+
+    def __init__(self, path: str = None, max_batch: int = 10000):
+        """Запускает фоновый поток записи.
+
+        Args:
+            path (str, optional): Путь к CSV-файлу. По умолчанию `CSV_FILE`.
+            max_batch (int, optional): Предельный размер пакета. По умолчанию 10000.
+        """
+        self.path = path or CSV_FILE
+        self.max_batch = max_batch
+        self.committed_offset = committed_offset(self.path)
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, transactions) -> Future:
+        """Ставит транзакции в очередь на запись.
+
+        Args:
+            transactions (list[Transaction]): Транзакции для сохранения.
+
+        Returns:
+            concurrent.futures.Future: Завершается после записи пакета,
+            содержащего эти транзакции. Результат — смещение зафиксированных
+            данных; если пакет записать не удалось, ``result()`` повторно
+            возбуждает исключение записи.
+        """
+        done = Future()
+        self._queue.put((list(transactions), done))
+        return done
+
+    def close(self):
+        """Дописывает остаток очереди и останавливает фоновый поток."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        """Цикл фонового потока: собирает пакет из очереди и фиксирует его."""
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch, events = list(item[0]), [item[1]]
+
+            # Забираем всё, что успели накопить другие производители
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.extend(item[0])
+                events.append(item[1])
+
+            try:
+                if batch:
+                    directory = os.path.dirname(self.path)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    self.committed_offset = _append_rows(self.path, batch)
+            except Exception as e:
+                # Ошибку получают все производители пакета: их строки не записаны
+                for future in events:
+                    future.set_exception(e)
+            else:
+                for future in events:
+                    future.set_result(self.committed_offset)
+
+@traced('storage.load_transactions', rows=lambda result: len(result))
 def load_transactions():
     """Загружает список транзакций из CSV-файла и преобразует их в объекты Transaction.
 
@@ -89,36 +437,470 @@ def load_transactions():
     Note:
         - Опирается на глобальные константы `DATA_DIR` и `CSV_FILE`.
         - Предполагает, что CSV-файл имеет корректные заголовки: 
-          'amount', 'category', 'date', 'description', 'transaction_type'.
+          'amount', 'category', 'date', 'description', 'transaction_type'
+          и (необязательно) 'currency'. Если колонки валюты нет, используется
+          :data:`models.BASE_CURRENCY`.
 
     Raises:
         Exception: Если возникает ошибка при чтении файла или парсинге данных 
             (например, поврежден формат CSV). Ошибка перехватывается, выводится 
             в консоль, и функция возвращает пустой список.
     """
-    transactions = []
-    
     if not os.path.exists(DATA_DIR):
-        return transactions     # Возвращаем пустой список, если файла нет
+        return []     # Возвращаем пустой список, если файла нет
+
+    if not os.path.isfile(CSV_FILE):
+        return []
 
     try:
-        with open(CSV_FILE, mode='r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-
-            for row in reader:
-                # Создаем объект Transaction, преобразуя данные из строк
-                t = Transaction(
-                        amount=float(row['amount']),
-                        category=row['category'],
-                        date=row['date'],
-                        description=row.get('description', ''),
-                        transaction_type=row['transaction_type']
-                    )
-                transactions.append(t)
-    
+        tail = read_tail()
+
     except Exception as e:
         print(f'Ошибка при загрузке данных: {e}')
         return []
 
-    return transactions
+    return apply_changes(tail['transactions'], tail['changes'])
+
+@traced('storage.load_frame', rows=lambda result: len(result))
+def load_frame() -> pd.DataFrame:
+    """Загружает журнал сразу в DataFrame, без создания объектов Transaction.
+
+    Векторный аналог :func:`load_transactions` для пакетной аналитики:
+    файл разбирается :func:`pandas.read_csv`, суммы переводятся в копейки
+    пакетно (строки старого формата — через :func:`utils.parse_minor`),
+    журнал изменений применяется так же, как в :func:`apply_changes`.
+
+    Returns:
+        pd.DataFrame: Колонки как у :func:`analysis.transactions_to_df`
+        и дополнительно 'id'. Если файла нет, таблица пуста.
+
+    Raises:
+        Exception: Ошибки чтения и разбора не перехватываются.
+    """
+    columns = ['amount', 'category', 'date', 'description', 'transaction_type', 'currency', 'id']
+    if not os.path.isfile(CSV_FILE):
+        return pd.DataFrame({name: pd.Series(dtype='int64' if name == 'amount' else object) for name in columns})
+
+    with _file_lock(CSV_FILE, exclusive=False):
+        content, _ = _read_committed(CSV_FILE)
+        changes = {}
+        if os.path.isfile(CHANGES_FILE):
+            with _file_lock(CHANGES_FILE, exclusive=False):
+                changes, _ = _read_changes_unlocked()
+
+    df = pd.read_csv(io.StringIO(content), dtype=str, keep_default_na=False)
+    for name in ('description', 'currency', 'id'):
+        if name not in df.columns:
+            df[name] = ''
+    for name in ('category', 'description', 'transaction_type'):
+        df[name] = df[name].str.strip()
+    df['currency'] = df['currency'].str.strip().str.upper().replace('', BASE_CURRENCY)
+    missing_id = df['id'] == ''
+    if missing_id.any():
+        df.loc[missing_id, 'id'] = 'legacy-' + pd.Series(df.index[missing_id], index=df.index[missing_id]).astype(str)
+
+    amounts, exact = validate_amounts(df['amount'])
+    if not exact.all():
+        # Старые записи: знак, ноль или больше двух знаков после точки
+        amounts[~exact] = [parse_minor(value) for value in df['amount'][~exact]]
+    df['amount'] = amounts
+    df['date'] = pd.to_datetime(df['date'].str[:10], format='%Y-%m-%d')
+    df = df[columns]
+
+    if changes:
+        # Журнал изменений невелик (см. COMPACTION_THRESHOLD), правки применяются построчно
+        hits = df.index[df['id'].isin(changes.keys())]
+        deleted = []
+        for index in hits:
+            op, t = changes[df.at[index, 'id']]
+            if op == 'edit':
+                df.loc[index, columns] = [t.amount, t.category, pd.Timestamp(t.date), t.description,
+                                          t.transaction_type, t.currency, t.id]
+            else:
+                deleted.append(index)
+        df = df.drop(index=deleted).reset_index(drop=True)
+    return df
+
+def read_tail(csv_offset: int = 0, changes_offset: int = 0, first_index: int = 0,
+              fingerprint: tuple = None, max_bytes: int = None) -> dict:
+    """Читает данные, дописанные в хранилище после указанных смещений.
+
+    Основной файл и журнал изменений читаются под разделяемой блокировкой
+    основного файла, поэтому уплотнение не может произойти между двумя
+    чтениями. Читается только зафиксированная часть файлов (до последнего
+    перевода строки), так что стоимость пропорциональна объему новых данных.
 
+    Args:
+        csv_offset (int, optional): Смещение в основном файле, с которого читать.
+            0 — читать файл целиком, включая заголовок.
+        changes_offset (int, optional): Смещение в журнале изменений.
+        first_index (int, optional): Сколько строк данных основного файла
+            уже прочитано (нужно для стабильных идентификаторов старых строк).
+        fingerprint (tuple, optional): Отпечаток файлов, полученный при
+            предыдущем чтении. Если файлы с тех пор были переписаны
+            (уплотнение, замена файла), чтение выполняется с начала.
+        max_bytes (int, optional): Читать из основного файла не больше примерно
+            `max_bytes` байт (до конца строки, пересекающей границу). Пока файл
+            прочитан не до конца, журнал изменений не читается: изменения
+            применяются, когда прочитаны все строки, к которым они относятся.
+
+    Returns:
+        dict: Словарь с ключами 'transactions' (новые операции основного файла),
+        'changes' (новые записи журнала изменений, см. :func:`apply_changes`),
+        'csv_offset' и 'changes_offset' (смещения после прочитанных данных),
+        'fingerprint' (отпечаток файлов для следующего чтения), 'reset'
+        (True, если смещения были сброшены и файлы прочитаны с начала)
+        и 'partial' (True, если основной файл прочитан не до конца из-за `max_bytes`).
+
+    Raises:
+        Exception: Ошибки чтения и разбора не перехватываются.
+    """
+    tail = {
+        'transactions': [],
+        'changes': {},
+        'csv_offset': csv_offset,
+        'changes_offset': changes_offset,
+        'fingerprint': None,
+        'reset': False,
+        'partial': False,
+    }
+    if not os.path.isfile(CSV_FILE):
+        if csv_offset or changes_offset:
+            tail.update(csv_offset=0, changes_offset=0, reset=True)
+        return tail
+
+    with _file_lock(CSV_FILE, exclusive=False):
+        if fingerprint is not None and fingerprint != _fingerprint(csv_offset, changes_offset):
+            csv_offset = changes_offset = first_index = 0
+            tail['reset'] = True
+        content, tail['csv_offset'] = _read_committed(CSV_FILE, csv_offset, max_bytes)
+        tail['partial'] = max_bytes is not None and tail['csv_offset'] - csv_offset >= max_bytes
+        fieldnames = None
+        if csv_offset > 0:
+            # Хвост файла не содержит заголовка — берем его из первой строки
+            with open(CSV_FILE, mode='r', encoding='utf-8', newline='') as f:
+                fieldnames = next(csv.reader(f))
+        if tail['partial']:
+            # Изменения читаются вместе с последней частью основного файла
+            tail['changes_offset'] = changes_offset
+        elif os.path.isfile(CHANGES_FILE):
+            with _file_lock(CHANGES_FILE, exclusive=False):
+                tail['changes'], tail['changes_offset'] = _read_changes_unlocked(changes_offset)
+        else:
+            tail['changes_offset'] = 0
+        tail['fingerprint'] = _fingerprint(tail['csv_offset'], tail['changes_offset'])
+
+    tail['transactions'] = parse_rows(content, fieldnames, first_index)
+    return tail
+
+def _fingerprint(csv_offset: int, changes_offset: int) -> tuple:
+    """Вычисляет отпечаток прочитанной части основного файла и журнала изменений.
+
+    Для каждого файла берутся номер inode и хеш последних байт перед
+    смещением: при атомарной замене файла меняется inode, при усечении
+    и повторной записи — содержимое перед смещением.
+    """
+    parts = []
+    for path, offset in ((CSV_FILE, csv_offset), (CHANGES_FILE, changes_offset)):
+        if offset == 0:
+            parts.append(None)     # из файла еще ничего не прочитано
+            continue
+        if not os.path.isfile(path):
+            parts.append(('missing',))
+            continue
+        with open(path, mode='rb') as f:
+            info = os.fstat(f.fileno())
+            if info.st_size < offset:
+                parts.append(('truncated',))
+                continue
+            f.seek(max(0, offset - _FINGERPRINT_BYTES))
+            data = f.read(min(offset, _FINGERPRINT_BYTES))
+        parts.append((info.st_ino, hashlib.sha256(data).hexdigest()))
+    return tuple(parts)
+
+def _read_committed(path: str, offset: int = 0, max_bytes: int = None) -> tuple:
+    """Читает зафиксированную часть файла начиная со смещения.
+
+    Args:
+        path (str): Путь к файлу.
+        offset (int, optional): Смещение в байтах, с которого начинать чтение.
+        max_bytes (int, optional): Сколько байт читать; строка, пересекающая
+            границу, дочитывается целиком. По умолчанию — до конца файла.
+
+    Returns:
+        tuple: (текст до последнего перевода строки включительно,
+        смещение сразу после прочитанных данных).
+    """
+    with open(path, mode='rb') as f:
+        f.seek(offset)
+        if max_bytes is None:
+            data = f.read()
+        else:
+            data = f.read(max_bytes) + f.readline()
+    end = data.rfind(b'\n') + 1
+    return data[:end].decode('utf-8'), offset + end
+
+def _row_to_transaction(row: dict, index: int) -> Transaction:
+    """Создает объект Transaction из строки CSV.
+
+    Args:
+        row (dict): Строка CSV со строковыми значениями.
+        index (int): Порядковый номер строки в файле (для старых строк без 'id').
+
+    Returns:
+        Transaction: Восстановленная операция.
+    """
+    return Transaction(
+            amount=parse_minor(row['amount']),
+            category=row['category'],
+            date=row['date'][:10],  # старые файлы содержат время
+            description=row.get('description') or '',
+            transaction_type=row['transaction_type'],
+            currency=row.get('currency') or BASE_CURRENCY,
+            id=row.get('id') or _legacy_id(index)
+        )
+
+def parse_rows(content: str, fieldnames: list = None, first_index: int = 0) -> list:
+    """Разбирает CSV-текст в список операций.
+
+    Args:
+        content (str): Текст CSV.
+        fieldnames (list[str], optional): Имена колонок, если текст не начинается
+            с заголовка (например, при чтении хвоста файла).
+        first_index (int, optional): Порядковый номер первой строки данных.
+
+    Returns:
+        list[Transaction]: Операции в порядке файла.
+    """
+    reader = csv.DictReader(io.StringIO(content, newline=''), fieldnames=fieldnames)
+    return [_row_to_transaction(row, first_index + i) for i, row in enumerate(reader)]
+
+def iter_rows(f, chunk_rows: int = 100_000):
+    """Разбирает открытый CSV-файл частями, не читая его в память целиком.
+
+    Args:
+        f (TextIO): Файл, открытый с ``newline=''``; первая строка — заголовок.
+        chunk_rows (int, optional): Сколько операций в одной части.
+
+    Yields:
+        list[Transaction]: Операции очередной части в порядке файла.
+    """
+    reader = csv.DictReader(f)
+    index = 0
+    while True:
+        chunk = [_row_to_transaction(row, index + i) for i, row in enumerate(itertools.islice(reader, chunk_rows))]
+        if not chunk:
+            return
+        index += len(chunk)
+        yield chunk
+
+def apply_changes(transactions: list, changes: dict) -> list:
+    """Применяет журнал изменений к списку операций.
+
+    Удаленные операции исключаются, измененные заменяются новой версией
+    на прежнем месте. Изменения операций, которых нет в списке, игнорируются.
+
+    Args:
+        transactions (list[Transaction]): Операции из основного файла.
+        changes (dict): Последнее изменение для каждого идентификатора:
+            ``{id: ('delete', None)}`` или ``{id: ('edit', Transaction)}``.
+
+    Returns:
+        list[Transaction]: Актуальный список операций.
+    """
+    if not changes:
+        return transactions
+
+    result = []
+    for t in transactions:
+        change = changes.get(t.id)
+        if change is None:
+            result.append(t)
+        elif change[0] == 'edit':
+            result.append(change[1])
+    return result
+
+def _append_change(op: str, row: dict):
+    """Дописывает одну запись в журнал изменений (O(1) независимо от размера журнала)."""
+    ensure_data_dir()
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CHANGE_FIELDNAMES)
+    writer.writerow(dict(row, op=op))
+
+    with _file_lock(CHANGES_FILE, exclusive=True):
+        with open(CHANGES_FILE, mode='a', newline='', encoding='utf-8') as f:
+            if f.tell() == 0:
+                header = io.StringIO()
+                csv.DictWriter(header, fieldnames=CHANGE_FIELDNAMES).writeheader()
+                f.write(header.getvalue())
+            f.write(buffer.getvalue())
+            f.flush()
+            os.fsync(f.fileno())
+            size = f.tell()
+
+    if size > COMPACTION_THRESHOLD:
+        compact_in_background()
+
+def edit_transaction(transaction):
+    """Записывает новую версию операции в журнал изменений.
+
+    Основной файл не переписывается: версия с тем же `id` заменит
+    прежнюю при загрузке (см. :func:`apply_changes`).
+
+    Args:
+        transaction (Transaction): Новая версия операции (с прежним `id`).
+    """
+    _append_change('edit', transaction_to_row(transaction))
+
+def delete_transaction(transaction_id: str):
+    """Записывает удаление операции (tombstone) в журнал изменений.
+
+    Args:
+        transaction_id (str): Идентификатор удаляемой операции.
+    """
+    _append_change('delete', {'id': transaction_id})
+
+def compact():
+    """Переносит журнал изменений в основной файл и очищает журнал.
+
+    Основной файл переписывается атомарно: актуальные операции записываются
+    во временный файл, который затем заменяет основной через :func:`os.replace`.
+    Операция выполняется под эксклюзивными блокировками обоих файлов.
+    """
+    if not os.path.isfile(CSV_FILE) or not os.path.isfile(CHANGES_FILE):
+        return
+
+    with _file_lock(CSV_FILE, exclusive=True):
+        with _file_lock(CHANGES_FILE, exclusive=True):
+            content, _ = _read_committed(CSV_FILE)
+            transactions = apply_changes(parse_rows(content), _read_changes_unlocked()[0])
+
+            tmp_path = CSV_FILE + '.tmp'
+            with open(tmp_path, mode='w', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+                writer.writeheader()
+                for t in transactions:
+                    writer.writerow(transaction_to_row(t))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, CSV_FILE)
+
+            # Журнал очищается только после успешной замены основного файла
+            with open(CHANGES_FILE, mode='w', encoding='utf-8'):
+                pass
+
+def _read_changes_unlocked(offset: int = 0) -> tuple:
+    """Читает журнал изменений, когда блокировка уже захвачена вызывающим кодом.
+
+    Args:
+        offset (int, optional): Смещение, с которого читать журнал.
+
+    Returns:
+        tuple: (словарь изменений, см. :func:`apply_changes`; смещение после
+        прочитанных данных).
+    """
+    changes = {}
+    content, end = _read_committed(CHANGES_FILE, offset)
+    fieldnames = CHANGE_FIELDNAMES if offset > 0 else None
+    for row in csv.DictReader(io.StringIO(content, newline=''), fieldnames=fieldnames):
+        if row['op'] == 'delete':
+            changes[row['id']] = ('delete', None)
+        else:
+            changes[row['id']] = ('edit', _row_to_transaction(row, 0))
+    return changes, end
+
+_compaction_thread = None
+
+def compact_in_background():
+    """Запускает уплотнение в фоновом потоке, если оно еще не выполняется."""
+    global _compaction_thread
+    if _compaction_thread is not None and _compaction_thread.is_alive():
+        return
+
+    def run():
+        try:
+            compact()
+        except Exception as e:
+            print(f'Ошибка при уплотнении данных: {e}')
+
+    _compaction_thread = threading.Thread(target=run, daemon=True)
+    _compaction_thread.start()
+
+
+def load_rates(path: str = None) -> pd.DataFrame:
+    """Загружает локальную таблицу курсов валют.
+
+    Файл имеет колонки 'date' (YYYY-MM-DD), 'currency' (код валюты) и 'rate' —
+    стоимость одной единицы валюты в базовой валюте :data:`models.BASE_CURRENCY`
+    на указанную дату. Курс действует до следующей даты в таблице.
+    Сетевые источники не используются.
+
+    Args:
+        path (str, optional): Путь к файлу курсов. По умолчанию `RATES_FILE`.
+
+    Returns:
+        pd.DataFrame: Таблица с колонками 'date' (datetime64), 'currency' и 'rate'
+        (float64), отсортированная по дате. Если файла нет, таблица пуста.
+
+    Raises:
+        ValueError: Если в файле отсутствуют обязательные колонки.
+    """
+    path = path or RATES_FILE
+    if not os.path.isfile(path):
+        return pd.DataFrame({
+            'date': pd.Series(dtype='datetime64[ns]'),
+            'currency': pd.Series(dtype=object),
+            'rate': pd.Series(dtype='float64'),
+        })
+
+    rates = pd.read_csv(path, dtype={'currency': str, 'rate': 'float64'})
+    missing = {'date', 'currency', 'rate'} - set(rates.columns)
+    if missing:
+        raise ValueError(f"В таблице курсов нет колонок: {', '.join(sorted(missing))}")
+
+    rates = rates[['date', 'currency', 'rate']]
+    rates['date'] = pd.to_datetime(rates['date'], format='%Y-%m-%d')
+    rates['currency'] = rates['currency'].str.strip().str.upper()
+    return rates.sort_values('date', kind='stable').reset_index(drop=True)
+
+
+def load_budgets(path: str = None) -> dict:
+    """Загружает лимиты бюджетов.
+
+    Файл имеет колонки 'category', 'period' ('week', 'month' или 'year')
+    и 'limit' — лимит расходов в базовой валюте.
+
+    Args:
+        path (str, optional): Путь к файлу бюджетов. По умолчанию `BUDGETS_FILE`.
+
+    Returns:
+        dict: Лимиты в копейках: ``{(категория, период): сумма}``.
+        Если файла нет, словарь пуст.
+
+    Raises:
+        ValueError: Если сумма лимита записана неверно.
+    """
+    path = path or BUDGETS_FILE
+    if not os.path.isfile(path):
+        return {}
+
+    with open(path, mode='r', encoding='utf-8', newline='') as f:
+        return {(row['category'], row['period']): parse_minor(row['limit']) for row in csv.DictReader(f)}
+
+
+def save_budgets(limits: dict, path: str = None):
+    """Атомарно перезаписывает файл бюджетов.
+
+    Args:
+        limits (dict): Лимиты в копейках: ``{(категория, период): сумма}``.
+        path (str, optional): Путь к файлу бюджетов. По умолчанию `BUDGETS_FILE`.
+    """
+    path = path or BUDGETS_FILE
+    ensure_data_dir()
+    tmp_path = path + '.tmp'
+    with open(tmp_path, mode='w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=BUDGET_FIELDNAMES)
+        writer.writeheader()
+        for (category, period), limit in sorted(limits.items()):
+            writer.writerow({'category': category, 'period': period, 'limit': format_minor(limit)})
+    os.replace(tmp_path, path)
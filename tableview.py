@@ -0,0 +1,198 @@
+import numpy as np
+import pandas as pd
+from models import TransactionColumns
+
+
+# Колонки таблицы истории: ключ сортировки и тип массива ключей
+SORT_KEYS = {
+    'type': (lambda t: t.transaction_type, object),
+    'amount': (lambda t: t.amount, np.int64),
+    'category': (lambda t: t.category.casefold(), object),
+    'date': (lambda t: t.date.toordinal(), np.int64),
+    'description': (lambda t: t.description.casefold(), object),
+}
+
+# Те же ключи, вычисленные по столбцам журнала (см. :class:`models.TransactionColumns`);
+# 719163 — порядковый номер 1970-01-01 (datetime.date.toordinal)
+COLUMN_KEYS = {
+    'type': lambda c: c.column('transaction_type'),
+    'amount': lambda c: c.column('amount'),
+    'category': lambda c: np.array([s.casefold() for s in c.column('category').tolist()], dtype=object),
+    'date': lambda c: c.column('date').astype('datetime64[D]').astype(np.int64) + 719163,
+    'description': lambda c: np.array([s.casefold() for s in c.column('description').tolist()], dtype=object),
+}
+
+
+def _keys(column: str, transactions) -> np.ndarray:
+    """Извлекает массив ключей сортировки колонки."""
+    if isinstance(transactions, TransactionColumns):
+        return COLUMN_KEYS[column](transactions)
+    key, dtype = SORT_KEYS[column]
+    if dtype is np.int64:
+        return np.fromiter((key(t) for t in transactions), dtype=np.int64, count=len(transactions))
+    return np.array([key(t) for t in transactions], dtype=dtype)
+
+
+class SortedView:
+    """Отсортированное представление журнала для виртуальной таблицы.
+
+    Для каждой колонки один раз вычисляется перестановка строк
+    (устойчивый argsort по ключам колонки), которая затем кэшируется.
+    Дописанные в конец журнала операции вливаются в кэшированные
+    перестановки слиянием (сортируются только новые ключи, позиции вставки
+    ищутся бинарным поиском), поэтому повторная сортировка и переключение
+    между колонками не требуют ни сортировки всего журнала, ни чтения
+    строк из виджета. Таблица запрашивает только видимое окно строк
+    через :meth:`window`.
+
+    Attributes:
+        transactions (list[Transaction]): Операции в порядке журнала.
+        column (str): Колонка сортировки или None (порядок журнала).
+        descending (bool): Сортировка по убыванию.
+    """
+
+    def __init__(self, transactions=None):
+        """Создает представление.
+
+        Args:
+            transactions (list[Transaction], optional): Операции в порядке журнала.
+        """
+        self.column = None
+        self.descending = False
+        self.reset([] if transactions is None else transactions)
+
+    def __len__(self):
+        return self._size
+
+    def reset(self, transactions):
+        """Заменяет журнал целиком и сбрасывает кэш перестановок.
+
+        Args:
+            transactions (list[Transaction]): Операции в порядке журнала.
+        """
+        self.transactions = transactions
+        self._size = len(transactions)
+        # Колонка -> (перестановка строк, ключи в отсортированном порядке)
+        self._indexes = {}
+
+    def extend(self, appended):
+        """Вливает операции, дописанные в конец журнала, в кэшированные перестановки.
+
+        Args:
+            appended (list[Transaction]): Новые операции; в `transactions`
+                они должны идти сразу за уже учтенными строками.
+        """
+        if not appended:
+            return
+        first = self._size
+        self._size += len(appended)
+        for column, (order, sorted_keys) in self._indexes.items():
+            keys = _keys(column, appended)
+            new_order = np.argsort(keys, kind='stable')
+            new_keys = keys[new_order]
+            # side='right': при равных ключах новые строки встают после старых,
+            # как при устойчивой сортировке всего журнала
+            positions = np.searchsorted(sorted_keys, new_keys, side='right')
+            self._indexes[column] = (
+                np.insert(order, positions, new_order + first),
+                np.insert(sorted_keys, positions, new_keys),
+            )
+
+    def update(self, transactions, deleted, edited, appended):
+        """Применяет правки и удаления к кэшированным перестановкам без пересортировки.
+
+        Строки удаленных и измененных операций убираются из перестановок,
+        индексы остальных сдвигаются на число удаленных строк перед ними,
+        а новые версии измененных операций вставляются бинарным поиском
+        на то место, которое они заняли бы при устойчивой сортировке.
+        Ключи вычисляются только для измененных и дописанных строк.
+
+        Args:
+            transactions (list[Transaction]): Новый журнал: прежний без удаленных
+                строк, с новыми версиями измененных и с `appended` в конце.
+            deleted (list[int]): Позиции удаленных строк в прежнем журнале.
+            edited (list[int]): Позиции измененных строк в прежнем журнале.
+            appended (list[Transaction]): Операции, дописанные в конец.
+        """
+        deleted = np.sort(np.asarray(deleted, dtype=np.int64))
+        edited = np.sort(np.asarray(edited, dtype=np.int64))
+        stale = np.concatenate([deleted, edited])
+        # Позиции измененных строк в новом журнале
+        moved = edited - np.searchsorted(deleted, edited)
+
+        for column, (order, sorted_keys) in self._indexes.items():
+            keep = ~np.isin(order, stale)
+            order = order[keep]
+            sorted_keys = sorted_keys[keep]
+            order = order - np.searchsorted(deleted, order)
+            if len(moved):
+                keys = _keys(column, [transactions[i] for i in moved.tolist()])
+                # Среди равных ключей строки идут по возрастанию индекса
+                positions = np.empty(len(moved), dtype=np.int64)
+                for i, (key, index) in enumerate(zip(keys, moved.tolist())):
+                    lo = np.searchsorted(sorted_keys, key, side='left')
+                    hi = np.searchsorted(sorted_keys, key, side='right')
+                    positions[i] = lo + np.searchsorted(order[lo:hi], index)
+                # Вставки в одну позицию должны идти в порядке ключей и индексов
+                rank = np.argsort(keys, kind='stable')
+                order = np.insert(order, positions[rank], moved[rank])
+                sorted_keys = np.insert(sorted_keys, positions[rank], keys[rank])
+            self._indexes[column] = (order, sorted_keys)
+
+        self.transactions = transactions
+        self._size -= len(deleted)
+        self.extend(appended)
+
+    def order(self, column: str = None) -> np.ndarray:
+        """Возвращает перестановку строк по возрастанию ключей колонки.
+
+        Args:
+            column (str, optional): Колонка из :data:`SORT_KEYS`. None — порядок журнала.
+
+        Returns:
+            numpy.ndarray: Индексы строк в `transactions`.
+
+        Raises:
+            ValueError: Если колонка неизвестна.
+        """
+        if column is None:
+            return np.arange(self._size)
+        if column not in SORT_KEYS:
+            raise ValueError(f"Колонка сортировки должна быть одной из: {', '.join(SORT_KEYS)}")
+        if column not in self._indexes:
+            keys = _keys(column, self.transactions[:self._size])
+            if keys.dtype == object:
+                # Строки сортируются через коды в порядке уникальных значений:
+                # argsort целых кодов намного быстрее сравнения Python-объектов
+                codes, _ = pd.factorize(keys, sort=True)
+                order = np.argsort(codes, kind='stable')
+            else:
+                order = np.argsort(keys, kind='stable')
+            self._indexes[column] = (order, keys[order])
+        return self._indexes[column][0]
+
+    def sort(self, column: str = None, descending: bool = False):
+        """Задает порядок строк (без копирования и пересортировки журнала).
+
+        Args:
+            column (str, optional): Колонка сортировки. None — порядок журнала.
+            descending (bool, optional): Сортировать по убыванию.
+        """
+        self.order(column)
+        self.column = column
+        self.descending = descending
+
+    def window(self, start: int, count: int) -> list:
+        """Возвращает операции видимого окна таблицы в текущем порядке.
+
+        Args:
+            start (int): Позиция первой строки окна.
+            count (int): Количество строк окна.
+
+        Returns:
+            list[Transaction]: Операции окна.
+        """
+        order = self.order(self.column)
+        if self.descending:
+            order = order[::-1]
+        return [self.transactions[i] for i in order[start:start + count].tolist()]
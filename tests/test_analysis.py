@@ -2,18 +2,18 @@ import datetime
 import pytest
 import pandas as pd
 from models import Transaction
-from analysis import transactions_to_df, group_by_category, plot_pie_by_category, plot_income_expence_over_time
+from analysis import transactions_to_df, group_by_category, plot_pie_by_category, plot_income_expence_over_time, CurrencyConverter
 
 
 @pytest.fixture
 def sample_transactions():
     """Создает список из 5 транзакций для тестов."""
     return [
-        Transaction(100.0, "Еда", "2026-01-01", "Кофе", "expense"),
-        Transaction(5000.0, "Зарплата", "2026-01-05", "Аванс", "income"),
-        Transaction(1500.0, "Транспорт", "2026-01-02", "Проездной", "expense"),
-        Transaction(200.0, "Еда", "2026-01-04", "Обед", "expense"),
-        Transaction(300.0, "Зарплата", "2026-01-06", "Бонус", "income")
+        Transaction(10000, "Еда", "2026-01-01", "Кофе", "expense"),
+        Transaction(500000, "Зарплата", "2026-01-05", "Аванс", "income"),
+        Transaction(150000, "Транспорт", "2026-01-02", "Проездной", "expense"),
+        Transaction(20000, "Еда", "2026-01-04", "Обед", "expense"),
+        Transaction(30000, "Зарплата", "2026-01-06", "Бонус", "income")
     ]
 
 @pytest.fixture
@@ -28,21 +28,76 @@ def test_transactions_to_df(sample_transactions):
     
     assert isinstance(df, pd.DataFrame)
     assert len(df) == 5
-    assert list(df.columns) == ['amount', 'category', 'date', 'description', 'transaction_type']
+    assert list(df.columns) == ['amount', 'category', 'date', 'description', 'transaction_type', 'currency']
     assert pd.api.types.is_datetime64_any_dtype(df['date'])
 
 def test_group_by_category_logic(sample_df):
     """Проверка правильности группировки и суммирования."""
-    # Проверяем расходы (expense): Еда (100+200) и Транспорт (1500)
+    # Проверяем расходы (expense): Еда (100+200) и Транспорт (1500), в копейках
     expenses = group_by_category(sample_df, "expense")
-    assert expenses["Еда"] == 300.0
-    assert expenses["Транспорт"] == 1500.0
+    assert expenses["Еда"] == 30000
+    assert expenses["Транспорт"] == 150000
     
     # Проверяем доходы (income): Зарплата (5000+300)
     income = group_by_category(sample_df, "income")
-    assert income["Зарплата"] == 5300.0
+    assert income["Зарплата"] == 530000
+    assert income.dtype == 'int64'
 
 def test_dataframe_types(sample_df):
     """Проверка типов колонок после преобразования."""
-    assert sample_df['amount'].dtype == 'float64'
+    assert sample_df['amount'].dtype == 'int64'
     assert sample_df['category'].dtype == 'object'
+
+@pytest.fixture
+def rates():
+    """Таблица курсов USD и EUR к рублю."""
+    return pd.DataFrame({
+        'date': pd.to_datetime(['2026-01-01', '2026-01-03', '2026-01-01']),
+        'currency': ['USD', 'USD', 'EUR'],
+        'rate': [90.0, 100.0, 110.0],
+    })
+
+def test_currency_converter_asof_join(rates):
+    """Курс берется на дату операции или ближайшую предыдущую."""
+    df = transactions_to_df([
+        Transaction(1000, "Еда", "2026-01-02", currency="USD"),
+        Transaction(1000, "Еда", "2026-01-04", currency="USD"),
+        Transaction(1000, "Еда", "2026-01-04", currency="EUR"),
+        Transaction(1000, "Еда", "2026-01-01"),
+    ])
+    converter = CurrencyConverter(rates)
+
+    rub = converter.convert(df, 'RUB')
+    assert list(rub['amount']) == [90000, 100000, 110000, 1000]
+    assert (rub['currency'] == 'RUB').all()
+
+    usd = converter.convert(df, 'USD')
+    assert usd['amount'].iloc[3] == 11     # 10 RUB / 90 = 0.11 USD
+    assert converter.convert(df, 'USD', version='v1') is converter.convert(df, 'USD', version='v1')
+
+    df.loc[3, 'amount'] = 9000     # без версии правка на месте учитывается сразу
+    assert converter.convert(df, 'USD')['amount'].iloc[3] == 100
+    assert converter.convert(df, 'USD', version='v2')['amount'].iloc[3] == 100
+
+def test_currency_converter_invalidation_and_missing(rates):
+    """Замена курсов сбрасывает кэш; отсутствие курса вызывает ошибку."""
+    df = transactions_to_df([Transaction(100, "Еда", "2026-01-05", currency="USD")])
+    converter = CurrencyConverter(rates)
+    first = converter.convert(df, version='v1')
+
+    converter.set_rates(rates.assign(rate=rates['rate'] * 2))
+    assert converter.convert(df, version='v1')['amount'].iloc[0] == first['amount'].iloc[0] * 2
+
+    early = transactions_to_df([Transaction(100, "Еда", "2025-12-31", currency="USD")])
+    with pytest.raises(ValueError, match="Нет курса USD"):
+        converter.convert(early)
+
+def test_currency_converter_dates_before_1677(rates):
+    """Даты вне диапазона наносекундного datetime64 пересчитываются без ошибок."""
+    df = transactions_to_df([
+        Transaction(100, "Еда", "1600-01-02", currency="USD"),
+        Transaction(100, "Еда", "1026-01-01"),
+    ])
+    old = pd.DataFrame({'date': pd.to_datetime(['1600-01-01']), 'currency': ['USD'], 'rate': [2.0]})
+    converter = CurrencyConverter(pd.concat([old, rates], ignore_index=True))
+    assert list(converter.convert(df)['amount']) == [200, 100]
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from analysis import transactions_to_df
+from anomaly import AnomalyDetector
+from models import Transaction
+
+
+def _history():
+    rng = np.random.default_rng(1)
+    amounts = np.rint(np.exp(rng.normal(np.log(50000), 0.3, size=60))).astype(int)
+    return [
+        Transaction(int(a), "Продукты", f"2026-01-{i % 28 + 1:02d}")
+        for i, a in enumerate(amounts)
+    ] + [Transaction(900000, "Зарплата", "2026-01-05", transaction_type='income')]
+
+
+def test_fit_matches_online_updates():
+    """Векторная инициализация дает ту же статистику, что и поштучные обновления."""
+    history = _history()
+    fitted = AnomalyDetector()
+    fitted.fit(transactions_to_df(history))
+    online = AnomalyDetector()
+    for t in history:
+        online.update(t)
+
+    probe = Transaction(80000, "Продукты", "2026-02-03")
+    a, b = fitted.score(probe), online.score(probe)
+    assert a['z'] == pytest.approx(b['z'])
+    assert a['upper'] == pytest.approx(b['upper'])
+
+def test_remove_undoes_update():
+    """Удаление операции возвращает статистику к состоянию без нее."""
+    history = _history()
+    outlier = Transaction(5000000, "Продукты", "2026-01-10")
+    detector = AnomalyDetector()
+    detector.fit(transactions_to_df(history + [outlier]))
+    detector.remove(outlier)
+    expected = AnomalyDetector()
+    expected.fit(transactions_to_df(history))
+
+    probe = Transaction(80000, "Продукты", "2026-02-03")
+    a, b = detector.score(probe), expected.score(probe)
+    assert a['z'] == pytest.approx(b['z'])
+    assert a['expected'] == b['expected']
+    assert a['upper'] == pytest.approx(b['upper'])
+
+def test_outlier_is_flagged():
+    """Сумма далеко за пределами нормы категории помечается, обычная — нет."""
+    detector = AnomalyDetector()
+    detector.fit(transactions_to_df(_history()))
+
+    assert detector.score(Transaction(5000000, "Продукты", "2026-02-03"))['anomaly']
+    assert not detector.score(Transaction(52000, "Продукты", "2026-02-03"))['anomaly']
+    assert detector.score(Transaction(5000000, "Путешествия", "2026-02-03")) is None
+
+def test_batch_scoring_matches_single():
+    """Пакетная оценка совпадает с поштучной и не меняет статистику."""
+    detector = AnomalyDetector()
+    detector.fit(transactions_to_df(_history()))
+    imported = [
+        Transaction(5000000, "Продукты", "2026-02-03"),
+        Transaction(45000, "Продукты", "2026-02-07"),
+        Transaction(100, "Кино", "2026-02-07"),
+    ]
+    scored = detector.score_df(transactions_to_df(imported))
+
+    assert scored['anomaly'].tolist() == [True, False, False]
+    assert scored['z'].iloc[1] == pytest.approx(detector.score(imported[1])['z'])
+    assert np.isnan(scored['z'].iloc[2])
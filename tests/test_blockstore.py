@@ -0,0 +1,96 @@
+import os
+import json
+import pytest
+from models import Transaction
+from blockstore import BlockWriter, BlockReader, GARBAGE_RATIO, MAGIC, _read_index
+
+
+@pytest.fixture
+def transactions():
+    """100 операций за 100 дней подряд."""
+    return [
+        Transaction(100 + i, "Еда", f"2026-{1 + i // 28:02d}-{1 + i % 28:02d}", f"№{i}")
+        for i in range(100)
+    ]
+
+
+@pytest.mark.parametrize('codec', ['zlib', 'lzma'])
+def test_roundtrip_and_index(tmp_path, transactions, codec):
+    """Операции записываются блоками и читаются без потерь."""
+    path = str(tmp_path / 'archive.fpb')
+    with BlockWriter(path, codec=codec, block_rows=30) as writer:
+        writer.write(transactions)
+
+    reader = BlockReader(path)
+    assert [block['rows'] for block in reader.blocks] == [30, 30, 30, 10]
+    loaded = reader.read()
+    assert [(t.id, t.amount, t.description) for t in loaded] == [
+        (t.id, t.amount, t.description) for t in transactions
+    ]
+    assert [t.id for t in reader.read(workers=1)] == [t.id for t in loaded]
+
+def test_range_read_touches_only_needed_blocks(tmp_path, transactions, monkeypatch):
+    """Чтение по диапазону дат распаковывает только пересекающиеся блоки."""
+    path = str(tmp_path / 'archive.fpb')
+    with BlockWriter(path, block_rows=30) as writer:
+        writer.write(transactions)
+
+    reader = BlockReader(path)
+    touched = []
+    original = reader._read_block
+    monkeypatch.setattr(reader, '_read_block', lambda block: touched.append(block['offset']) or original(block))
+
+    loaded = reader.read('2026-02-05', '2026-02-09')
+    assert [t.date.strftime('%Y-%m-%d') for t in loaded] == [f'2026-02-0{d}' for d in range(5, 10)]
+    assert len(touched) == 1
+
+def test_append_to_existing_archive(tmp_path, transactions):
+    """Повторное открытие дописывает блоки и сохраняет прежний индекс."""
+    path = str(tmp_path / 'archive.fpb')
+    with BlockWriter(path, block_rows=40) as writer:
+        writer.write(transactions[:50])
+    with BlockWriter(path, block_rows=40) as writer:
+        writer.write(transactions[50:])
+
+    reader = BlockReader(path)
+    assert reader.rows == 100
+    assert [t.id for t in reader.read()] == [t.id for t in transactions]
+
+def test_interrupted_append_keeps_archive(tmp_path, transactions):
+    """Если дописывание прервано до close(), прежние блоки остаются читаемыми."""
+    path = str(tmp_path / 'archive.fpb')
+    with BlockWriter(path, block_rows=40) as writer:
+        writer.write(transactions[:50])
+
+    writer = BlockWriter(path, block_rows=40)
+    writer.write(transactions[50:])  # один блок запечатан, индекс не записан
+    writer._file.flush()
+    reader = BlockReader(path)
+    assert [t.id for t in reader.read()] == [t.id for t in transactions[:50]]
+    writer._file.close()
+
+    with BlockWriter(path, block_rows=40) as writer:
+        writer.write(transactions[50:])
+    assert [t.id for t in BlockReader(path).read()] == [t.id for t in transactions]
+
+def test_repeated_appends_do_not_accumulate_indexes(tmp_path, transactions):
+    """Устаревшие индексы от дописываний вычищаются, и архив не растет без предела."""
+    path = str(tmp_path / 'archive.fpb')
+    for t in transactions:
+        with BlockWriter(path) as writer:
+            writer.write([t])
+
+    reader = BlockReader(path)
+    assert [t.id for t in reader.read()] == [t.id for t in transactions]
+    live = sum(block['length'] for block in reader.blocks)
+    with open(path, 'rb') as f:
+        index, _ = _read_index(f)
+    assert index['garbage'] <= live * GARBAGE_RATIO
+    assert os.path.getsize(path) <= len(MAGIC) + live * (1 + GARBAGE_RATIO) + 2 * len(json.dumps(index))
+
+def test_rejects_unclosed_file(tmp_path):
+    """Незакрытый или чужой файл не принимается за архив."""
+    path = tmp_path / 'broken.fpb'
+    path.write_bytes(b'not an archive at all, definitely')
+    with pytest.raises(ValueError):
+        BlockReader(str(path))
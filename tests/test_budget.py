@@ -0,0 +1,87 @@
+import datetime
+import pytest
+import storage
+from analysis import transactions_to_df
+from budget import BudgetTracker, period_key
+from cube import AggregationCube
+from models import Transaction
+
+
+def _history():
+    return [
+        Transaction(3000, "Еда", "2026-01-05"),
+        Transaction(2000, "Еда", "2026-01-14"),
+        Transaction(4000, "Еда", "2026-02-02"),
+        Transaction(9000, "Транспорт", "2026-01-14"),
+        Transaction(50000, "Зарплата", "2026-01-10", transaction_type='income'),
+    ]
+
+
+def test_rebuild_matches_online_updates():
+    """Векторный пересчет дает те же счетчики, что и поштучный учет расходов."""
+    history = _history()
+    rebuilt = BudgetTracker()
+    rebuilt.rebuild(transactions_to_df(history))
+    online = BudgetTracker()
+    for t in history:
+        if t.transaction_type == 'expense':
+            online.add(t.category, t.amount, t.date)
+
+    assert rebuilt.spent == online.spent
+    assert rebuilt.spent[("Еда", 'month', '2026-01')] == 5000
+    assert rebuilt.spent[("Еда", 'year', '2026')] == 9000
+    assert rebuilt.spent[("Еда", 'week', period_key(datetime.date(2026, 1, 14), 'week'))] == 2000
+
+
+def test_rebuild_from_cube_cells():
+    """Счетчики по дневным ячейкам куба совпадают со счетчиками по строкам."""
+    df = transactions_to_df(_history())
+    from_rows = BudgetTracker()
+    from_rows.rebuild(df)
+    from_cube = BudgetTracker()
+    from_cube.add_cube(AggregationCube.from_df(df))
+    assert from_cube.spent == from_rows.spent
+
+
+def test_check_warns_and_reports_excess():
+    """Проверка предупреждает при приближении к лимиту и сообщает о превышении."""
+    tracker = BudgetTracker({("Еда", 'month'): 10000, ("Еда", 'year'): 100000})
+    tracker.rebuild(transactions_to_df(_history()))
+    day = datetime.date(2026, 1, 20)
+
+    assert tracker.check("Еда", 500, day) == []
+    [warning] = tracker.check("Еда", 3000, day)
+    assert (warning['period'], warning['status'], warning['spent']) == ('month', 'warning', 8000)
+    [excess] = tracker.check("Еда", 5001, day)
+    assert excess['status'] == 'exceeded'
+    # Проверка не меняет счетчики
+    assert tracker.spent_in("Еда", 'month', day) == 5000
+
+
+def test_report_uses_current_periods():
+    """Бюджет против факта строится за периоды, в которые попадает дата."""
+    tracker = BudgetTracker({("Еда", 'year'): 20000, ("Еда", 'month'): 6000})
+    tracker.rebuild(transactions_to_df(_history()))
+    report = tracker.report(datetime.date(2026, 2, 10))
+
+    assert list(report['period']) == ['month', 'year']
+    assert list(report['spent']) == [4000, 9000]
+    assert list(report['remaining']) == [2000, 11000]
+
+
+def test_invalid_limits_rejected():
+    tracker = BudgetTracker()
+    with pytest.raises(ValueError):
+        tracker.set_limit("Еда", 'day', 100)
+    with pytest.raises(ValueError):
+        tracker.set_limit("Еда", 'month', 0)
+
+
+def test_budgets_roundtrip(tmp_path, monkeypatch):
+    """Лимиты сохраняются в CSV и загружаются обратно в копейках."""
+    monkeypatch.setattr(storage, 'DATA_DIR', str(tmp_path))
+    monkeypatch.setattr(storage, 'BUDGETS_FILE', str(tmp_path / 'budgets.csv'))
+    assert storage.load_budgets() == {}
+    limits = {("Еда", 'month'): 1500050, ("Транспорт", 'week'): 300000}
+    storage.save_budgets(limits)
+    assert storage.load_budgets() == limits
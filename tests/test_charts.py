@@ -0,0 +1,67 @@
+import os
+import pandas as pd
+import pytest
+from charts import ChartCache, chart_key, ledger_version, render
+from checkpoint import Ledger
+from cube import AggregationCube
+
+
+@pytest.fixture
+def cube():
+    return AggregationCube.from_df(pd.DataFrame({
+        'amount': [10000, 5000, 90000],
+        'category': ['Еда', 'Кафе', 'Зарплата'],
+        'date': pd.to_datetime(['2026-01-05', '2026-01-20', '2026-02-01']),
+        'transaction_type': ['expense', 'expense', 'income'],
+    }))
+
+
+def test_render_png_and_empty_period(cube):
+    """График отрисовывается в PNG; за пустой период изображения нет."""
+    assert render(cube, 'expense').startswith(b'\x89PNG')
+    assert render(cube, 'trend', '2026').startswith(b'\x89PNG')
+    assert render(cube, 'income', '2026-01') is None
+    with pytest.raises(ValueError):
+        render(cube, 'bar')
+
+def test_cache_renders_once_and_evicts(cube):
+    """Повторный запрос берется из кэша; старые записи вытесняются по LRU."""
+    cache = ChartCache(capacity=2)
+    calls = []
+    factory = lambda: calls.append(1) or cube
+
+    first = cache.get_or_render('expense', None, 'v1', factory)
+    assert cache.get_or_render('expense', None, 'v1', factory) is first
+    assert len(calls) == 1
+
+    cache.get_or_render('trend', None, 'v1', factory)
+    cache.get_or_render('expense', None, 'v2', factory)
+    assert chart_key('expense', None, 'v1') not in cache
+
+def test_disk_cache_survives_restart(cube, tmp_path):
+    """Изображения из дискового кэша доступны новому экземпляру кэша."""
+    ChartCache(directory=str(tmp_path)).get_or_render('expense', '2026', 'v1', lambda: cube)
+    image = ChartCache(directory=str(tmp_path)).get(chart_key('expense', '2026', 'v1'))
+    assert image.startswith(b'\x89PNG')
+
+def test_disk_cache_evicts_least_recently_used(cube, tmp_path):
+    """На диске остается не более disk_capacity файлов; чтение продлевает жизнь."""
+    cache = ChartCache(directory=str(tmp_path), disk_capacity=2)
+    cache.get_or_render('expense', None, 'v1', lambda: cube)
+    cache.get_or_render('trend', None, 'v1', lambda: cube)
+    os.utime(tmp_path / f"{chart_key('expense', None, 'v1')}.png", (1000, 1000))
+    os.utime(tmp_path / f"{chart_key('trend', None, 'v1')}.png", (2000, 2000))
+
+    assert ChartCache(directory=str(tmp_path)).get(chart_key('expense', None, 'v1'))
+    cache.get_or_render('income', None, 'v1', lambda: cube)
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(
+        f'{chart_key(kind, None, "v1")}.png' for kind in ('expense', 'income'))
+
+def test_ledger_version_tracks_offsets_and_rates():
+    """Версия журнала меняется при дозаписи и при смене курсов."""
+    ledger = Ledger()
+    base = ledger_version(ledger, None)
+    assert ledger_version(ledger, 'rates') != base
+    ledger.csv_offset = 100
+    assert ledger_version(ledger, None) != base
@@ -0,0 +1,166 @@
+import pytest
+import storage
+import checkpoint
+from checkpoint import Ledger
+from cube import AggregationCube
+from analysis import transactions_to_df
+from models import Transaction, TransactionColumns
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Перенаправляет хранилище во временную директорию."""
+    monkeypatch.setattr(storage, 'DATA_DIR', str(tmp_path))
+    monkeypatch.setattr(storage, 'CSV_FILE', str(tmp_path / 'transactions.csv'))
+    monkeypatch.setattr(storage, 'RATES_FILE', str(tmp_path / 'rates.csv'))
+    monkeypatch.setattr(storage, 'CHANGES_FILE', str(tmp_path / 'changes.csv'))
+    monkeypatch.setattr(storage, 'CHECKPOINT_FILE', str(tmp_path / 'checkpoint.bin'))
+    return tmp_path
+
+
+def _saved(n, first=1):
+    transactions = [Transaction(100 * i, "Еда", "2026-01-01", f"#{i}") for i in range(first, first + n)]
+    storage.save_transactions(transactions)
+    return transactions
+
+
+def test_checkpoint_roundtrip_reads_only_tail(data_dir):
+    """После восстановления из контрольной точки разбирается только дописанный хвост."""
+    _saved(3)
+    ledger = Ledger.load()
+    ledger.refresh()
+    ledger.save()
+
+    new = _saved(2, first=4)
+    restored = Ledger.load()
+    assert [t.description for t in restored.transactions] == ['#1', '#2', '#3']
+
+    appended = restored.refresh()
+    assert [t.id for t in appended] == [t.id for t in new]
+    assert [t.amount for t in restored.transactions] == [100, 200, 300, 400, 500]
+    assert restored.transactions[0].date.strftime('%Y-%m-%d') == '2026-01-01'
+
+def test_corrupted_checkpoint_falls_back_to_full_load(data_dir):
+    """Checkpoint с неверной контрольной суммой игнорируется."""
+    _saved(3)
+    ledger = Ledger.load()
+    ledger.refresh()
+    ledger.save()
+
+    data = bytearray((data_dir / 'checkpoint.bin').read_bytes())
+    data[-1] ^= 0xFF
+    (data_dir / 'checkpoint.bin').write_bytes(bytes(data))
+
+    restored = Ledger.load()
+    assert restored.transactions == []
+    assert restored.refresh() is not None
+    assert len(restored.transactions) == 3
+
+def test_changes_after_checkpoint_are_replayed(data_dir):
+    """Удаления из журнала изменений применяются к восстановленным операциям."""
+    saved = _saved(3)
+    ledger = Ledger.load()
+    ledger.refresh()
+    ledger.save()
+
+    storage.delete_transaction(saved[1].id)
+    restored = Ledger.load()
+    assert restored.refresh() is None
+    assert [t.id for t in restored.transactions] == [saved[0].id, saved[2].id]
+
+def test_changes_are_described_as_delta(data_dir):
+    """Правки и удаления применяются без перечитывания файла и описываются приращениями."""
+    saved = _saved(4)
+    ledger = Ledger()
+    ledger.refresh()
+    before = ledger.transactions
+
+    edited = Transaction(999, "Дом", "2026-01-02", "#3", id=saved[2].id)
+    storage.delete_transaction(saved[1].id)
+    storage.edit_transaction(edited)
+    storage.delete_transaction('cold-1')
+    appended = _saved(1, first=5)
+    assert ledger.refresh() is None
+
+    delta = ledger.delta
+    assert [t.description for t in ledger.transactions] == ['#1', '#3', '#4', '#5']
+    assert ledger.transactions[1].amount == 999
+    assert [t.id for t in delta['removed']] == [saved[1].id, saved[2].id]
+    assert [t.amount for t in delta['added']] == [999]
+    assert delta['deleted'] == [1] and delta['edited'] == [2]
+    assert [t.id for t in delta['appended']] == [appended[0].id]
+    assert delta['unmatched'] == {'cold-1': ('delete', None)}
+    assert len(before) == 4     # прежний список не изменяется
+
+def test_loaded_ledger_stays_columnar(data_dir):
+    """Восстановленный журнал не создает объекты строк, а правки находят их по индексу."""
+    saved = _saved(6)
+    ledger = Ledger.load()
+    ledger.refresh()
+    ledger.save()
+
+    restored = Ledger.load()
+    assert isinstance(restored.transactions, TransactionColumns)
+    assert not restored.transactions._objects
+
+    storage.delete_transaction(saved[1].id)
+    storage.edit_transaction(Transaction(999, "Дом", "2026-01-02", "#4", id=saved[3].id))
+    appended = _saved(2, first=7)
+    assert restored.refresh() is None
+    assert restored.delta['deleted'] == [1] and restored.delta['edited'] == [3]
+    assert len(restored.transactions._objects) < 6
+
+    # После удаления позиции следующих правок сдвигаются
+    storage.delete_transaction(saved[0].id)
+    storage.edit_transaction(Transaction(1, "Дом", "2026-01-03", "#5", id=saved[4].id))
+    storage.delete_transaction(appended[0].id)
+    assert restored.refresh() is None
+    assert restored.delta['deleted'] == [0, 5] and restored.delta['edited'] == [3]
+
+    reloaded = Ledger()
+    reloaded.refresh()
+    assert [t.to_dict() for t in restored.transactions] == [t.to_dict() for t in reloaded.transactions]
+    assert [t.description for t in restored.transactions] == ['#3', '#4', '#5', '#6', '#8']
+
+def test_refresh_reads_in_chunks(data_dir):
+    """Файл читается частями; изменения применяются вместе с последней частью."""
+    saved = _saved(4)
+    storage.delete_transaction(saved[0].id)
+    ledger = Ledger()
+
+    chunks = [ledger.refresh(max_bytes=1)]
+    while ledger.pending:
+        assert len(chunks[-1]) <= 1 and ledger.delta is None
+        chunks.append(ledger.refresh(max_bytes=1))
+
+    assert len(chunks) > 4
+    assert chunks[-1] is None and [t.id for t in ledger.delta['removed']] == [saved[0].id]
+    assert [t.description for t in ledger.transactions] == ['#2', '#3', '#4']
+    assert ledger.refresh(max_bytes=1) == [] and not ledger.pending
+
+def test_compaction_after_checkpoint_triggers_full_reload(data_dir):
+    """Если основной файл переписан уплотнением, он читается заново."""
+    saved = _saved(3)
+    ledger = Ledger.load()
+    ledger.refresh()
+    ledger.save()
+
+    storage.delete_transaction(saved[0].id)
+    storage.compact()
+    _saved(1, first=4)
+
+    restored = Ledger.load()
+    assert restored.refresh() is None
+    assert [t.description for t in restored.transactions] == ['#2', '#3', '#4']
+
+def test_checkpoint_keeps_cube(data_dir):
+    """Куб агрегатов сохраняется вместе с хешем таблицы курсов."""
+    _saved(3)
+    ledger = Ledger.load()
+    ledger.refresh()
+    cube = AggregationCube.from_df(transactions_to_df(ledger.transactions))
+    ledger.save(cube, checkpoint.file_digest(storage.RATES_FILE))
+
+    restored = Ledger.load()
+    assert restored.cube.category_totals('expense')['Еда'] == 600
+    assert restored.rates_digest is None
@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+import storage
+from analysis import transactions_to_df, group_by_category
+from checkpoint import Ledger
+from consolidate import consolidate, ledger_partials, merge_partials
+from cube import AggregationCube
+from models import Transaction
+
+
+@pytest.fixture
+def ledgers(tmp_path, monkeypatch):
+    """Создает три журнала в отдельных директориях; пути хранилища восстанавливаются после теста."""
+    for name in ('DATA_DIR', 'CSV_FILE', 'RATES_FILE', 'CHANGES_FILE', 'CHECKPOINT_FILE', 'BUDGETS_FILE'):
+        monkeypatch.setattr(storage, name, getattr(storage, name))
+
+    rows = {}
+    for i in range(3):
+        directory = tmp_path / f'ledger{i}'
+        directory.mkdir()
+        storage.set_data_dir(str(directory))
+        rows[str(directory)] = [
+            Transaction(1000 * (i + 1), "Еда", f"2026-01-0{i + 1}"),
+            Transaction(250, "Транспорт", "2026-02-01"),
+            Transaction(90000, "Зарплата", "2026-01-05", transaction_type='income'),
+        ]
+        storage.save_transactions(rows[str(directory)])
+    return rows
+
+
+def test_consolidate_matches_combined_ledger(ledgers):
+    """Сводные агрегаты совпадают с расчетом по объединенному журналу."""
+    report = consolidate(list(ledgers), max_workers=2)
+    combined = transactions_to_df([t for rows in ledgers.values() for t in rows])
+
+    assert report['rows'] == 9
+    assert set(report['ledgers']) == set(ledgers)
+    expense = report['categories'].loc['expense', 'sum']
+    pd.testing.assert_series_equal(expense.sort_index(), group_by_category(combined, 'expense').sort_index(),
+                                   check_names=False, check_dtype=False)
+    expected_daily = AggregationCube.from_df(combined).time_series('day')
+    assert report['daily']['expense'].tolist() == expected_daily['expense'].tolist()
+    assert report['daily']['income'].sum() == 270000
+
+
+def test_partials_reuse_checkpoint_cube(ledgers):
+    """Куб из контрольной точки дополняется дописанными строками, а не строится заново."""
+    directory = next(iter(ledgers))
+    storage.set_data_dir(directory)
+    ledger = Ledger.load()
+    ledger.refresh()
+    ledger.save(AggregationCube.from_df(transactions_to_df(ledger.transactions)))
+    storage.save_transactions([Transaction(700, "Еда", "2026-03-01")])
+
+    partial = ledger_partials(directory, start='2026-02')
+    assert partial['rows'] == 4
+    assert partial['categories'].loc[('expense', 'Еда'), 'sum'] == 700
+    assert partial['categories'].loc[('expense', 'Транспорт'), 'count'] == 1
+
+
+def test_missing_ledger_skipped(ledgers, tmp_path):
+    """Недоступный журнал пропускается, остальные объединяются."""
+    report = consolidate(list(ledgers) + [str(tmp_path / 'missing')], max_workers=2)
+    assert report['rows'] == 9
+    assert merge_partials([])['rows'] == 0
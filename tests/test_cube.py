@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+from models import Transaction
+from analysis import transactions_to_df, group_by_category
+from cube import AggregationCube
+
+
+@pytest.fixture
+def sample_df():
+    """Операции за два года с повторяющимися категориями."""
+    return transactions_to_df([
+        Transaction(10000, "Еда", "2025-12-31", "Кофе", "expense"),
+        Transaction(500000, "Зарплата", "2026-01-05", "Аванс", "income"),
+        Transaction(150000, "Транспорт", "2026-01-02", "Проездной", "expense"),
+        Transaction(20000, "Еда", "2026-01-04", "Обед", "expense"),
+        Transaction(5000, "Еда", "2026-01-04", "Булка", "expense"),
+        Transaction(30000, "Зарплата", "2026-02-06", "Бонус", "income"),
+    ])
+
+
+def test_category_totals_match_group_by(sample_df):
+    """Суммы по категориям из куба совпадают с прямой группировкой."""
+    cube = AggregationCube.from_df(sample_df)
+    for transaction_type in ('expense', 'income'):
+        expected = group_by_category(sample_df, transaction_type)
+        actual = cube.category_totals(transaction_type)
+        assert actual.sort_index().to_dict() == expected.sort_index().to_dict()
+
+def test_rollup_levels_and_period_filter(sample_df):
+    """Свертка по годам и месяцам и фильтр периода работают по массивам куба."""
+    cube = AggregationCube.from_df(sample_df)
+
+    years = cube.to_frame('year')
+    food_2026 = years[(years['period'] == '2026') & (years['category'] == 'Еда')].iloc[0]
+    assert (food_2026['sum'], food_2026['count'], food_2026['min'], food_2026['max']) == (25000, 2, 5000, 20000)
+
+    assert cube.category_totals('expense', '2026-01', '2026-01').to_dict() == {'Транспорт': 150000, 'Еда': 25000}
+    months = cube.time_series('month')
+    assert list(months.index) == ['2025-12', '2026-01', '2026-02']
+    assert months.loc['2026-01', 'income'] == 500000
+
+def test_drill_down(sample_df):
+    """Детализация год → месяцы → дни."""
+    cube = AggregationCube.from_df(sample_df)
+    assert sorted(cube.drill_down('2026')['period'].unique()) == ['2026-01', '2026-02']
+    days = cube.drill_down('2026-01')
+    assert sorted(days['period'].unique()) == ['2026-01-02', '2026-01-04', '2026-01-05']
+    with pytest.raises(ValueError):
+        cube.drill_down('2026-01-04')
+
+def test_incremental_append_equals_full_build(sample_df):
+    """Инкрементальное обновление дает тот же куб, что и построение целиком."""
+    full = AggregationCube.from_df(sample_df)
+
+    cube = AggregationCube.from_df(sample_df.iloc[2:4])
+    cube.append_df(sample_df.iloc[4:])
+    cube.append_df(sample_df.iloc[:2])     # более ранняя дата и новая категория
+
+    assert (cube.day_index == full.day_index).all()
+    pd.testing.assert_frame_equal(
+        cube.to_frame('day').sort_values(['period', 'category', 'transaction_type']).reset_index(drop=True),
+        full.to_frame('day').sort_values(['period', 'category', 'transaction_type']).reset_index(drop=True),
+    )
+
+def test_remove_matches_build_without_rows(sample_df):
+    """Вычитание операций дает те же суммы и количества, что и построение без них."""
+    cube = AggregationCube.from_df(sample_df)
+    cube.remove_df(sample_df.iloc[[0, 3]])
+    expected = AggregationCube.from_df(sample_df.drop(index=[0, 3]))
+
+    columns = ['period', 'category', 'transaction_type', 'sum', 'count']
+    pd.testing.assert_frame_equal(
+        cube.to_frame('day')[columns].sort_values(columns[:3]).reset_index(drop=True),
+        expected.to_frame('day')[columns].sort_values(columns[:3]).reset_index(drop=True),
+    )
+    assert cube.rollup('day', '2025-12-31', '2025-12-31')['min'].min() == np.iinfo(np.int64).max
+
+def test_distant_date_adds_one_day(sample_df):
+    """Далекая дата не растягивает ось дней на весь промежуток."""
+    old = transactions_to_df([Transaction(700, "Еда", "1026-01-01", "Старое", "expense")])
+    cube = AggregationCube.from_df(sample_df)
+    cube.append_df(old)
+
+    assert cube.sums.shape[0] == 6
+    assert cube.category_totals('expense', '1026', '1026').to_dict() == {'Еда': 700}
+    assert list(cube.time_series('year').index) == ['1026', '2025', '2026']
+    assert cube.category_totals('expense', '2026-01-03', '2026-01-04').to_dict() == {'Еда': 25000}
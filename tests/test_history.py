@@ -0,0 +1,114 @@
+import datetime
+import pytest
+import storage
+from history import ColdHistory, hot_cutoff
+from analysis import transactions_to_df
+from cube import AggregationCube
+from checkpoint import _to_columns
+from models import Transaction, TransactionColumns
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Перенаправляет хранилище во временную директорию."""
+    monkeypatch.setattr(storage, 'DATA_DIR', str(tmp_path))
+    return tmp_path
+
+
+def _transactions():
+    return [
+        Transaction(100, "Еда", "2025-01-10"),
+        Transaction(200, "Еда", "2026-03-01"),
+        Transaction(300, "Кафе", "2025-02-05"),
+        Transaction(400, "Кафе", "2026-04-02"),
+    ]
+
+def _same(df):
+    return df
+
+
+def test_hot_cutoff_aligned_to_month():
+    """Горячее окно начинается с первого дня месяца."""
+    assert hot_cutoff(12, datetime.date(2026, 4, 15)) == datetime.datetime(2025, 5, 1)
+    assert hot_cutoff(1, datetime.date(2026, 4, 15)) == datetime.datetime(2026, 4, 1)
+
+def test_evict_keeps_analytics_and_reopens(data_dir):
+    """Холодные агрегаты вместе с горячими строками дают те же суммы, что и весь журнал."""
+    transactions = _transactions()
+    history = ColdHistory()
+    hot = history.evict(transactions, datetime.datetime(2026, 1, 1), _same, None)
+
+    assert [t.amount for t in hot] == [200, 400]
+    assert history.rows == 2
+
+    reopened = ColdHistory()
+    assert reopened.rows == 2
+    combined = reopened.cube(_same, None).copy()
+    combined.append_df(transactions_to_df(hot))
+    full = AggregationCube.from_df(transactions_to_df(transactions))
+    assert combined.category_totals('expense').to_dict() == full.category_totals('expense').to_dict()
+    assert [t.amount for t in reopened.read('2025-02-01', '2025-12-31')] == [300]
+
+def test_evict_from_columns(data_dir):
+    """Журнал из контрольной точки делится на окна по столбцу дат."""
+    transactions = TransactionColumns(_to_columns(_transactions()[:3]))
+    transactions.append(_transactions()[3])
+    history = ColdHistory()
+    hot = history.evict(transactions, datetime.datetime(2026, 1, 1), _same, None)
+
+    assert isinstance(hot, TransactionColumns) and [t.amount for t in hot] == [200, 400]
+    assert [t.amount for t in history.read('2025-01-01', '2025-12-31')] == [100, 300]
+    assert history.cube(_same, None).category_totals('expense').to_dict() == {'Еда': 100, 'Кафе': 300}
+
+def test_paging_respects_budget(data_dir):
+    """Подгруженные блоки вытесняются по LRU в пределах бюджета строк."""
+    history = ColdHistory(budget_rows=3)
+    transactions = [Transaction(i + 1, "Еда", f"2025-01-{i % 28 + 1:02d}") for i in range(10)]
+    # Каждый перенос дописывает в архив отдельный блок
+    for part in range(0, 10, 2):
+        history.evict(transactions[part:part + 2], datetime.datetime(2026, 1, 1), _same, None)
+
+    rows = history.rows_range(0, 10)
+    assert [t.amount for t in rows] == list(range(1, 11))
+    assert history.paged_rows <= 3
+
+def test_rates_change_rebuilds_cold_cube(data_dir):
+    """При смене таблицы курсов куб холодной истории пересчитывается по архиву."""
+    history = ColdHistory()
+    history.evict(_transactions(), datetime.datetime(2026, 1, 1), _same, 'old')
+
+    def doubled(df):
+        return df.assign(amount=df['amount'] * 2)
+
+    cube = history.cube(doubled, 'new')
+    assert cube.category_totals('expense').to_dict() == {'Еда': 200, 'Кафе': 600}
+
+def test_changes_apply_to_cold_rows_and_cube(data_dir):
+    """Правки и удаления вынесенных операций видны при чтении и в кубе без переписывания архива."""
+    transactions = _transactions()
+    history = ColdHistory()
+    history.evict(transactions, datetime.datetime(2026, 1, 1), _same, None)
+    history.cube(_same, None)
+
+    edited = Transaction(150, "Кафе", "2025-01-10", id=transactions[0].id)
+    history.apply_changes({transactions[0].id: ('edit', edited), transactions[2].id: ('delete', None)})
+    assert [(t.amount, t.category) for t in history.rows_range(0, 2)] == [(150, "Кафе")]
+    assert history.cube(_same, None).category_totals('expense').to_dict() == {"Кафе": 150}
+
+    reopened = ColdHistory()
+    assert reopened.rows == 2
+    assert [t.amount for t in reopened.read()] == [150]
+
+def test_deleted_rows_do_not_take_positions(data_dir):
+    """Позиции и количество строк считаются без удаленных операций."""
+    history = ColdHistory()
+    transactions = [Transaction(i + 1, "Еда", f"2025-01-{i + 1:02d}") for i in range(6)]
+    for part in range(0, 6, 2):
+        history.evict(transactions[part:part + 2], datetime.datetime(2026, 1, 1), _same, None)
+    history.apply_changes({transactions[1].id: ('delete', None), transactions[2].id: ('delete', None)})
+    history.apply_changes({transactions[2].id: ('delete', None)})
+
+    assert history.visible_rows == 4
+    assert [t.amount for t in history.rows_range(1, 2)] == [4, 5]
+    assert [t.amount for t in history.rows_range(2, 10)] == [5, 6]
+    assert ColdHistory().visible_rows == 4
@@ -0,0 +1,51 @@
+import json
+import pytest
+import instrumentation
+from instrumentation import traced, span
+
+
+@pytest.fixture(autouse=True)
+def reset_instrumentation():
+    """Возвращает подсистему замеров в исходное (выключенное) состояние."""
+    instrumentation.clear()
+    yield
+    instrumentation.disable()
+    instrumentation.clear()
+
+
+@traced('test.double', rows=lambda result, values: len(values))
+def double(values):
+    return [v * 2 for v in values]
+
+
+def test_disabled_records_nothing():
+    """Выключенная подсистема не сохраняет замеры."""
+    assert double([1, 2]) == [2, 4]
+    with span('test.block'):
+        pass
+    assert instrumentation.latest_spans() == []
+
+def test_enabled_records_rows_and_duration():
+    """Включенная подсистема сохраняет длительность и количество строк."""
+    instrumentation.enable()
+    double([1, 2, 3])
+    with span('test.block') as ctx:
+        ctx['rows'] = 7
+
+    spans = instrumentation.latest_by_name()
+    assert spans['test.double']['rows'] == 3
+    assert spans['test.block']['rows'] == 7
+    assert spans['test.double']['duration'] >= 0
+
+def test_export_chrome_trace_and_log(tmp_path):
+    """Замеры выгружаются в Chrome trace JSON и пишутся в ротируемый лог."""
+    log_path = tmp_path / 'spans.log'
+    instrumentation.enable(log_path=str(log_path))
+    double([1])
+    instrumentation.export_chrome_trace(str(tmp_path / 'trace.json'))
+    instrumentation.disable()
+
+    trace = json.loads((tmp_path / 'trace.json').read_text(encoding='utf-8'))
+    assert trace['traceEvents'][0]['name'] == 'test.double'
+    assert trace['traceEvents'][0]['ph'] == 'X'
+    assert 'test.double' in log_path.read_text(encoding='utf-8')
@@ -1,6 +1,7 @@
 import datetime
 import pytest
-from models import Transaction
+from checkpoint import _to_columns
+from models import Transaction, TransactionColumns
 
 
 def test_to_dict():
@@ -22,4 +23,37 @@ def test_to_dict():
 def test_transaction_invalid_date_format():
     """Тест на выброс исключения при неверном формате даты."""
     with pytest.raises(ValueError):
-        Transaction(100.0, "Food", "08-01-2026")
\ No newline at end of file
+        Transaction(10000, "Food", "08-01-2026")
+
+def test_transaction_rejects_fractional_amount():
+    """Суммы принимаются только в целых копейках."""
+    with pytest.raises(ValueError, match="целым числом копеек"):
+        Transaction(100.5, "Food", "2026-01-08")
+
+def test_transaction_ids():
+    """Каждая операция получает уникальный идентификатор; заданный сохраняется."""
+    first = Transaction(100, "Еда", "2026-01-08")
+    second = Transaction(100, "Еда", "2026-01-08")
+    assert first.id != second.id
+    assert Transaction(100, "Еда", "2026-01-08", id="abc").to_dict()['id'] == "abc"
+
+def test_transaction_columns_create_objects_on_access():
+    """Журнал столбцами создает объекты только для запрошенных строк."""
+    rows = [Transaction(100 * i, "Еда", f"2026-01-0{i}", f"#{i}") for i in range(1, 6)]
+    columns = TransactionColumns(_to_columns(rows))
+    assert len(columns) == 5 and not columns._objects
+
+    assert columns[1].id == rows[1].id and columns[-1].amount == 500
+    assert columns[1] is columns[1] and len(columns._objects) == 2
+    assert columns[0].date == datetime.datetime(2026, 1, 1)
+
+    columns.append(Transaction(600, "Кафе", "2026-01-06"))
+    assert [t.amount for t in columns[3:]] == [400, 500, 600]
+    assert columns.column('amount').tolist() == [100, 200, 300, 400, 500, 600]
+    assert [t.description for t in columns.compress(columns.column('amount') % 200 == 0)] == ['#2', '#4', '']
+
+    edited = Transaction(999, "Дом", "2026-02-01", id=rows[0].id)
+    changed = columns.with_changes({0: edited, 5: edited}, [2, 4])
+    assert [t.amount for t in changed] == [999, 200, 400, 999]
+    assert changed[0].category == "Дом" and changed[0].date == datetime.datetime(2026, 2, 1)
+    assert [t.amount for t in columns] == [100, 200, 300, 400, 500, 600]
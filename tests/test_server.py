@@ -0,0 +1,108 @@
+import json
+import asyncio
+import pytest
+from models import Transaction
+from storage import BatchWriter
+from server import LedgerService, LedgerHTTPServer
+
+
+@pytest.fixture
+def service():
+    """Сервис с небольшим журналом в памяти (без записи на диск)."""
+    return LedgerService([
+        Transaction(10000, "Еда", "2026-01-01", "Кофе", "expense"),
+        Transaction(500000, "Зарплата", "2026-01-05", "Аванс", "income"),
+        Transaction(20000, "Еда", "2026-01-01", "Обед", "expense"),
+    ])
+
+
+async def _request(port, raw):
+    """Отправляет сырой HTTP-запрос и возвращает (статус, тело)."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(raw)
+    await writer.drain()
+    data = await reader.read()
+    writer.close()
+    head, _, body = data.partition(b'\r\n\r\n')
+    return int(head.split()[1]), body
+
+
+def test_service_aggregates(service):
+    """Агрегаты строятся при загрузке журнала."""
+    assert service.category_totals('expense') == {"Еда": 30000}
+    assert service.time_series()[0] == {'date': '2026-01-01', 'income': 0, 'expense': 30000}
+
+def test_http_totals_stream_and_append(service):
+    """Сервер отдает агрегаты, поток операций и принимает новые операции."""
+    async def scenario():
+        server = LedgerHTTPServer(service, port=0)
+        port = await server.start()
+        try:
+            status, body = await _request(port, b'GET /totals?type=income HTTP/1.1\r\nConnection: close\r\n\r\n')
+            assert status == 200
+            assert json.loads(body) == {"Зарплата": 500000}
+
+            payload = json.dumps({'amount': '50', 'category': 'Транспорт', 'date': '2026-01-03'}).encode()
+            status, _ = await _request(
+                port,
+                b'POST /transactions HTTP/1.1\r\nConnection: close\r\nContent-Length: '
+                + str(len(payload)).encode() + b'\r\n\r\n' + payload
+            )
+            assert status == 201
+
+            status, _ = await _request(
+                port, b'POST /transactions HTTP/1.1\r\nConnection: close\r\nContent-Length: 2\r\n\r\n{}'
+            )
+            assert status == 400
+
+            status, body = await _request(port, b'GET /transactions?type=expense HTTP/1.1\r\nConnection: close\r\n\r\n')
+            assert status == 200
+            assert body.count(b'"category"') == 3
+        finally:
+            await server.close()
+
+    asyncio.run(scenario())
+    assert service.category_totals('expense')["Транспорт"] == 5000
+
+def test_append_not_applied_when_write_fails(tmp_path):
+    """Если операцию не удалось записать, сервер отвечает 500 и не меняет агрегаты."""
+    service = LedgerService([], writer=BatchWriter(str(tmp_path)))  # директория вместо файла
+
+    async def scenario():
+        server = LedgerHTTPServer(service, port=0)
+        port = await server.start()
+        try:
+            payload = json.dumps({'amount': '50', 'category': 'Транспорт', 'date': '2026-01-03'}).encode()
+            status, _ = await _request(
+                port,
+                b'POST /transactions HTTP/1.1\r\nConnection: close\r\nContent-Length: '
+                + str(len(payload)).encode() + b'\r\n\r\n' + payload
+            )
+            assert status == 500
+        finally:
+            await server.close()
+
+    asyncio.run(scenario())
+    service.writer.close()
+    assert service.transactions == []
+    assert service.category_totals('expense') == {}
+
+def test_rejects_bad_content_length(service):
+    """Некорректный или слишком большой Content-Length получает ответ, а не обрыв соединения."""
+    async def scenario():
+        server = LedgerHTTPServer(service, port=0)
+        port = await server.start()
+        try:
+            statuses = []
+            for length in (b'abc', b'-5', b'\xb2', str(10 ** 9).encode()):
+                status, _ = await _request(
+                    port, b'POST /transactions HTTP/1.1\r\nContent-Length: ' + length + b'\r\n\r\n{}'
+                )
+                statuses.append(status)
+            status, _ = await _request(port, b'GET /' + b'x' * 100_000 + b' HTTP/1.1\r\n\r\n')
+            statuses.append(status)
+            return statuses
+        finally:
+            await server.close()
+
+    assert asyncio.run(scenario()) == [400, 400, 400, 413, 400]
@@ -0,0 +1,111 @@
+import io
+import pytest
+import storage
+import statements
+from statements import parse_ofx, parse_qif, import_statement
+
+
+OFX_SGML = """OFXHEADER:100
+DATA:OFXSGML
+CHARSET:1251
+
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><CURDEF>USD
+<BANKTRANLIST>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20260105120000[-5:EST]<TRNAMT>-12.50<FITID>1<NAME>Coffee &amp; Co<MEMO>card
+</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20260110<TRNAMT>1500,00<FITID>2<NAME>Salary
+</STMTTRN>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>2026XX10<TRNAMT>-1<FITID>3
+</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+QIF = """!Account
+NChecking
+TBank
+^
+!Type:Bank
+D1/5'26
+T-1,234.56
+PShop
+LFood:Groceries
+^
+D05.01.2026
+U200.00
+L[Savings]
+^
+!Type:Invst
+D1/5/26
+T-5
+^
+"""
+
+
+def _flatten(batches):
+    return [t for batch in batches for t in batch]
+
+
+def test_parse_ofx_sgml():
+    """Записи OFX 1.x становятся операциями; сумма со знаком задает тип, некорректные отклоняются."""
+    rejected = []
+    transactions = _flatten(parse_ofx(io.StringIO(OFX_SGML), on_reject=lambda n, m: rejected.append((n, m))))
+
+    assert [(t.amount, t.transaction_type, t.date.strftime('%Y-%m-%d'), t.currency) for t in transactions] == [
+        (1250, 'expense', '2026-01-05', 'USD'),
+        (150000, 'income', '2026-01-10', 'USD'),
+    ]
+    assert transactions[0].description == 'Coffee & Co card'
+    assert rejected == [(3, 'Неверная дата')]
+
+
+def test_parse_ofx_xml_single_line_in_small_chunks(monkeypatch):
+    """OFX 2.x без переводов строк разбирается одинаково при любом размере блока чтения."""
+    xml = ('<?xml version="1.0" encoding="utf-8"?><?OFX OFXHEADER="200"?><OFX><CURDEF>RUB</CURDEF>'
+           + ''.join(f'<STMTTRN><DTPOSTED>2026010{i % 9 + 1}</DTPOSTED><TRNAMT>-{i + 1}.00</TRNAMT>'
+                     f'<NAME>Магазин {i}</NAME></STMTTRN>' for i in range(25))
+           + '</OFX>')
+    expected = [(t.amount, t.date, t.description) for t in _flatten(parse_ofx(io.StringIO(xml)))]
+    assert len(expected) == 25
+
+    original = statements._ofx_elements
+    monkeypatch.setattr(statements, '_ofx_elements', lambda f: original(f, 7))
+    batches = list(parse_ofx(io.StringIO(xml), batch_size=10))
+    assert [len(b) for b in batches] == [10, 10, 5]
+    assert [(t.amount, t.date, t.description) for t in _flatten(batches)] == expected
+
+
+def test_parse_qif_sections_and_categories():
+    """QIF: разделы счетов разбираются, служебные и инвестиционные пропускаются."""
+    transactions = _flatten(parse_qif(io.StringIO(QIF)))
+    assert [(t.amount, t.transaction_type, t.date.strftime('%Y-%m-%d'), t.category, t.description)
+            for t in transactions] == [
+        (123456, 'expense', '2026-01-05', 'Food', 'Shop'),
+        (20000, 'income', '2026-01-05', 'Импорт', ''),
+    ]
+
+
+def test_import_statement_appends_batches(tmp_path, monkeypatch):
+    """Импорт дописывает операции пакетами в журнал и считает отклоненные записи."""
+    monkeypatch.setattr(storage, 'DATA_DIR', str(tmp_path))
+    monkeypatch.setattr(storage, 'CSV_FILE', str(tmp_path / 'transactions.csv'))
+    monkeypatch.setattr(storage, 'CHANGES_FILE', str(tmp_path / 'changes.csv'))
+    path = tmp_path / 'statement.ofx'
+    path.write_text(OFX_SGML, encoding='cp1251')
+
+    result = import_statement(str(path), batch_size=1)
+    assert result == {'imported': 2, 'rejected': 1}
+    assert sorted(t.amount for t in storage.load_transactions()) == [1250, 150000]
+
+    with pytest.raises(ValueError):
+        list(statements.read_statement(str(tmp_path / 'statement.csv')))
+
+def test_import_statement_stops_on_write_error(tmp_path, monkeypatch, capsys):
+    """Ошибка записи пакета останавливает импорт, а не засчитывается как успех."""
+    monkeypatch.setattr(storage, 'DATA_DIR', str(tmp_path))
+    monkeypatch.setattr(storage, 'CSV_FILE', str(tmp_path))  # директория вместо файла
+    path = tmp_path / 'statement.ofx'
+    path.write_text(OFX_SGML, encoding='cp1251')
+
+    with pytest.raises(OSError):
+        import_statement(str(path), batch_size=1)
+    assert 'после 0 операций' in capsys.readouterr().out
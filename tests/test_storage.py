@@ -0,0 +1,199 @@
+import threading
+import pytest
+import storage
+from models import Transaction
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Перенаправляет хранилище во временную директорию."""
+    monkeypatch.setattr(storage, 'DATA_DIR', str(tmp_path))
+    monkeypatch.setattr(storage, 'CSV_FILE', str(tmp_path / 'transactions.csv'))
+    monkeypatch.setattr(storage, 'RATES_FILE', str(tmp_path / 'rates.csv'))
+    monkeypatch.setattr(storage, 'CHANGES_FILE', str(tmp_path / 'changes.csv'))
+    return tmp_path
+
+
+def test_save_and_load_roundtrip(data_dir):
+    """Сохраненные транзакции загружаются обратно без потерь."""
+    storage.save_transactions([Transaction(10050, "Еда", "2026-01-01", "Кофе", "expense")])
+    loaded = storage.load_transactions()
+
+    assert len(loaded) == 1
+    assert loaded[0].amount == 10050
+    assert loaded[0].category == "Еда"
+    assert loaded[0].date.strftime('%Y-%m-%d') == "2026-01-01"
+
+def test_concurrent_writers_single_header(data_dir):
+    """Параллельные писатели не задваивают заголовок и не теряют строки."""
+    def worker(n):
+        for i in range(20):
+            storage.save_transactions([Transaction(n + 1, "Еда", "2026-01-01", f"w{n}-{i}")])
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    lines = (data_dir / 'transactions.csv').read_text(encoding='utf-8').splitlines()
+    assert lines.count(','.join(storage.FIELDNAMES)) == 1
+    assert len(storage.load_transactions()) == 100
+
+def test_batch_writer_commits_offset(data_dir):
+    """BatchWriter фиксирует пакеты и сообщает смещение зафиксированных данных."""
+    writer = storage.BatchWriter()
+    futures = [writer.submit([Transaction(1000, "Транспорт", "2026-01-02")]) for _ in range(50)]
+    for future in futures:
+        assert future.result(5) > 0
+    writer.close()
+
+    assert writer.committed_offset == storage.committed_offset()
+    assert len(storage.load_transactions()) == 50
+
+def test_batch_writer_reports_failure(data_dir):
+    """Ошибка записи пакета передается производителю, а не только печатается."""
+    writer = storage.BatchWriter(str(data_dir))  # директория вместо файла
+    future = writer.submit([Transaction(1000, "Транспорт", "2026-01-02")])
+    with pytest.raises(OSError):
+        future.result(5)
+    writer.close()
+
+def test_load_ignores_partial_tail(data_dir):
+    """Недописанная последняя строка не попадает в результат загрузки."""
+    storage.save_transactions([Transaction(100, "Еда", "2026-01-01")])
+    offset = storage.committed_offset()
+    with open(storage.CSV_FILE, 'a', encoding='utf-8') as f:
+        f.write('5.0,Еда,2026-01')
+
+    assert storage.committed_offset() == offset
+    assert len(storage.load_transactions()) == 1
+
+def test_legacy_header_upgraded_on_append(data_dir):
+    """Файл без колонки валюты дополняется ей при первой дозаписи."""
+    (data_dir / 'transactions.csv').write_text(
+        'amount,category,date,description,transaction_type\n'
+        '100.0,Еда,2026-01-01 00:00:00,Кофе,expense\n',
+        encoding='utf-8'
+    )
+    storage.save_transactions([Transaction(500, "Еда", "2026-01-02", currency="USD")])
+    loaded = storage.load_transactions()
+
+    assert [t.currency for t in loaded] == ['RUB', 'USD']
+    assert [t.amount for t in loaded] == [10000, 500]
+    assert (data_dir / 'transactions.csv').read_text(encoding='utf-8').startswith(','.join(storage.FIELDNAMES))
+
+def test_load_rates(data_dir):
+    """Таблица курсов читается, сортируется по дате и нормализует коды валют."""
+    assert storage.load_rates().empty
+    (data_dir / 'rates.csv').write_text(
+        'date,currency,rate\n2026-02-01,usd,95.5\n2026-01-01,USD,90\n', encoding='utf-8'
+    )
+    rates = storage.load_rates()
+
+    assert list(rates['currency']) == ['USD', 'USD']
+    assert list(rates['rate']) == [90.0, 95.5]
+
+def test_edit_and_delete_via_change_log(data_dir):
+    """Правки и удаления пишутся в журнал и применяются при загрузке."""
+    first = Transaction(100, "Еда", "2026-01-01")
+    second = Transaction(200, "Кафе", "2026-01-02")
+    third = Transaction(300, "Транспорт", "2026-01-03")
+    storage.save_transactions([first, second, third])
+    base_size = (data_dir / 'transactions.csv').stat().st_size
+
+    storage.edit_transaction(Transaction(250, "Кафе", "2026-01-02", "Ужин", id=second.id))
+    storage.delete_transaction(first.id)
+
+    loaded = storage.load_transactions()
+    assert [t.id for t in loaded] == [second.id, third.id]
+    assert (loaded[0].amount, loaded[0].description) == (250, "Ужин")
+    assert (data_dir / 'transactions.csv').stat().st_size == base_size   # основной файл не переписан
+
+def test_compaction_rewrites_base_and_clears_log(data_dir, monkeypatch):
+    """Уплотнение переносит журнал в основной файл; результат загрузки не меняется."""
+    transactions = [Transaction(100 + i, "Еда", "2026-01-01") for i in range(5)]
+    storage.save_transactions(transactions)
+    storage.delete_transaction(transactions[0].id)
+    storage.edit_transaction(Transaction(999, "Еда", "2026-01-01", id=transactions[1].id))
+    before = [(t.id, t.amount) for t in storage.load_transactions()]
+
+    storage.compact()
+
+    assert (data_dir / 'changes.csv').stat().st_size == 0
+    assert [(t.id, t.amount) for t in storage.load_transactions()] == before
+    assert len((data_dir / 'transactions.csv').read_text(encoding='utf-8').splitlines()) == 5
+
+def test_legacy_rows_get_stable_ids(data_dir):
+    """Строки без колонки 'id' получают одинаковые идентификаторы при каждой загрузке."""
+    (data_dir / 'transactions.csv').write_text(
+        'amount,category,date,description,transaction_type\n'
+        '100.0,Еда,2026-01-01,,expense\n'
+        '200.0,Еда,2026-01-02,,expense\n',
+        encoding='utf-8'
+    )
+    ids = [t.id for t in storage.load_transactions()]
+    storage.delete_transaction(ids[0])
+    storage.save_transactions([Transaction(300, "Еда", "2026-01-03")])   # переписывает заголовок
+
+    assert [t.id for t in storage.load_transactions()][:1] == ids[1:]
+
+def test_read_tail_from_offset(data_dir):
+    """Чтение с сохраненного смещения возвращает только новые строки."""
+    storage.save_transactions([Transaction(100, "Еда", "2026-01-01")])
+    first = storage.read_tail()
+    storage.save_transactions([Transaction(200, "Еда", "2026-01-02")])
+
+    tail = storage.read_tail(first['csv_offset'], first['changes_offset'], 1, first['fingerprint'])
+    assert not tail['reset']
+    assert [t.amount for t in tail['transactions']] == [200]
+
+def test_file_watcher_detects_append_and_rewrite(data_dir):
+    """Наблюдатель замечает дозапись и перезапись файла; усеченный файл читается заново."""
+    storage.save_transactions([Transaction(100, "Еда", "2026-01-01"), Transaction(200, "Еда", "2026-01-02")])
+    watcher = storage.FileWatcher()
+    first = storage.read_tail()
+    assert not watcher.changed()
+
+    storage.save_transactions([Transaction(300, "Еда", "2026-01-03")])
+    assert watcher.changed()
+    assert not watcher.changed()
+
+    # Внешний инструмент переписал файл короче прочитанного
+    lines = (data_dir / 'transactions.csv').read_text(encoding='utf-8').splitlines(keepends=True)
+    (data_dir / 'transactions.csv').write_text(''.join(lines[:2]), encoding='utf-8')
+    assert watcher.changed()
+    tail = storage.read_tail(first['csv_offset'], first['changes_offset'], 2, first['fingerprint'])
+    assert tail['reset']
+    assert [t.amount for t in tail['transactions']] == [100]
+
+def test_load_frame_matches_load_transactions(data_dir):
+    """Векторная загрузка в DataFrame дает те же операции, что и load_transactions."""
+    (data_dir / 'transactions.csv').write_text(
+        'amount,category,date,description,transaction_type\n'
+        '100.005,Еда,2026-01-01 10:00:00, Кофе ,expense\n'
+        '200,Еда,2026-01-02,,expense\n',
+        encoding='utf-8'
+    )
+    storage.save_transactions([Transaction(300, "Зарплата", "2026-01-03", transaction_type='income', currency='usd')])
+    ids = [t.id for t in storage.load_transactions()]
+    storage.delete_transaction(ids[1])
+    storage.edit_transaction(Transaction(999, "Кафе", "2026-01-04", id=ids[0]))
+
+    expected = [(t.id, t.amount, t.category, t.date, t.description, t.transaction_type, t.currency)
+                for t in storage.load_transactions()]
+    df = storage.load_frame()
+    assert df['amount'].dtype == 'int64'
+    assert list(zip(df['id'], df['amount'], df['category'], df['date'], df['description'],
+                    df['transaction_type'], df['currency'])) == expected
+
+def test_iter_rows_reads_file_in_chunks(data_dir):
+    """Файл разбирается частями заданного размера в порядке строк."""
+    saved = [Transaction(100 * i, "Еда", "2026-01-01", f"строка\n{i}") for i in range(5)]
+    storage.save_transactions(saved)
+
+    with open(storage.CSV_FILE, encoding='utf-8', newline='') as f:
+        chunks = list(storage.iter_rows(f, chunk_rows=2))
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert [t.id for chunk in chunks for t in chunk] == [t.id for t in saved]
+    assert chunks[2][0].description == "строка\n4"
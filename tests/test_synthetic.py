@@ -0,0 +1,23 @@
+import pytest
+import storage
+from benchmarks.synthetic import write_csv
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Перенаправляет хранилище во временную директорию."""
+    monkeypatch.setattr(storage, 'DATA_DIR', str(tmp_path))
+    monkeypatch.setattr(storage, 'CSV_FILE', str(tmp_path / 'transactions.csv'))
+    monkeypatch.setattr(storage, 'RATES_FILE', str(tmp_path / 'rates.csv'))
+    monkeypatch.setattr(storage, 'CHANGES_FILE', str(tmp_path / 'changes.csv'))
+    return tmp_path
+
+
+def test_write_csv_loads_back(data_dir):
+    """Синтетический журнал читается хранилищем целиком и с уникальными id."""
+    write_csv(storage.CSV_FILE, 1000, chunk_rows=300)
+    loaded = storage.load_transactions()
+
+    assert len(loaded) == 1000
+    assert len({t.id for t in loaded}) == 1000
+    assert {t.transaction_type for t in loaded} == {'expense', 'income'}
@@ -0,0 +1,72 @@
+import pytest
+from checkpoint import _to_columns
+from models import Transaction, TransactionColumns
+from tableview import SortedView, SORT_KEYS, _keys
+
+
+def _ledger():
+    return [
+        Transaction(300, "Еда", "2026-01-03", "б"),
+        Transaction(100, "Транспорт", "2026-01-01", "А"),
+        Transaction(200, "еда", "2026-01-02", "в"),
+    ]
+
+def test_sort_by_column_and_direction():
+    """Окно строк возвращается в порядке выбранной колонки и направления."""
+    view = SortedView(_ledger())
+    view.sort('amount')
+    assert [t.amount for t in view.window(0, 3)] == [100, 200, 300]
+
+    view.sort('amount', descending=True)
+    assert [t.amount for t in view.window(0, 2)] == [300, 200]
+
+    view.sort('description')
+    assert [t.description for t in view.window(0, 3)] == ['А', 'б', 'в']
+
+def test_extend_merges_into_cached_order():
+    """Дописанные строки вливаются в кэш так же, как при полной сортировке."""
+    transactions = _ledger()
+    view = SortedView(transactions)
+    view.order('date')
+    view.order('category')
+
+    appended = [Transaction(150, "Авто", "2026-01-02"), Transaction(50, "Еда", "2025-12-31")]
+    transactions.extend(appended)
+    view.extend(appended)
+
+    for column in ('date', 'category'):
+        assert view.order(column).tolist() == SortedView(transactions).order(column).tolist()
+    assert len(view) == 5
+
+def test_update_applies_edits_and_deletes():
+    """Правки и удаления меняют кэш так же, как полная пересортировка нового журнала."""
+    transactions = [
+        Transaction(100 * (i % 7 + 1), ["Еда", "Авто", "Дом"][i % 3], f"2026-01-{i % 28 + 1:02d}", f"№{i % 5}")
+        for i in range(60)
+    ]
+    view = SortedView(transactions)
+    for column in ('amount', 'category', 'date', 'description'):
+        view.order(column)
+
+    deleted, edited = [3, 17, 18, 59], [0, 10, 40, 41]
+    edits = {i: Transaction(50 - i, "Авто", "2026-01-05", "№2", id=transactions[i].id) for i in edited}
+    updated = [edits.get(i, t) for i, t in enumerate(transactions) if i not in deleted]
+    appended = [Transaction(300, "Дом", "2026-01-01")]
+    updated.extend(appended)
+    view.update(updated, deleted, edited, appended)
+
+    assert len(view) == 57
+    for column in ('amount', 'category', 'date', 'description'):
+        assert view.order(column).tolist() == SortedView(updated).order(column).tolist(), column
+
+def test_unknown_column():
+    """Неизвестная колонка сортировки отклоняется."""
+    with pytest.raises(ValueError):
+        SortedView(_ledger()).sort('currency')
+
+def test_column_keys_match_object_keys():
+    """Ключи, вычисленные по столбцам, совпадают с ключами объектов."""
+    transactions = _ledger() + [Transaction(50, "Дом", "1600-03-01", "Г")]
+    columns = TransactionColumns(_to_columns(transactions))
+    for column in SORT_KEYS:
+        assert _keys(column, columns).tolist() == _keys(column, transactions).tolist()
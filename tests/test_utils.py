@@ -1,14 +1,22 @@
 import pytest
-from utils import validate_amount, validate_date, validate_category
+from utils import validate_amount, validate_date, validate_category, validate_currency, parse_minor, format_minor
+from utils import validate_amounts, validate_dates, validate_categories, validate_currencies
 
 
 def test_validate_amount_valid_amounts():
-    """Успешная валидация корректных значений."""
-    assert validate_amount("100") == 100.0
-    assert validate_amount("100.50") == 100.50
-    assert validate_amount("123456.789") == 123456.789
-    assert validate_amount("100,50") == 100.50  # Запятая как разделитель
-    assert validate_amount("  100.50  ") == 100.50  # Пробельные символы
+    """Успешная валидация корректных значений (результат в копейках)."""
+    assert validate_amount("100") == 10000
+    assert validate_amount("100.50") == 10050
+    assert validate_amount("123456.78") == 12345678
+    assert validate_amount("100,5") == 10050  # Запятая как разделитель
+    assert validate_amount("  100.50  ") == 10050  # Пробельные символы
+    assert validate_amount("0.01") == 1
+    assert isinstance(validate_amount("100"), int)
+
+def test_validate_amount_too_many_decimals():
+    """Ошибка, если после разделителя больше двух знаков."""
+    with pytest.raises(ValueError, match="не более двух знаков"):
+        validate_amount("123456.789")
 
 def test_validate_amount_wrong_type():
     """Ошибка, если передана не строка (например, число или None)."""
@@ -59,6 +67,15 @@ def test_validate_amount_edge_cases():
     with pytest.raises(ValueError, match="Неверный формат суммы"):
         validate_amount("..50")  # Две точки подряд
 
+def test_validate_amount_too_many_digits():
+    """Целая часть суммы должна помещаться в int64 копеек."""
+    limit = "9" * 15
+    assert validate_amount(limit + ".99") == int(limit) * 100 + 99
+    with pytest.raises(ValueError, match="не более 15 цифр"):
+        validate_amount("1" + "0" * 15)
+    with pytest.raises(ValueError, match="не более 15 цифр"):
+        validate_amount("1" * 20)
+
 def test_validate_date_valid_dates():
     """Успешная валидация корректных дат."""
     assert validate_date("2026-01-06") == "2026-01-06"
@@ -265,3 +282,50 @@ def test_validate_category_invalid_characters():
         validate_category("Категория\"123")  # Кавычки не разрешены
     with pytest.raises(ValueError, match="Категория может содержать только буквы, цифры, пробелы и дефисы"):
         validate_category("Категория'123")  # Апостроф не разрешен
+
+
+def test_validate_currency():
+    """Код валюты приводится к верхнему регистру; неверные коды отклоняются."""
+    assert validate_currency(" usd ") == "USD"
+    with pytest.raises(ValueError, match="Код валюты должен быть строкой"):
+        validate_currency(None)
+    with pytest.raises(ValueError, match="Код валюты должен состоять из трех латинских букв"):
+        validate_currency("РУБ")
+    with pytest.raises(ValueError, match="Код валюты должен состоять из трех латинских букв"):
+        validate_currency("US")
+
+
+def test_parse_and_format_minor_roundtrip():
+    """Суммы в копейках записываются и разбираются без потерь."""
+    assert format_minor(10050) == "100.50"
+    assert format_minor(-7) == "-0.07"
+    assert parse_minor("100.5") == 10050
+    assert parse_minor("100.0") == 10000
+    assert parse_minor("-3") == -300
+    assert parse_minor("0.125") == 12    # старые файлы: округление до копеек
+    for value in (1, 99, 100, 123456789012, -50):
+        assert parse_minor(format_minor(value)) == value
+    with pytest.raises(ValueError, match="Неверный формат суммы"):
+        parse_minor("abc")
+
+def test_batch_validators_match_single():
+    """Пакетные валидаторы принимают и нормализуют те же значения, что и поштучные."""
+    cases = [
+        (validate_amounts, validate_amount, ["100", "100,5", " 0.01 ", "0", "-3", "1.234", "abc", "", "9" * 15, "1" * 16, 100, 100.5, None]),
+        (validate_dates, validate_date, ["2026-01-06", " 2024-02-29 ", "2026-02-30", "06.01.2026", "", 20260106]),
+        (validate_categories, validate_category, [" Продукты-2026 ", "Зарплата!", "  ", "Food 1"]),
+        (validate_currencies, validate_currency, [" usd ", "RUB", "RU", "рубль"]),
+    ]
+    for batch, single, values in cases:
+        result, valid = batch(values)
+        for value, ok, normalized in zip(values, valid, result):
+            try:
+                expected = single(value)
+            except ValueError:
+                assert not ok, (single.__name__, value)
+                continue
+            assert ok, (single.__name__, value)
+            if single is validate_date:
+                assert str(normalized)[:10] == expected
+            else:
+                assert normalized == expected
@@ -1,30 +1,55 @@
 # utils.py
 import re
 from datetime import datetime
+from decimal import Decimal, InvalidOperation, ROUND_HALF_EVEN
+import numpy as np
+import pandas as pd
 
 
-def validate_amount(amount_str: str) -> float:
-    """Проверяет и преобразует строковое представление суммы в число.
+# Количество минимальных единиц (копеек) в одной денежной единице
+MINOR_UNITS = 100
+
+# Число: целая часть и не более двух знаков после разделителя
+_AMOUNT_RE = re.compile(r"(\d+)(?:\.(\d{1,2}))?")
+
+# Недопустимые символы категории: всё, кроме букв, цифр, пробелов и дефисов
+_CATEGORY_INVALID = r"[^а-яА-Яa-zA-Z0-9\s\-]"
+
+# Сколько цифр целой части суммы помещается в int64 копеек с запасом
+_MAX_AMOUNT_DIGITS = 15
+
+
+def _digits_to_minor(integer: str, fraction: str) -> int:
+    """Собирает сумму в копейках из целой и дробной части (без float)."""
+    return int(integer) * MINOR_UNITS + int((fraction or '').ljust(2, '0'))
+
+
+def validate_amount(amount_str: str) -> int:
+    """Проверяет строковое представление суммы и переводит его в копейки.
 
     Функция нормализует входную строку, заменяя десятичные запятые на точки,
     проверяет соответствие формату числа и гарантирует, что значение положительно.
+    Сумма разбирается непосредственно из строки в целое число минимальных
+    единиц, без промежуточного преобразования во float.
 
     Args:
         amount_str (str): Строка, содержащая сумму (например, "100", "100.50", "100,50").
 
     Returns:
-        float: Сумма в виде числа с плавающей запятой.
+        int: Сумма в минимальных единицах валюты (копейках).
 
     Raises:
         ValueError: Если входные данные не являются строкой.
         ValueError: Если строка пуста или содержит недопустимые символы.
+        ValueError: Если после разделителя больше двух знаков.
+        ValueError: Если целая часть длиннее :data:`_MAX_AMOUNT_DIGITS` цифр.
         ValueError: Если итоговое число меньше или равно нулю.
 
     Examples:
         >>> validate_amount("100,50")
-        100.5
+        10050
         >>> validate_amount(" 50.0 ")
-        50.0
+        5000
     """
     if not isinstance(amount_str, str):
         raise ValueError("Сумма должна быть строкой")
@@ -39,13 +64,75 @@ def validate_amount(amount_str: str) -> float:
     # Регулярное выражение: число, возможно с десятичной частью
     if not re.fullmatch(r"^\d+(\.\d+)?$", amount_str):
         raise ValueError("Неверный формат суммы. Используйте цифры и, при необходимости, точку или запятую.")
-    
-    amount = float(amount_str)
+
+    match = _AMOUNT_RE.fullmatch(amount_str)
+    if match is None:
+        raise ValueError("Сумма может содержать не более двух знаков после запятой")
+    if len(match.group(1)) > _MAX_AMOUNT_DIGITS:
+        raise ValueError(f"Сумма может содержать не более {_MAX_AMOUNT_DIGITS} цифр до запятой")
+
+    amount = _digits_to_minor(match.group(1), match.group(2))
     if amount <= 0:
         raise ValueError("Сумма должна быть больше нуля")
     return amount
 
 
+def parse_minor(amount_str: str) -> int:
+    """Разбирает сохраненную десятичную сумму в копейки без округления через float.
+
+    Используется при чтении хранилища. В отличие от :func:`validate_amount`,
+    допускает знак и лишние знаки после точки из файлов, записанных старыми
+    версиями приложения (они округляются до копеек по банковскому правилу).
+
+    Args:
+        amount_str (str): Десятичная запись суммы, например "100.5" или "-3".
+
+    Returns:
+        int: Сумма в копейках.
+
+    Raises:
+        ValueError: Если строка не является десятичным числом.
+
+    Examples:
+        >>> parse_minor("100.5")
+        10050
+    """
+    text = amount_str.strip()
+    sign = -1 if text.startswith('-') else 1
+    match = _AMOUNT_RE.fullmatch(text.lstrip('+-'))
+    if match is not None:
+        return sign * _digits_to_minor(match.group(1), match.group(2))
+
+    try:
+        value = Decimal(text)
+    except InvalidOperation:
+        raise ValueError(f"Неверный формат суммы: {amount_str!r}")
+    if not value.is_finite():
+        raise ValueError(f"Неверный формат суммы: {amount_str!r}")
+    return int((value * MINOR_UNITS).quantize(Decimal(1), rounding=ROUND_HALF_EVEN))
+
+
+def format_minor(amount: int) -> str:
+    """Записывает сумму в копейках десятичной строкой с двумя знаками.
+
+    Преобразование выполняется целочисленно, поэтому обратный разбор
+    через :func:`parse_minor` всегда дает исходное значение.
+
+    Args:
+        amount (int): Сумма в копейках.
+
+    Returns:
+        str: Десятичная запись, например "100.50".
+
+    Examples:
+        >>> format_minor(10050)
+        '100.50'
+    """
+    sign = '-' if amount < 0 else ''
+    units, cents = divmod(abs(int(amount)), MINOR_UNITS)
+    return f'{sign}{units}.{cents:02d}'
+
+
 def validate_date(date_str: str) -> str:
     """Проверяет корректность строкового представления даты.
 
@@ -124,7 +211,135 @@ def validate_category(category_str: str) -> str:
         raise ValueError("Категория не может быть пустой")
 
     # Поиск любых символов, кроме букв, цифр, пробелов и дефисов
-    if re.search(r"[^а-яА-Яa-zA-Z0-9\s\-]", category_str):
+    if re.search(_CATEGORY_INVALID, category_str):
         raise ValueError("Категория может содержать только буквы, цифры, пробелы и дефисы")
     
-    return category_str
\ No newline at end of file
+    return category_str
+
+
+def validate_currency(currency_str: str) -> str:
+    """Проверяет код валюты и приводит его к верхнему регистру.
+
+    Args:
+        currency_str (str): Трехбуквенный код валюты (ISO 4217), например "usd".
+
+    Returns:
+        str: Код валюты в верхнем регистре.
+
+    Raises:
+        ValueError: Если входной аргумент не является строкой.
+        ValueError: Если строка не состоит ровно из трех латинских букв.
+
+    Examples:
+        >>> validate_currency(" usd ")
+        'USD'
+    """
+    if not isinstance(currency_str, str):
+        raise ValueError("Код валюты должен быть строкой")
+
+    currency_str = currency_str.strip().upper()
+    if not re.fullmatch(r"[A-Z]{3}", currency_str):
+        raise ValueError("Код валюты должен состоять из трех латинских букв (например, USD)")
+
+    return currency_str
+
+
+def _strings(values) -> pd.Series:
+    """Приводит последовательность значений к Series строк без пробелов по краям.
+
+    Как и поштучные валидаторы, принимает только строки: остальные значения
+    (числа, None) заменяются пустой строкой и поэтому считаются некорректными.
+    """
+    values = pd.Series(values, dtype=object)
+    return values.where(values.map(lambda value: isinstance(value, str)), '').astype(str).str.strip()
+
+
+def validate_amounts(values) -> tuple:
+    """Пакетный вариант :func:`validate_amount` для импорта больших файлов.
+
+    Правила те же, что у :func:`validate_amount`, но проверка выполняется
+    векторно для всей последовательности, а некорректные значения не
+    вызывают исключение, а отмечаются в маске.
+
+    Args:
+        values (Sequence[str]): Строки сумм.
+
+    Returns:
+        tuple: (numpy.ndarray int64 сумм в копейках, numpy.ndarray bool —
+        маска корректных значений). Для некорректных значений сумма равна 0.
+
+    Examples:
+        >>> amounts, valid = validate_amounts(["100,50", "-1", "0.001"])
+        >>> amounts.tolist(), valid.tolist()
+        ([10050, 0, 0], [True, False, False])
+    """
+    text = _strings(values).str.replace(',', '.', regex=False)
+    parts = text.str.extract(r'^(\d+)(?:\.(\d{1,2}))?$')
+    valid = (parts[0].notna() & (parts[0].str.len() <= _MAX_AMOUNT_DIGITS)).to_numpy(copy=True)
+
+    integer = parts[0].where(valid, '0').astype(np.int64).to_numpy()
+    fraction = parts[1].where(valid, '').fillna('').str.ljust(2, '0').astype(np.int64).to_numpy()
+    amounts = integer * MINOR_UNITS + fraction
+    valid &= amounts > 0
+    amounts[~valid] = 0
+    return amounts, valid
+
+
+def validate_dates(values) -> tuple:
+    """Пакетный вариант :func:`validate_date`.
+
+    Args:
+        values (Sequence[str]): Строки дат в формате 'YYYY-MM-DD'.
+
+    Returns:
+        tuple: (numpy.ndarray datetime64 дат, numpy.ndarray bool — маска
+        корректных значений). Для некорректных значений дата равна NaT.
+
+    Examples:
+        >>> dates, valid = validate_dates(["2026-01-06", "2026-02-30"])
+        >>> valid.tolist()
+        [True, False]
+    """
+    text = _strings(values)
+    shaped = text.str.fullmatch(r'\d{4}-\d{2}-\d{2}')
+    dates = pd.to_datetime(text.where(shaped), format='%Y-%m-%d', errors='coerce')
+    return dates.to_numpy(), dates.notna().to_numpy()
+
+
+def validate_categories(values) -> tuple:
+    """Пакетный вариант :func:`validate_category`.
+
+    Args:
+        values (Sequence[str]): Названия категорий.
+
+    Returns:
+        tuple: (numpy.ndarray object очищенных названий, numpy.ndarray bool —
+        маска корректных значений).
+
+    Examples:
+        >>> categories, valid = validate_categories([" Продукты ", "Зарплата!"])
+        >>> categories[0], valid.tolist()
+        ('Продукты', [True, False])
+    """
+    text = _strings(values)
+    valid = (text != '') & ~text.str.contains(_CATEGORY_INVALID, regex=True)
+    return text.to_numpy(), valid.to_numpy()
+
+
+def validate_currencies(values) -> tuple:
+    """Пакетный вариант :func:`validate_currency`.
+
+    Args:
+        values (Sequence[str]): Коды валют.
+
+    Returns:
+        tuple: (numpy.ndarray object кодов в верхнем регистре, numpy.ndarray bool —
+        маска корректных значений).
+
+    Examples:
+        >>> currencies, valid = validate_currencies(["usd", "рубль"])
+        >>> currencies[0], valid.tolist()
+        ('USD', [True, False])
+    """
+    text = _strings(values).str.upper()
+    return text.to_numpy(), text.str.fullmatch(r'[A-Z]{3}').to_numpy()